@@ -0,0 +1,166 @@
+"""
+Benchmark cases for each web service.  Each case loads one IO class with the
+given options; "stations" sets the size of the synthetic responses (see
+benchmarks.synthetic).
+"""
+
+from climata.acis import StationMetaIO, StationDataIO, GridDataIO
+from climata.usgs import SiteIO, DailyValueIO, InstantValueIO
+from climata.hydromet import DailyDataIO, InstantDataIO, MultiStationDailyIO
+from climata.nws import EnsembleForecastIO
+from climata.cocorahs import CocorahsIO
+from climata.epa import WqxDomainIO
+from climata.snotel import StationDailyDataIO
+
+
+class Case(object):
+    def __init__(self, name, io_class, stations=10, synthetic=True, **options):
+        self.name = name
+        self.io_class = io_class
+        self.stations = stations
+        self.synthetic = synthetic
+        self.options = options
+
+    def load(self):
+        return self.io_class(**self.options)
+
+
+ACIS_ELEMS = ['pcpn', 'maxt', 'mint']
+HYDROMET_STATIONS = ['ACAO', 'HPD', 'KFLO', 'ABEI']
+
+CASES = {
+    # Small enough to check in (benchmarks/fixtures/small)
+    'small': [
+        Case('acis-meta', StationMetaIO, stations=100, state='MN'),
+        Case(
+            'acis-data', StationDataIO, stations=10, state='MN',
+            parameter=ACIS_ELEMS,
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case('usgs-site', SiteIO, stations=100, state='MN'),
+        Case(
+            'usgs-site-columnar', SiteIO, stations=100, state='MN',
+            columnar=True,
+        ),
+        Case(
+            'usgs-dv', DailyValueIO, stations=5, state='MN',
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'usgs-dv-json', DailyValueIO, stations=5, state='MN',
+            start_date='2014-01-01', end_date='2014-12-31', format='json',
+        ),
+        Case(
+            'usgs-iv', InstantValueIO, stations=2, state='MN',
+            start_date='2014-07-01', end_date='2014-07-07',
+        ),
+        Case(
+            'usgs-iv-json', InstantValueIO, stations=2, state='MN',
+            start_date='2014-07-01', end_date='2014-07-07', format='json',
+        ),
+        Case(
+            'hydromet-daily', DailyDataIO, station='ACAO',
+            parameter=['QD', 'GD'],
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'hydromet-multi', MultiStationDailyIO, station=HYDROMET_STATIONS,
+            parameter=['QD'],
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'nws-ensemble', EnsembleForecastIO, stations=2,
+            start_date='2014-07-01', basin='RussianNapa',
+        ),
+        Case(
+            'cocorahs', CocorahsIO, stations=10, state='MN', county='HN',
+            start_date='2014-07-01', end_date='2014-07-31',
+        ),
+        Case('epa-domain', WqxDomainIO, stations=500, domain='Characteristic'),
+        Case(
+            'snotel-daily', StationDailyDataIO, station='302:OR:SNTL',
+            start_date='2014-07-01', end_date='2014-07-31',
+        ),
+    ],
+
+    # Scaled up variants (generate with: python -m benchmarks.run --generate
+    # --scale large)
+    'large': [
+        Case('acis-meta', StationMetaIO, stations=10000, state='MN'),
+        Case(
+            'acis-data-stations', StationDataIO, stations=10000, state='MN',
+            parameter=ACIS_ELEMS,
+            start_date='2014-07-01', end_date='2014-07-31',
+        ),
+        Case(
+            'acis-data-70yr', StationDataIO, stations=5, state='MN',
+            parameter=ACIS_ELEMS,
+            start_date='1945-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'acis-data-decoded', StationDataIO, stations=5, state='MN',
+            parameter=ACIS_ELEMS, decoded=True,
+            start_date='1945-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'acis-grid', GridDataIO, bbox='-96,43,-92,47', parameter='pcpn',
+            start_date='2013-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'acis-grid-memmap', GridDataIO, bbox='-96,43,-92,47',
+            parameter='pcpn', memmap=True,
+            start_date='2013-01-01', end_date='2014-12-31',
+        ),
+        Case('usgs-site', SiteIO, stations=10000, state='MN'),
+        Case(
+            'usgs-site-columnar', SiteIO, stations=10000, state='MN',
+            columnar=True,
+        ),
+        Case(
+            'usgs-dv-70yr', DailyValueIO, stations=5, state='MN',
+            start_date='1945-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'usgs-dv-70yr-json', DailyValueIO, stations=5, state='MN',
+            start_date='1945-01-01', end_date='2014-12-31', format='json',
+        ),
+        Case(
+            'usgs-dv-basin', DailyValueIO, stations=1000, basin='07010206',
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'usgs-dv-basin-json', DailyValueIO, stations=1000,
+            basin='07010206', format='json',
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'usgs-iv', InstantValueIO, stations=10, state='MN',
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'usgs-iv-json', InstantValueIO, stations=10, state='MN',
+            start_date='2014-01-01', end_date='2014-12-31', format='json',
+        ),
+        Case(
+            'hydromet-daily-70yr', DailyDataIO, station='ACAO',
+            parameter=['QD', 'GD'],
+            start_date='1945-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'hydromet-instant', InstantDataIO, station='ACAO',
+            parameter=['Q', 'GH'],
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'nws-ensemble', EnsembleForecastIO, stations=50,
+            start_date='2014-07-01', basin='RussianNapa',
+        ),
+        Case(
+            'cocorahs', CocorahsIO, stations=300, state='MN', county='HN',
+            start_date='2014-01-01', end_date='2014-12-31',
+        ),
+        Case(
+            'epa-domain', WqxDomainIO, stations=10000, domain='Characteristic'
+        ),
+    ],
+}
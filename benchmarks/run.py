@@ -0,0 +1,189 @@
+"""
+Offline benchmarks for climata IO classes, using recorded or synthetic
+responses (see climata.replay).
+
+Usage:
+
+    # Run benchmarks against the checked-in fixtures
+    python -m benchmarks.run
+
+    # Generate (or regenerate) synthetic fixtures for the large cases
+    python -m benchmarks.run --scale large --generate
+
+    # Record fixtures from the live web services
+    python -m benchmarks.run --record
+
+For each case, reports the number of rows (including nested time series),
+median latency to load, parse and iterate over all rows, throughput in rows
+per second, and peak memory allocated while loading (via tracemalloc).  The
+"parse MB" column is the peak memory allocated after each response has been
+loaded (i.e. not counting the response body), which compares the parsers for
+formats with different response sizes.
+"""
+
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+from climata import events, replay, session, snotel, throttle
+from climata.snotel.transport import RecordingTransport, ReplayTransport
+from .cases import CASES
+from .synthetic import SyntheticSession, SyntheticTransport
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def count_rows(io):
+    """
+    Iterate over every row (mapping each to a namedtuple) and return the
+    total, including nested time series.
+    """
+    rows = 0
+    for item in io:
+        data = getattr(item, 'data', None)
+        if io.nested and data is not None:
+            for row in data:
+                rows += 1
+        else:
+            rows += 1
+    return rows
+
+
+class MemoryPeak(object):
+    """
+    Tracks the overall peak memory allocated (via tracemalloc), as well as
+    the peak allocated while parsing (and iterating over) each response once
+    it has been loaded.  Register as an event callback to measure the latter
+    (requires tracemalloc.reset_peak(), i.e. Python 3.9+).
+    """
+
+    def __init__(self):
+        self.base = None
+        self.total = 0
+        self.parse = 0
+
+    def __call__(self, event):
+        if event['event'] == 'load':
+            self.update(parsing=False)
+            self.base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        elif event['event'] == 'parse':
+            self.update()
+
+    def update(self, parsing=True):
+        peak = tracemalloc.get_traced_memory()[1]
+        self.total = max(self.total, peak)
+        if parsing and self.base is not None:
+            self.parse = max(self.parse, peak - self.base)
+
+
+def run_case(case, repeat=3):
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        rows = count_rows(case.load())
+        latencies.append(time.perf_counter() - start)
+
+    memory = MemoryPeak()
+    by_load = hasattr(tracemalloc, 'reset_peak')
+    tracemalloc.start()
+    if by_load:
+        events.register(memory)
+    try:
+        count_rows(case.load())
+        memory.update()
+    finally:
+        events.unregister(memory)
+        tracemalloc.stop()
+
+    latency = statistics.median(latencies)
+    return {
+        'rows': rows,
+        'latency': latency,
+        'throughput': rows / latency if latency else 0,
+        'peak_mb': memory.total / 1024.0 / 1024.0,
+        'parse_mb': memory.parse / 1024.0 / 1024.0 if by_load else None,
+    }
+
+
+def generate(cases, path, live=False):
+    for case in cases:
+        if live:
+            client = replay.RecordingSession(path)
+        elif case.synthetic:
+            client = replay.RecordingSession(path, SyntheticSession(
+                stations=case.stations
+            ))
+            snotel.set_transport(
+                RecordingTransport(path, SyntheticTransport())
+            )
+        else:
+            print("%-20s (skipped: no synthetic data)" % case.name)
+            continue
+        session.set_session(client)
+        rows = count_rows(case.load())
+        print("%-20s %10d rows" % (case.name, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('cases', nargs='*', help="case names (default: all)")
+    parser.add_argument('--scale', default='small', choices=sorted(CASES))
+    parser.add_argument('--fixtures', help="fixture directory")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--generate', action='store_true',
+        help="generate synthetic fixtures instead of running benchmarks",
+    )
+    parser.add_argument(
+        '--record', action='store_true',
+        help="record fixtures from live services",
+    )
+    args = parser.parse_args()
+
+    path = args.fixtures or os.path.join(FIXTURES, args.scale)
+    cases = [
+        case for case in CASES[args.scale]
+        if not args.cases or case.name in args.cases
+    ]
+
+    try:
+        if args.record:
+            snotel.set_transport(RecordingTransport(path))
+            generate(cases, path, live=True)
+            return
+
+        # No need to rate limit synthetic or recorded responses
+        throttle.ENABLED = False
+        if args.generate:
+            generate(cases, path)
+            return
+
+        session.set_session(replay.ReplaySession(path))
+        snotel.set_transport(ReplayTransport(path))
+        print("%-20s %10s %10s %12s %10s %10s" % (
+            "case", "rows", "latency", "rows/s", "peak MB", "parse MB"
+        ))
+        for case in cases:
+            try:
+                result = run_case(case, args.repeat)
+            except replay.FixtureNotFound:
+                print("%-20s (skipped: no fixture)" % case.name)
+                continue
+            if result['parse_mb'] is None:
+                parse_mb = "-"
+            else:
+                parse_mb = "%.1f" % result['parse_mb']
+            print("%-20s %10d %9.3fs %12.0f %10.1f %10s" % (
+                case.name, result['rows'], result['latency'],
+                result['throughput'], result['peak_mb'], parse_mb,
+            ))
+    finally:
+        session.set_session(None)
+        snotel.set_transport(None)
+        throttle.ENABLED = True
+
+
+if __name__ == '__main__':
+    main()
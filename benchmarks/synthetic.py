@@ -0,0 +1,638 @@
+"""
+Synthetic web service responses for generating benchmark fixtures.
+
+SyntheticSession is a stand-in for requests.Session that generates responses
+in the same format as each web service, sized according to the requested date
+range and the configured number of stations.  The output is deterministic, so
+fixtures can be regenerated at any scale (see benchmarks.run --generate).
+"""
+
+import csv
+import io
+import json
+import random
+import zipfile
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qsl
+from xml.etree import ElementTree
+from suds.transport import Transport, Reply
+from climata.base import parse_date
+from climata.cache import make_key
+from climata.replay import make_response
+from climata.snotel.transport import normalize
+
+
+class SyntheticSession(object):
+    def __init__(self, stations=10):
+        self.stations = stations
+
+    def request(self, method, url, params=None, **kwargs):
+        parts = urlparse(url)
+        query = dict(parse_qsl(parts.query))
+        if isinstance(params, dict):
+            query.update(params)
+        if 'params' in query:
+            # ACIS JSON-encoded parameters
+            query.update(json.loads(query.pop('params')))
+
+        # Deterministic values for each request
+        rng = random.Random(make_key(url, params, method))
+
+        host = parts.netloc
+        path = parts.path.strip('/').split('/')[-1]
+        if host == 'data.rcc-acis.org':
+            generate = ACIS[path]
+        elif host == 'waterservices.usgs.gov':
+            generate = NWIS[path]
+        elif host == 'www.usbr.gov':
+            generate = hydromet_csv
+        elif host == 'www.cnrfc.noaa.gov':
+            generate = ensemble_zip
+        elif host == 'data.cocorahs.org':
+            generate = cocorahs_xml
+        elif host == 'cdx.epa.gov':
+            generate = wqx_zip
+        else:
+            raise ValueError("No synthetic data for %s" % url)
+
+        body = generate(self, rng, query, url)
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        return make_response(body, 200, {}, url, 'utf-8')
+
+    def close(self):
+        pass
+
+
+def date_range(start, end):
+    if isinstance(start, str):
+        start, end = parse_date(start), parse_date(end)
+    start, end = start.date(), end.date()
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def station_ids(session, prefix=''):
+    return ['%s%06d' % (prefix, i) for i in range(session.stations)]
+
+
+def value(rng, missing=0.05):
+    if rng.random() < missing:
+        return 'M'
+    return '%.2f' % rng.uniform(0, 100)
+
+
+def acis_value(rng):
+    # Also include trace, subsequent and accumulated values
+    flag = rng.random()
+    if flag < 0.05:
+        return 'T'
+    if flag < 0.07:
+        return 'S'
+    if flag < 0.08:
+        return '%.2fA' % rng.uniform(0, 100)
+    return value(rng)
+
+
+# ACIS (JSON)
+
+def acis_meta(rng, uid):
+    return {
+        'uid': uid,
+        'name': 'STATION %s' % uid,
+        'state': 'MN',
+        'sids': ['%06d 2' % uid],
+        'll': [round(rng.uniform(-97, -90), 4), round(rng.uniform(43, 49), 4)],
+        'elev': round(rng.uniform(600, 2000), 1),
+    }
+
+
+def acis_stnmeta(session, rng, query, url):
+    meta = query.get('meta', '')
+    elems = query.get('elems', [])
+    if isinstance(meta, str):
+        meta = meta.split(',')
+    if isinstance(elems, str):
+        elems = elems.split(',')
+    sites = []
+    for uid in range(session.stations):
+        site = acis_meta(rng, uid)
+        if 'valid_daterange' in meta:
+            site['valid_daterange'] = [
+                acis_daterange(rng) for elem in elems
+            ]
+        sites.append(site)
+    return json.dumps({'meta': sites})
+
+
+def acis_daterange(rng):
+    # Some elements are not observed at all, and some stations are inactive
+    if rng.random() < 0.3:
+        return []
+    start = datetime(rng.randint(1890, 2010), rng.randint(1, 12), 1)
+    if rng.random() < 0.7:
+        end = datetime(2014, 12, 31)
+    else:
+        end = min(
+            start + timedelta(days=rng.randint(365, 365 * 40)),
+            datetime(2014, 12, 31),
+        )
+    return [start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')]
+
+
+def acis_multistndata(session, rng, query, url):
+    dates = date_range(query['sdate'], query['edate'])
+    elems = query['elems']
+    if isinstance(elems, str):
+        elems = elems.split(',')
+    return json.dumps({'data': [{
+        'meta': acis_meta(rng, uid),
+        'data': [[acis_value(rng) for elem in elems] for date in dates],
+    } for uid in range(session.stations)]})
+
+
+def acis_griddata(session, rng, query, url):
+    # PRISM-like grid (1/24 degree) covering the bounding box, from south to
+    # north
+    west, south, east, north = map(float, query['bbox'].split(','))
+    lats = [
+        round(south + i / 24.0, 4)
+        for i in range(int(round((north - south) * 24)) + 1)
+    ]
+    lons = [
+        round(west + i / 24.0, 4)
+        for i in range(int(round((east - west) * 24)) + 1)
+    ]
+    elems = query['elems']
+    if isinstance(elems, str):
+        elems = elems.split(',')
+    data = []
+    for date in date_range(query['sdate'], query['edate']):
+        row = [date.strftime('%Y-%m-%d')]
+        for i, elem in enumerate(elems):
+            # Values depend only on the date and location, so that adjacent
+            # requests agree
+            row.append([[
+                grid_value(date.toordinal() + i, lat, lon)
+                for lon in lons
+            ] for lat in lats])
+        data.append(row)
+    return json.dumps({
+        'meta': {
+            'lat': [[lat] * len(lons) for lat in lats],
+            'lon': [lons for lat in lats],
+        },
+        'data': data,
+    })
+
+
+def grid_value(day, lat, lon):
+    cell = int(round(lat * 24)) * 7919 + int(round(lon * 24)) * 104729
+    key = (day * 31 + cell) % 1009
+    if key % 97 == 0:
+        return -999
+    return key / 500.0
+
+
+ACIS = {
+    'StnMeta': acis_stnmeta,
+    'MultiStnData': acis_multistndata,
+    'GridData': acis_griddata,
+}
+
+
+# NWIS (RDB and WaterML)
+
+RDB_FIELDS = [
+    'agency_cd', 'site_no', 'station_nm', 'site_tp_cd', 'dec_lat_va',
+    'dec_long_va', 'parm_cd', 'begin_date', 'end_date', 'count_nu',
+]
+RDB_TYPES = ['5s', '15s', '50s', '7s', '16s', '16s', '5s', '20d', '20d', '5n']
+
+
+def nwis_site(session, rng, query, url):
+    lines = [
+        '# Synthetic NWIS site data',
+        '\t'.join(RDB_FIELDS),
+        '\t'.join(RDB_TYPES),
+    ]
+    for site in station_ids(session, '05'):
+        lines.append('\t'.join([
+            'USGS', site, 'SYNTHETIC RIVER %s' % site, 'ST',
+            '%.4f' % rng.uniform(43, 49), '%.4f' % rng.uniform(-97, -90),
+            '00060', '1950-01-01', '2014-12-31', str(rng.randint(1, 25000)),
+        ]))
+    return '\n'.join(lines) + '\n'
+
+
+WATERML = """<?xml version="1.0" encoding="UTF-8"?>
+<ns1:timeSeriesResponse xmlns:ns1="http://www.cuahsi.org/waterML/1.1/">
+<ns1:queryInfo><ns1:criteria MethodCalled="getSiteTimeseries"/>\
+</ns1:queryInfo>
+%s
+</ns1:timeSeriesResponse>"""
+
+WATERML_SERIES = """<ns1:timeSeries name="USGS:%(site)s:00060:00003">
+<ns1:sourceInfo>
+<ns1:siteName>SYNTHETIC RIVER %(site)s</ns1:siteName>
+<ns1:siteCode network="NWIS" agencyCode="USGS">%(site)s</ns1:siteCode>
+<ns1:geoLocation><ns1:geogLocation srs="EPSG:4326">
+<ns1:latitude>%(lat).4f</ns1:latitude>
+<ns1:longitude>%(lng).4f</ns1:longitude>
+</ns1:geogLocation></ns1:geoLocation>
+</ns1:sourceInfo>
+<ns1:variable>
+<ns1:variableCode vocabulary="NWIS:UnitValues" default="true">00060\
+</ns1:variableCode>
+<ns1:variableName>Streamflow, ft&#179;/s</ns1:variableName>
+<ns1:unit><ns1:unitCode>ft3/s</ns1:unitCode></ns1:unit>
+</ns1:variable>
+<ns1:values>
+%(values)s
+</ns1:values>
+</ns1:timeSeries>"""
+
+
+def nwis_waterml(session, rng, query, url):
+    dates = date_range(query['startDT'], query['endDT'])
+    if url.endswith('/iv/'):
+        times = [
+            datetime(date.year, date.month, date.day) + timedelta(minutes=m)
+            for date in dates for m in range(0, 24 * 60, 15)
+        ]
+    else:
+        times = [datetime(date.year, date.month, date.day) for date in dates]
+    if query.get('format') == 'json':
+        return nwis_json(session, rng, times)
+    series = []
+    for site in station_ids(session, '05'):
+        series.append(WATERML_SERIES % {
+            'site': site,
+            'lat': rng.uniform(43, 49),
+            'lng': rng.uniform(-97, -90),
+            'values': '\n'.join(
+                '<ns1:value qualifiers="A" dateTime="%s">%.1f</ns1:value>' % (
+                    time.strftime('%Y-%m-%dT%H:%M:%S.000'),
+                    rng.uniform(0, 5000),
+                ) for time in times
+            ),
+        })
+    return WATERML % '\n'.join(series)
+
+
+def nwis_json(session, rng, times):
+    series = []
+    for site in station_ids(session, '05'):
+        series.append({
+            'name': 'USGS:%s:00060:00003' % site,
+            'sourceInfo': {
+                'siteName': 'SYNTHETIC RIVER %s' % site,
+                'siteCode': [{
+                    'value': site, 'network': 'NWIS', 'agencyCode': 'USGS',
+                }],
+                'geoLocation': {'geogLocation': {
+                    'srs': 'EPSG:4326',
+                    'latitude': rng.uniform(43, 49),
+                    'longitude': rng.uniform(-97, -90),
+                }},
+            },
+            'variable': {
+                'variableCode': [{
+                    'value': '00060', 'network': 'NWIS', 'default': True,
+                }],
+                'variableName': 'Streamflow, ft&#179;/s',
+                'unit': {'unitCode': 'ft3/s'},
+            },
+            'values': [{'value': [{
+                'value': '%.1f' % rng.uniform(0, 5000),
+                'qualifiers': ['A'],
+                'dateTime': time.strftime('%Y-%m-%dT%H:%M:%S.000'),
+            } for time in times]}],
+        })
+    return json.dumps({
+        'name': 'ns1:timeSeriesResponseType',
+        'value': {
+            'queryInfo': {'criteria': {'parameter': []}},
+            'timeSeries': series,
+        },
+    })
+
+
+NWIS = {
+    'site': nwis_site,
+    'dv': nwis_waterml,
+    'iv': nwis_waterml,
+}
+
+
+# Hydromet (CSV embedded in HTML)
+
+def hydromet_csv(session, rng, query, url):
+    pcodes = query['parameter'].split(',')
+    station = pcodes[0].split(' ')[0]
+    start = datetime(
+        int(query['syer']), int(query['smnth']), int(query['sdy'])
+    )
+    end = datetime(int(query['eyer']), int(query['emnth']), int(query['edy']))
+    dates = date_range(start, end)
+    if 'webdaycsv' in url:
+        # Instant (15-minute) values
+        label, fmt = 'DATE       TIME', '%m/%d/%Y %H:%M'
+        dates = [
+            datetime(date.year, date.month, date.day) + timedelta(minutes=m)
+            for date in dates for m in range(0, 24 * 60, 15)
+        ]
+    else:
+        label, fmt = '      DATE', '%m/%d/%Y'
+    lines = ['<HTML><BODY><PRE>', 'BEGIN DATA']
+    lines.append(', '.join([label] + ['%s %s' % (
+        station, pcode.split(' ')[1]
+    ) for pcode in pcodes]))
+    for date in dates:
+        lines.append(', '.join([date.strftime(fmt)] + [
+            '%10.2f' % rng.uniform(0, 1000) for pcode in pcodes
+        ]))
+    lines += ['END DATA', '</PRE></BODY></HTML>']
+    return '\n'.join(lines) + '\n'
+
+
+# CNRFC ensemble forecasts (zipped CSV)
+
+def ensemble_zip(session, rng, query, url):
+    sites = station_ids(session, 'S')
+    traces = 60
+    start = datetime.strptime(url.split('/')[-1][:10], '%Y%m%d%H')
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['GMT'] + [site for site in sites for i in range(traces)])
+    writer.writerow([''] + ['QINE' for site in sites for i in range(traces)])
+    for day in range(365):
+        date = start + timedelta(days=day)
+        writer.writerow([date.strftime('%Y-%m-%d %H:%M:%S')] + [
+            '%.3f' % rng.uniform(0, 50) for i in range(len(sites) * traces)
+        ])
+    return make_zip('ensemble.csv', output.getvalue())
+
+
+def make_zip(filename, text):
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(filename, text.encode('utf-8'))
+    return output.getvalue()
+
+
+# CoCoRaHS (XML)
+
+def cocorahs_xml(session, rng, query, url):
+    start = datetime.strptime(query['StartDate'], '%m/%d/%Y')
+    end = datetime.strptime(query['EndDate'], '%m/%d/%Y')
+    reports = []
+    for date in date_range(start, end):
+        for station in station_ids(session, 'MN-HN-'):
+            reports.append(
+                '<DailyPrecipReport>'
+                '<StationNumber>%(station)s</StationNumber>'
+                '<StationName>Synthetic %(station)s</StationName>'
+                '<Latitude>%(lat).4f</Latitude>'
+                '<Longitude>%(lng).4f</Longitude>'
+                '<ObservationDate>%(date)s</ObservationDate>'
+                '<ObservationTime>07:00 AM</ObservationTime>'
+                '<TotalPrecipAmt>%(precip).2f</TotalPrecipAmt>'
+                '</DailyPrecipReport>' % {
+                    'station': station,
+                    'lat': rng.uniform(44, 46),
+                    'lng': rng.uniform(-94, -93),
+                    'date': date.strftime('%Y-%m-%d'),
+                    'precip': rng.uniform(0, 2),
+                }
+            )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><Cocorahs>'
+        '<DailyPrecipReports>%s</DailyPrecipReports></Cocorahs>'
+    ) % ''.join(reports)
+
+
+# EPA WQX domain values (zipped XML)
+
+def wqx_zip(session, rng, query, url):
+    rows = []
+    for i in range(session.stations):
+        rows.append(
+            '<WQXElementRow>'
+            '<WQXElementRowColumn colname="UniqueIdentifier" value="%d"/>'
+            '<WQXElementRowColumn colname="Name" value="Name %d"/>'
+            '<WQXElementRowColumn colname="Description" value="Desc %d"/>'
+            '<WQXElementRowColumn colname="LastChangeDate" '
+            'value="2014-01-01T00:00:00"/>'
+            '</WQXElementRow>' % (i, i, i)
+        )
+    return make_zip('domain.xml', (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<WQXElement xmlns="http://www.exchangenetwork.net/schema/wqx/2">'
+        '%s</WQXElement>'
+    ) % ''.join(rows))
+
+
+# SNOTEL AWDB (SOAP)
+
+AWDB_NS = 'http://www.wcc.nrcs.usda.gov/ns/awdbWebService'
+
+# Subset of the AWDB WSDL covering the operations used by
+# StationDailyDataIO (getElements, getStationElements and getData)
+AWDB_WSDL = """<?xml version="1.0" encoding="UTF-8"?>
+<definitions xmlns="http://schemas.xmlsoap.org/wsdl/"
+    xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+    xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:tns="%(ns)s" targetNamespace="%(ns)s" name="AwdbWebService">
+<types>
+<xs:schema targetNamespace="%(ns)s" elementFormDefault="unqualified">
+<xs:complexType name="element"><xs:sequence>
+  <xs:element name="elementCd" type="xs:string" minOccurs="0"/>
+  <xs:element name="name" type="xs:string" minOccurs="0"/>
+  <xs:element name="storedUnitCd" type="xs:string" minOccurs="0"/>
+</xs:sequence></xs:complexType>
+<xs:complexType name="stationElement"><xs:sequence>
+  <xs:element name="beginDate" type="xs:string" minOccurs="0"/>
+  <xs:element name="dataPrecision" type="xs:int" minOccurs="0"/>
+  <xs:element name="duration" type="xs:string" minOccurs="0"/>
+  <xs:element name="elementCd" type="xs:string" minOccurs="0"/>
+  <xs:element name="endDate" type="xs:string" minOccurs="0"/>
+  <xs:element name="ordinal" type="xs:int"/>
+  <xs:element name="originalUnitCd" type="xs:string" minOccurs="0"/>
+  <xs:element name="stationTriplet" type="xs:string" minOccurs="0"/>
+  <xs:element name="storedUnitCd" type="xs:string" minOccurs="0"/>
+</xs:sequence></xs:complexType>
+<xs:complexType name="data"><xs:sequence>
+  <xs:element name="beginDate" type="xs:string" minOccurs="0"/>
+  <xs:element name="endDate" type="xs:string" minOccurs="0"/>
+  <xs:element name="flags" type="xs:string" minOccurs="0"
+      maxOccurs="unbounded" nillable="true"/>
+  <xs:element name="stationTriplet" type="xs:string" minOccurs="0"/>
+  <xs:element name="values" type="xs:decimal" minOccurs="0"
+      maxOccurs="unbounded" nillable="true"/>
+</xs:sequence></xs:complexType>
+<xs:element name="getElements"><xs:complexType><xs:sequence/>
+</xs:complexType></xs:element>
+<xs:element name="getElementsResponse"><xs:complexType><xs:sequence>
+  <xs:element name="return" type="tns:element" minOccurs="0"
+      maxOccurs="unbounded"/>
+</xs:sequence></xs:complexType></xs:element>
+<xs:element name="getStationElements"><xs:complexType><xs:sequence>
+  <xs:element name="stationTriplet" type="xs:string" minOccurs="0"/>
+  <xs:element name="beginDate" type="xs:string" minOccurs="0"/>
+  <xs:element name="endDate" type="xs:string" minOccurs="0"/>
+</xs:sequence></xs:complexType></xs:element>
+<xs:element name="getStationElementsResponse"><xs:complexType><xs:sequence>
+  <xs:element name="return" type="tns:stationElement" minOccurs="0"
+      maxOccurs="unbounded"/>
+</xs:sequence></xs:complexType></xs:element>
+<xs:element name="getData"><xs:complexType><xs:sequence>
+  <xs:element name="stationTriplets" type="xs:string"
+      maxOccurs="unbounded"/>
+  <xs:element name="elementCd" type="xs:string"/>
+  <xs:element name="ordinal" type="xs:int"/>
+  <xs:element name="duration" type="xs:string"/>
+  <xs:element name="getFlags" type="xs:boolean"/>
+  <xs:element name="beginDate" type="xs:string"/>
+  <xs:element name="endDate" type="xs:string"/>
+  <xs:element name="alwaysReturnDailyFeb29" type="xs:boolean"
+      minOccurs="0"/>
+</xs:sequence></xs:complexType></xs:element>
+<xs:element name="getDataResponse"><xs:complexType><xs:sequence>
+  <xs:element name="return" type="tns:data" minOccurs="0"
+      maxOccurs="unbounded"/>
+</xs:sequence></xs:complexType></xs:element>
+</xs:schema>
+</types>
+%(messages)s
+<portType name="AwdbWebService">%(operations)s</portType>
+<binding name="AwdbWebServiceSoapBinding" type="tns:AwdbWebService">
+<soap:binding style="document"
+    transport="http://schemas.xmlsoap.org/soap/http"/>
+%(bindings)s
+</binding>
+<service name="AwdbWebService">
+<port name="AwdbWebServiceImplPort"
+    binding="tns:AwdbWebServiceSoapBinding">
+<soap:address location="https://wcc.sc.egov.usda.gov/awdbWebService/services"/>
+</port>
+</service>
+</definitions>
+"""
+
+AWDB_OPERATIONS = ['getElements', 'getStationElements', 'getData']
+
+
+def awdb_wsdl():
+    messages, operations, bindings = [], [], []
+    for op in AWDB_OPERATIONS:
+        for name in op, op + 'Response':
+            messages.append(
+                '<message name="%s"><part name="parameters" element="tns:%s"/>'
+                '</message>' % (name, name)
+            )
+        operations.append(
+            '<operation name="%s"><input message="tns:%s"/>'
+            '<output message="tns:%sResponse"/></operation>' % (op, op, op)
+        )
+        bindings.append(
+            '<operation name="%s"><soap:operation soapAction=""/>'
+            '<input><soap:body use="literal"/></input>'
+            '<output><soap:body use="literal"/></output></operation>' % op
+        )
+    return AWDB_WSDL % {
+        'ns': AWDB_NS,
+        'messages': '\n'.join(messages),
+        'operations': ''.join(operations),
+        'bindings': '\n'.join(bindings),
+    }
+
+
+AWDB_ELEMENTS = [
+    ('WTEQ', 'SNOW WATER EQUIVALENT', 'in'),
+    ('PREC', 'PRECIPITATION ACCUMULATION', 'in'),
+    ('TAVG', 'AIR TEMPERATURE AVERAGE', 'degF'),
+    ('SNWD', 'SNOW DEPTH', 'in'),
+]
+
+
+class SyntheticTransport(Transport):
+    """
+    suds transport generating the AWDB WSDL and SOAP responses (the SNOTEL
+    equivalent of SyntheticSession).  Each station has daily data for every
+    element in AWDB_ELEMENTS.
+    """
+
+    def open(self, request):
+        return io.BytesIO(awdb_wsdl().encode('utf-8'))
+
+    def send(self, request):
+        rng = random.Random(make_key(
+            str(request.url), normalize(request.message), 'POST'
+        ))
+        body = ElementTree.fromstring(request.message).find(
+            '{http://schemas.xmlsoap.org/soap/envelope/}Body'
+        )
+        call = body[0]
+        op = call.tag.split('}')[-1]
+        params = {}
+        for child in call:
+            params.setdefault(child.tag.split('}')[-1], child.text)
+        results = AWDB[op](rng, params)
+        response = (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<soap:Envelope '
+            'xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/">'
+            '<soap:Body><ns2:%sResponse xmlns:ns2="%s">%s</ns2:%sResponse>'
+            '</soap:Body></soap:Envelope>'
+        ) % (op, AWDB_NS, ''.join(
+            '<return>%s</return>' % ''.join(
+                '<%s>%s</%s>' % (name, val, name) for name, val in result
+            ) for result in results
+        ), op)
+        return Reply(200, {'Content-Type': 'text/xml'},
+                     response.encode('utf-8'))
+
+
+def awdb_elements(rng, params):
+    return [
+        [('elementCd', code), ('name', name), ('storedUnitCd', unit)]
+        for code, name, unit in AWDB_ELEMENTS
+    ]
+
+
+def awdb_station_elements(rng, params):
+    return [[
+        ('beginDate', '1980-10-01 00:00:00'),
+        ('dataPrecision', 1),
+        ('duration', duration),
+        ('elementCd', code),
+        ('endDate', '2100-01-01 00:00:00'),
+        ('ordinal', 1),
+        ('originalUnitCd', unit),
+        ('stationTriplet', params['stationTriplet']),
+        ('storedUnitCd', unit),
+    ]
+        for code, name, unit in AWDB_ELEMENTS
+        for duration in ('DAILY', 'HOURLY')
+    ]
+
+
+def awdb_data(rng, params):
+    dates = date_range(params['beginDate'], params['endDate'])
+    result = [
+        ('beginDate', '%s 00:00:00' % dates[0]),
+        ('endDate', '%s 00:00:00' % dates[-1]),
+    ]
+    for date in dates:
+        result.append(('flags', 'V'))
+    result.append(('stationTriplet', params['stationTriplets']))
+    for date in dates:
+        result.append(('values', '%.1f' % rng.uniform(0, 40)))
+    return [result]
+
+
+AWDB = {
+    'getElements': awdb_elements,
+    'getStationElements': awdb_station_elements,
+    'getData': awdb_data,
+}
@@ -1,9 +1,17 @@
 import json
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import timedelta
 from wq.io import JsonParser, BaseIO, TupleMapper, TimeSeriesMapper
 from climata.base import (
     WebserviceLoader, FilterOpt, DateOpt, ChoiceOpt,
-    parse_date, fill_date_range,
+    parse_date,
 )
+from climata.parsers import iter_json_array
+from climata.columns import ArrayMixin, ColumnData
+from climata.dates import DateRange
+from .values import DecodedValues, decode_values
+from .grid import BboxOpt, read_grids, merge_grids
 from .constants import (
     ELEMENT_BY_ID,
     ELEMENT_BY_NAME,
@@ -32,6 +40,7 @@ class AcisIO(WebserviceLoader, JsonParser, TupleMapper, BaseIO):
     state = FilterOpt(multi=True)
     county = FilterOpt(multi=True)
     basin = FilterOpt(multi=True)
+    bbox = BboxOpt()
     station = FilterOpt(ignored=True)
 
     # Additional ACIS-specific option
@@ -49,6 +58,9 @@ class AcisIO(WebserviceLoader, JsonParser, TupleMapper, BaseIO):
         return "http://data.rcc-acis.org/%s" % self.path
 
     def serialize_params(self, params, complex):
+        if 'bbox' in params:
+            # Bounding box is always a single "w,s,e,n" value
+            params['bbox'] = [','.join(params['bbox'])]
         if complex:
             # ACIS web service supports JSON object as "params" parameter
             nparams = {}
@@ -77,20 +89,28 @@ class StationMetaIO(AcisIO):
     end_date = DateOpt(url_param='edate')
     parameter = ParameterOpt()
 
-    def parse(self):
+    # Station metadata changes infrequently
+    cache_ttl = 24 * 60 * 60
+
+    # Most stations share the same few end dates, so each date string is only
+    # parsed once (see map_value())
+    parsed_dates = None
+
+    def parse_item(self, item):
         """
         Convert ACIS 'll' value into separate latitude and longitude.
+        (overrides wq.io.parsers.text.JsonParser)
         """
-        super(AcisIO, self).parse()
 
         # This is more of a "mapping" step than a "parsing" step, but mappers
         # only allow one-to-one mapping from input fields to output fields.
-        for row in self.data:
-            if 'meta' in row:
-                row = row['meta']
-            if 'll' in row:
-                row['longitude'], row['latitude'] = row['ll']
-                del row['ll']
+        row = item
+        if 'meta' in row:
+            row = row['meta']
+        if 'll' in row:
+            row['longitude'], row['latitude'] = row['ll']
+            del row['ll']
+        return item
 
     def map_value(self, field, value):
         """
@@ -113,11 +133,18 @@ class StationMetaIO(AcisIO):
             # (sorted by the order the elements were were requested);
             # Convert to dictionary with element id as key
             elems, complex = self.getlist('parameter')
+            if self.parsed_dates is None:
+                self.parsed_dates = {}
+            dates = self.parsed_dates
             ranges = {}
             for elem, val in zip(elems, value):
                 if val:
                     start, end = val
-                    ranges[elem] = (parse_date(start), parse_date(end))
+                    if start not in dates:
+                        dates[start] = parse_date(start)
+                    if end not in dates:
+                        dates[end] = parse_date(end)
+                    ranges[elem] = (dates[start], dates[end])
                 else:
                     ranges[elem] = None, None
             return ranges
@@ -128,6 +155,15 @@ class StationDataIO(StationMetaIO):
     """
     Retrieve daily time series data from the climate stations in a region.
     See http://data.rcc-acis.org/doc/#title19
+
+    Set decoded to True to convert the values for each element to floats in
+    bulk (see climata.acis.values), with flags for missing, trace,
+    subsequent and accumulated values:
+
+        data = StationDataIO(..., parameter='pcpn', decoded=True)
+        for station in data:
+            arrays = station.data.to_numpy()
+            print arrays['pcpn'].sum(), arrays['pcpn_trace'].sum()
     """
 
     nested = True
@@ -136,14 +172,27 @@ class StationDataIO(StationMetaIO):
     path = "MultiStnData"
 
     # Specify ACIS-defined URL parameters for start/end date
-    start_date = DateOpt(required=True, url_param='sdate')
+    # (long periods are split into multiple requests)
+    start_date = DateOpt(
+        required=True, url_param='sdate', chunk=timedelta(days=10 * 365)
+    )
     end_date = DateOpt(required=True, url_param='edate')
 
+    # Large regions are also split into multiple requests
+    county = FilterOpt(multi=True, chunk=10)
+    basin = FilterOpt(multi=True, chunk=5)
+
     parameter = ParameterOpt(required=True)
 
     # Additional information for daily results
     add = ChoiceOpt(multi=True, choices=ADD_IDS)
 
+    # Date axis shared by every station's DataIO (see get_dates())
+    dates = None
+
+    # Whether to decode values to floats (see DataIO.decode_data())
+    decoded = False
+
     def get_field_names(self):
         """
         ACIS web service returns "meta" and "data" for each station;
@@ -172,6 +221,77 @@ class StationDataIO(StationMetaIO):
             del params['add']
         return super(StationDataIO, self).serialize_params(params, complex)
 
+    def iter_parse(self):
+        """
+        Incrementally parse stations from the MultiStnData response (see
+        WebserviceLoader.stream()).
+        """
+        for item in iter_json_array(self.file, self.namespace):
+            yield self.parse_item(item)
+
+    def get_chunks(self):
+        """
+        Always include uid in the metadata for split requests, so that the
+        results for each station can be matched up (see merge_chunks()).
+        """
+        chunks = super(StationDataIO, self).get_chunks()
+        meta, meta_is_complex = self.getlist('meta')
+        if chunks and 'uid' not in meta:
+            for options in chunks:
+                options['meta'] = meta + ['uid']
+        return chunks
+
+    def merge_chunks(self, ios):
+        """
+        Combine results from split requests, joining the time series for
+        each station across date ranges.
+        """
+        meta, meta_is_complex = self.getlist('meta')
+        ranges = []
+        stations = OrderedDict()
+        for io in ios:
+            period = io.getvalue('start_date'), io.getvalue('end_date')
+            if period not in ranges:
+                ranges.append(period)
+            for row in io.data:
+                uid = row['meta']['uid']
+                if uid not in stations:
+                    stations[uid] = {'meta': row['meta'], 'data': {}}
+                stations[uid]['data'][period] = row['data']
+
+        # Fill periods where a station had no data with missing values
+        elems, elems_is_complex = self.getlist('parameter')
+        add, add_is_complex = self.getlist('add')
+        if add:
+            missing = [['M'] + [''] * len(add) for elem in elems]
+        else:
+            missing = ['M' for elem in elems]
+
+        ranges.sort()
+        self.data = []
+        for station in stations.values():
+            data = []
+            for start, end in ranges:
+                if (start, end) in station['data']:
+                    data.extend(station['data'][start, end])
+                else:
+                    days = (end - start).days + 1
+                    data.extend([missing] * days)
+            if 'uid' not in meta:
+                del station['meta']['uid']
+            self.data.append({'meta': station['meta'], 'data': data})
+
+    def get_dates(self):
+        """
+        Return the dates for every station's time series, computed once per
+        response.
+        """
+        if self.dates is None:
+            self.dates = DateRange(
+                self.getvalue('start_date'), self.getvalue('end_date')
+            )
+        return self.dates
+
     def usable_item(self, data):
         """
         ACIS web service returns "meta" and "data" for each station; use meta
@@ -193,13 +313,94 @@ class StationDataIO(StationMetaIO):
             add=add,
             start_date=self.getvalue('start_date'),
             end_date=self.getvalue('end_date'),
+            dates=self.get_dates(),
+            decoded=self.decoded,
         )
 
         # TupleMapper will convert item to namedtuple
         return super(StationDataIO, self).usable_item(item)
 
 
-class DataIO(TimeSeriesMapper, BaseIO):
+class GridDataIO(AcisIO):
+    """
+    Retrieve gridded daily data (e.g. PRISM) for a region, as numpy arrays
+    with one (time x lat x lon) grid per element.
+    See http://data.rcc-acis.org/doc/
+
+    Usage:
+
+        data = GridDataIO(
+            bbox='-94,44,-92,46', parameter='pcpn',
+            start_date='2014-01-01', end_date='2014-12-31',
+        )
+        arrays = data.to_numpy()
+        print arrays['lat'], arrays['lon'], arrays['pcpn'].shape
+
+    Large bounding boxes and date ranges are split into several requests and
+    merged.  Set memmap to True (or to a directory) to store the grids in
+    temporary memory-mapped files, so large grids can be sliced without
+    loading everything into memory.
+    """
+
+    path = "GridData"
+
+    # Long periods and large bounding boxes are split into multiple requests
+    start_date = DateOpt(
+        required=True, url_param='sdate', chunk=timedelta(days=366)
+    )
+    end_date = DateOpt(required=True, url_param='edate')
+    bbox = BboxOpt(chunk=2)
+
+    # ACIS grid id (e.g. 1 = NRCC Hi-Res, 21 = PRISM)
+    grid = FilterOpt(default='21')
+    parameter = ParameterOpt(required=True)
+    meta = ChoiceOpt(multi=True, choices=['ll', 'elev'], default=['ll'])
+
+    # Grids are decoded straight from the response bytes (see parse())
+    binary = True
+
+    # Directory (or True for the default location) for memory-mapped grids
+    memmap = None
+
+    def get_elems(self):
+        elems, elems_is_complex = self.getlist('parameter')
+        if elems_is_complex:
+            elems = [elem['name'] for elem in elems]
+        return elems
+
+    def get_dates(self):
+        return DateRange(
+            self.getvalue('start_date'), self.getvalue('end_date')
+        )
+
+    def parse(self):
+        self.data = read_grids(
+            self.file, self.get_elems(), self.get_dates(), self.memmap
+        )
+
+    def merge_chunks(self, ios):
+        """
+        Combine the grids for each tile and date range.
+        """
+        self.data = merge_grids(
+            [io.data for io in ios], self.get_dates(), self.memmap
+        )
+
+    def to_numpy(self):
+        """
+        Return an OrderedDict with the dates (as datetime64), the lat and lon
+        axes, and a (time x lat x lon) array for each element.
+        """
+        arrays = OrderedDict([
+            ('date', self.data.dates.to_numpy()),
+            ('lat', self.data.lat),
+            ('lon', self.data.lon),
+        ])
+        arrays.update(self.data.grids)
+        return arrays
+
+
+class DataIO(ArrayMixin, TimeSeriesMapper, BaseIO):
     """
     IO for iterating over ACIS time series data.
     Created internally by StationDataIO; not meant to be used directly.
@@ -210,6 +411,8 @@ class DataIO(TimeSeriesMapper, BaseIO):
     add = []
     start_date = None
     end_date = None
+    dates = None  # See StationDataIO.get_dates()
+    decoded = False
 
     date_formats = []  # For TimeSeriesMapper
 
@@ -218,42 +421,93 @@ class DataIO(TimeSeriesMapper, BaseIO):
         MultiStnData data results are arrays without explicit dates;
         Infer time series based on start date.
         """
+        if self.dates is None:
+            self.dates = DateRange(self.start_date, self.end_date)
+        if self.decoded:
+            return self.decode_data(data)
+        if self.add:
+            # One row per date and element
+            elems = self.parameter
+        else:
+            # One row per date, with each element as a field
+            elems = self.get_field_names()[1:]
+        return StationData(self.dates, data, elems, self.add)
 
-        dates = fill_date_range(self.start_date, self.end_date)
-        for row, date in zip(data, dates):
-            data = {'date': date}
-            if self.add:
-                # If self.add is set, results will contain additional
-                # attributes (e.g. flags). In that case, create one row per
-                # result, with attributes "date", "elem", "value", and one for
-                # each item in self.add.
-                for elem, vals in zip(self.parameter, row):
-                    data['elem'] = elem
-                    for add, val in zip(['value'] + self.add, vals):
-                        data[add] = val
-                    yield data
-            else:
-                # Otherwise, return one row per date, with "date" and each
-                # element's value as attributes.
-                for elem, val in zip(self.parameter, row):
-                    # namedtuple doesn't like numeric field names
-                    if elem.isdigit():
-                        elem = "e%s" % elem
-                    data[elem] = val
-                yield data
+    def decode_data(self, data):
+        """
+        Convert the values for each element to floats in bulk (see
+        decode_values()), returning a ColumnData.  If self.add is set, the
+        additional attributes are kept as strings.
+        """
+        dates = self.dates[:len(data)]
+        if not self.add:
+            columns = [('date', dates)]
+            for i, elem in enumerate(self.get_field_names()[1:]):
+                columns.append((
+                    elem, decode_values([row[i] for row in data])
+                ))
+            return ColumnData(columns)
+
+        # One row per date and element (see load_data())
+        count = len(self.parameter)
+        results = [vals for row in data for vals in row[:count]]
+        columns = [
+            ('date', [date for date in dates for i in range(count)]),
+            ('elem', list(self.parameter) * len(dates)),
+            ('value', decode_values([vals[0] for vals in results])),
+        ]
+        for i, add in enumerate(self.add, 1):
+            columns.append((add, [vals[i] for vals in results]))
+        return ColumnData(columns)
 
     def __init__(self, *args, **kwargs):
         data = kwargs.pop('data')
         super(DataIO, self).__init__(*args, **kwargs)
-        self.data = list(self.load_data(data))
+        self.raw_data = data
+        self.data = self.load_data(data)
+
+    def get_columns(self):
+        """
+        Build columns directly from the MultiStnData arrays (see ArrayMixin)
+        """
+        if self.add or self.decoded:
+            return super(DataIO, self).get_columns()
+        columns = OrderedDict([('date', self.data.dates)])
+        for i, elem in enumerate(self.get_field_names()[1:]):
+            columns[elem] = [row[i] for row in self.raw_data]
+        return columns
+
+    def to_numpy(self):
+        """
+        Return an OrderedDict of numpy arrays (see ArrayMixin).  Decoded
+        values also include a boolean array for each flag (e.g. pcpn_trace).
+        """
+        arrays = OrderedDict()
+        for name, column in self.get_columns().items():
+            if isinstance(column, DecodedValues):
+                arrays[name], masks = column.to_numpy()
+                for flag, mask in masks.items():
+                    arrays['%s_%s' % (name, flag)] = mask
+            else:
+                arrays[name] = self.numpy_column(name, column)
+        return arrays
+
+    @property
+    def text_fields(self):
+        if self.add:
+            return ['elem'] + list(self.add)
+        return []
 
     def get_field_names(self):
         """
         Different field names depending on self.add setting (see load_data)
         For BaseIO
         """
+        if self.field_names is not None:
+            # Computed once, since this is called for every mapped row
+            return self.field_names
         if self.add:
-            return ['date', 'elem', 'value'] + [flag for flag in self.add]
+            field_names = ['date', 'elem', 'value'] + list(self.add)
         else:
             field_names = ['date']
             for elem in self.parameter:
@@ -261,7 +515,8 @@ class DataIO(TimeSeriesMapper, BaseIO):
                 if elem.isdigit():
                     elem = "e%s" % elem
                 field_names.append(elem)
-            return field_names
+        self.field_names = field_names
+        return field_names
 
     @property
     def key_fields(self):
@@ -273,3 +528,39 @@ class DataIO(TimeSeriesMapper, BaseIO):
             return ['date', 'elem']
         else:
             return ['date']
+
+
+class StationData(Sequence):
+    """
+    Rows for one station's MultiStnData results, built when accessed from the
+    date axis and the raw value arrays.  If add is set, there is one row per
+    date and element (with "date", "elem", "value" and each item in add);
+    otherwise there is one row per date with each element's value.
+    """
+
+    def __init__(self, dates, data, elems, add=None):
+        self.dates = dates[:len(data)]
+        self.raw_data = data
+        self.elems = elems
+        self.add = add
+
+    def __len__(self):
+        if self.add:
+            return len(self.dates) * len(self.elems)
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        if self.add:
+            row, col = divmod(index, len(self.elems))
+            item = {'date': self.dates[row], 'elem': self.elems[col]}
+            item.update(zip(['value'] + self.add, self.raw_data[row][col]))
+        else:
+            item = {'date': self.dates[index]}
+            item.update(zip(self.elems, self.raw_data[index]))
+        return item
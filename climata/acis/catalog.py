@@ -0,0 +1,390 @@
+"""
+Persistent local catalog of ACIS station metadata.
+
+StationCatalog stores the results of StationMetaIO in a SQLite database, so
+repeated lookups (e.g. from the scripts in climata/bin) do not need to call
+the web service or re-parse the station ids and date ranges each time.
+Stations are indexed by uid, authority id, basin (HUC8), state and location,
+and each region is only reloaded once its entries are older than max_age.
+Stations without data for any element are included (with has_data False).
+"""
+
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime
+from threading import RLock
+from . import StationMetaIO
+from .constants import (
+    ELEMENT_BY_NAME, DEFAULT_META_FIELDS, ALL_META_FIELDS
+)
+
+# Elements stored for each station (including pan evaporation, which has no
+# name)
+ELEMS = list(ELEMENT_BY_NAME.keys()) + ['7']
+
+# Default location for the catalog used by the scripts in climata/bin
+DEFAULT_PATH = '~/.cache/climata/acis-stations.sqlite3'
+
+# Region types that can be loaded with update()
+REGIONS = ('state', 'county', 'basin', 'bbox')
+
+Station = namedtuple('Station', (
+    'uid', 'name', 'state', 'county', 'climdiv', 'elev',
+    'latitude', 'longitude', 'sids', 'valid_daterange', 'has_data',
+))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS station (
+    uid INTEGER PRIMARY KEY,
+    name TEXT,
+    state TEXT,
+    county TEXT,
+    climdiv TEXT,
+    elev REAL,
+    latitude REAL,
+    longitude REAL,
+    sids TEXT,
+    ranges TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS station_state ON station (state);
+CREATE INDEX IF NOT EXISTS station_county ON station (county);
+
+CREATE TABLE IF NOT EXISTS sid (
+    uid INTEGER,
+    auth TEXT,
+    id TEXT
+);
+CREATE INDEX IF NOT EXISTS sid_id ON sid (auth, id);
+CREATE INDEX IF NOT EXISTS sid_uid ON sid (uid);
+
+CREATE TABLE IF NOT EXISTS period (
+    uid INTEGER,
+    elem TEXT,
+    start TEXT,
+    end TEXT,
+    years INTEGER
+);
+CREATE INDEX IF NOT EXISTS period_elem ON period (elem, years);
+CREATE INDEX IF NOT EXISTS period_uid ON period (uid);
+
+CREATE TABLE IF NOT EXISTS basin (
+    huc TEXT,
+    uid INTEGER
+);
+CREATE INDEX IF NOT EXISTS basin_huc ON basin (huc);
+
+CREATE TABLE IF NOT EXISTS region (
+    kind TEXT,
+    code TEXT,
+    updated REAL,
+    PRIMARY KEY (kind, code)
+);
+"""
+
+# Spatial index (falls back to an ordinary indexed table if SQLite was built
+# without the R*Tree module)
+RTREE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS location USING rtree(
+    uid, min_lon, max_lon, min_lat, max_lat
+)
+"""
+LOCATION = """
+CREATE TABLE IF NOT EXISTS location (
+    uid INTEGER PRIMARY KEY,
+    min_lon REAL, max_lon REAL, min_lat REAL, max_lat REAL
+);
+CREATE INDEX IF NOT EXISTS location_ll ON location (min_lon, min_lat);
+"""
+
+# Stations in each type of region (locations are points, so the bbox query
+# includes stations on the boundary)
+MEMBERS = {
+    'state': "SELECT uid FROM station WHERE state = ?",
+    'county': "SELECT uid FROM station WHERE county = ?",
+    'basin': "SELECT uid FROM basin WHERE huc = ?",
+    'bbox': (
+        "SELECT uid FROM location WHERE min_lon >= ? AND min_lat >= ?"
+        " AND max_lon <= ? AND max_lat <= ?"
+    ),
+}
+
+
+class StationCatalog(object):
+    """
+    SQLite-backed index of ACIS station metadata.  update() loads any regions
+    (states, counties, basins or bounding boxes) that are missing or older
+    than max_age, and search() answers queries from the local database.
+
+    Usage:
+
+        from climata.acis.catalog import StationCatalog
+        catalog = StationCatalog('~/.cache/climata/acis.sqlite3')
+        catalog.update(basin='07010206')
+        for site in catalog.search(basin='07010206', elem='pcpn',
+                                   min_years=30):
+            print site.name, site.sids.get('COOP'), site.valid_daterange
+    """
+
+    # Station metadata changes infrequently
+    max_age = 7 * 24 * 60 * 60
+
+    def __init__(self, path, max_age=None):
+        self.path = os.path.expanduser(path)
+        if max_age is not None:
+            self.max_age = max_age
+        folder = os.path.dirname(self.path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        self.lock = RLock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        with self.db:
+            self.db.executescript(SCHEMA)
+            try:
+                self.db.execute(RTREE)
+            except sqlite3.OperationalError:
+                self.db.executescript(LOCATION)
+
+    def close(self):
+        self.db.close()
+
+    def update(self, force=False, **regions):
+        """
+        Load metadata for each of the given regions (e.g. basin='07010206' or
+        state=['MN', 'WI']) that has not been loaded within max_age.  Returns
+        the number of regions loaded.
+        """
+        loaded = 0
+        for kind, codes in regions.items():
+            if kind not in REGIONS:
+                raise TypeError("%s is not a valid region type" % kind)
+            if kind == 'bbox' or not isinstance(codes, (list, tuple)):
+                codes = [codes]
+            for code in codes:
+                code = region_code(kind, code)
+                if force or self.is_stale(kind, code):
+                    self.load(kind, code)
+                    loaded += 1
+        return loaded
+
+    def is_stale(self, kind, code):
+        row = self.db.execute(
+            "SELECT updated FROM region WHERE kind = ? AND code = ?",
+            (kind, code)
+        ).fetchone()
+        return row is None or time.time() - row[0] >= self.max_age
+
+    def load(self, kind, code):
+        """
+        (Re-)load all stations in a region from StationMetaIO
+        """
+        # StationMetaIO only returns stations with data for the requested
+        # elements, so make a second request for the remaining stations
+        sites = {}
+        for site in StationMetaIO(
+                parameter=ELEMS, meta=ALL_META_FIELDS, **{kind: code}):
+            sites[site.uid] = site
+        for site in StationMetaIO(meta=DEFAULT_META_FIELDS, **{kind: code}):
+            sites.setdefault(site.uid, site)
+        self.store(sites.values(), kind, code)
+
+    def store(self, sites, kind, code):
+        """
+        Save station metadata for a region, replacing any stations that were
+        previously in the region.
+        """
+        updated = time.time()
+        with self.lock, self.db:
+            old = self.members(kind, code) if kind != 'basin' else set()
+            uids = set()
+            for site in sites:
+                self.store_site(site, updated)
+                uids.add(site.uid)
+            if kind == 'basin':
+                self.db.execute("DELETE FROM basin WHERE huc = ?", (code,))
+                self.db.executemany(
+                    "INSERT INTO basin (huc, uid) VALUES (?, ?)",
+                    [(code, uid) for uid in uids]
+                )
+            else:
+                # Stations no longer returned for the region
+                self.delete(old - uids)
+            self.db.execute(
+                "INSERT OR REPLACE INTO region (kind, code, updated)"
+                " VALUES (?, ?, ?)",
+                (kind, code, updated)
+            )
+
+    def store_site(self, site, updated):
+        ranges = {}
+        periods = []
+        sids = getattr(site, 'sids', None) or {}
+        valid_daterange = getattr(site, 'valid_daterange', None) or {}
+        for elem, (start, end) in valid_daterange.items():
+            if start is None or end is None:
+                continue
+            start, end = start.date().isoformat(), end.date().isoformat()
+            ranges[elem] = [start, end]
+            years = int(end[:4]) - int(start[:4]) + 1
+            periods.append((site.uid, elem, start, end, years))
+
+        self.delete([site.uid], basins=False)
+        self.db.execute(
+            "INSERT INTO station VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                site.uid,
+                site.name,
+                getattr(site, 'state', None),
+                getattr(site, 'county', None),
+                getattr(site, 'climdiv', None),
+                getattr(site, 'elev', None),
+                getattr(site, 'latitude', None),
+                getattr(site, 'longitude', None),
+                json.dumps(sids),
+                json.dumps(ranges),
+                updated,
+            )
+        )
+        self.db.executemany(
+            "INSERT INTO sid (uid, auth, id) VALUES (?, ?, ?)",
+            [(site.uid, auth, id) for auth, id in sids.items()]
+        )
+        self.db.executemany(
+            "INSERT INTO period (uid, elem, start, end, years)"
+            " VALUES (?, ?, ?, ?, ?)",
+            periods
+        )
+        lat = getattr(site, 'latitude', None)
+        lon = getattr(site, 'longitude', None)
+        if lat is not None and lon is not None:
+            self.db.execute(
+                "INSERT INTO location VALUES (?, ?, ?, ?, ?)",
+                (site.uid, lon, lon, lat, lat)
+            )
+
+    def delete(self, uids, basins=True):
+        tables = ['station', 'sid', 'period', 'location']
+        if basins:
+            tables.append('basin')
+        for table in tables:
+            self.db.executemany(
+                "DELETE FROM %s WHERE uid = ?" % table,
+                [(uid,) for uid in uids]
+            )
+
+    def members(self, kind, code):
+        params = region_params(kind, code)
+        return set(uid for uid, in self.db.execute(MEMBERS[kind], params))
+
+    def get(self, uid):
+        """
+        Return the Station with the given ACIS uid, or None.
+        """
+        result = self.query(["station.uid = ?"], [uid])
+        return result[0] if result else None
+
+    def find(self, auth, id):
+        """
+        Return the Station with the given authority id (e.g. 'COOP',
+        '215435'), or None.
+        """
+        result = self.query([
+            "station.uid IN (SELECT uid FROM sid WHERE auth = ? AND id = ?)"
+        ], [auth, id])
+        return result[0] if result else None
+
+    def search(self, state=None, county=None, basin=None, bbox=None,
+               elem=None, min_years=None, start_date=None, end_date=None):
+        """
+        Return the stations matching all of the given filters, ordered by
+        uid.  Each region filter can also be a list of regions.  Stations
+        without data are included unless elem is set.  If elem is
+        set, only stations with a period of record for the element are
+        included; min_years, start_date and end_date further restrict that
+        period (to at least min_years calendar years, overlapping start_date
+        to end_date).
+        """
+        where, params = [], []
+        for kind, codes in (('state', state), ('county', county),
+                            ('basin', basin), ('bbox', bbox)):
+            if codes is None:
+                continue
+            if kind == 'bbox' or not isinstance(codes, (list, tuple)):
+                codes = [codes]
+            where.append("station.uid IN (%s)" % " UNION ".join(
+                [MEMBERS[kind]] * len(codes)
+            ))
+            for code in codes:
+                params += region_params(kind, region_code(kind, code))
+
+        if elem is not None:
+            period = ["elem = ?"]
+            params.append(elem)
+            if min_years is not None:
+                period.append("years >= ?")
+                params.append(min_years)
+            if start_date is not None:
+                period.append("end >= ?")
+                params.append(date_text(start_date))
+            if end_date is not None:
+                period.append("start <= ?")
+                params.append(date_text(end_date))
+            where.append(
+                "station.uid IN (SELECT uid FROM period WHERE %s)"
+                % " AND ".join(period)
+            )
+        return self.query(where, params)
+
+    def query(self, where, params):
+        sql = (
+            "SELECT uid, name, state, county, climdiv, elev,"
+            " latitude, longitude, sids, ranges FROM station"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY uid"
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return [make_station(row) for row in rows]
+
+
+def region_code(kind, code):
+    """
+    Normalize region codes (bounding boxes are stored as "w,s,e,n")
+    """
+    if kind == 'bbox':
+        if isinstance(code, str):
+            code = code.split(',')
+        if len(code) != 4:
+            raise ValueError("bbox should be west,south,east,north")
+        return ','.join(str(float(val)) for val in code)
+    return str(code)
+
+
+def region_params(kind, code):
+    if kind == 'bbox':
+        return [float(val) for val in code.split(',')]
+    return [code]
+
+
+def date_text(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, str):
+        value = value.isoformat()
+    return value
+
+
+def parse_iso(value):
+    return datetime(int(value[:4]), int(value[5:7]), int(value[8:10]))
+
+
+def make_station(row):
+    ranges = json.loads(row[9])
+    valid_daterange = {elem: (None, None) for elem in ELEMS}
+    for elem, (start, end) in ranges.items():
+        valid_daterange[elem] = parse_iso(start), parse_iso(end)
+    return Station(*row[:8], sids=json.loads(row[8]),
+                   valid_daterange=valid_daterange, has_data=bool(ranges))
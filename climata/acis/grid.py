@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import datetime
+from tempfile import TemporaryFile
+from wq.io.exceptions import NoData
+from climata.base import FilterOpt
+from climata.parsers import JsonChunkReader, WHITESPACE
+
+# Value used by ACIS for missing grid cells
+MISSING = -999
+
+# Coordinates are matched at this precision when merging tiles
+PRECISION = 6
+
+
+class BboxOpt(FilterOpt):
+    """
+    Bounding box option (west, south, east, north), given as a list or a
+    comma-separated string.  If chunk is set, larger boxes are split into
+    tiles no more than chunk degrees wide or tall (see
+    WebserviceLoader.get_chunks()).
+    """
+    multi = True
+
+    def parse(self, value):
+        if isinstance(value, str):
+            value = value.split(',')
+        value = super(BboxOpt, self).parse(value)
+        if value is None:
+            return None
+        if len(value) != 4:
+            raise ValueError("%s should be west,south,east,north" % self.name)
+        return [float(val) for val in value]
+
+    def split(self, value):
+        if not self.chunk or not value:
+            return [value]
+        west, south, east, north = value
+        return [
+            [x, y, min(x + self.chunk, east), min(y + self.chunk, north)]
+            for y in steps(south, north, self.chunk)
+            for x in steps(west, east, self.chunk)
+        ]
+
+
+def steps(start, end, size):
+    values = [start]
+    while values[-1] + size < end:
+        values.append(round(values[-1] + size, PRECISION))
+    return values
+
+
+class GridData(Sequence):
+    """
+    Gridded values for one or more elements, stored as (time x lat x lon)
+    numpy arrays (optionally memory-mapped).  Items are dicts with the date
+    and the 2-D grid for each element.
+    """
+
+    def __init__(self, dates, lat, lon, grids):
+        self.dates = dates
+        self.lat = lat
+        self.lon = lon
+        self.grids = grids
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = {'date': self.dates[index]}
+        for elem, grid in self.grids.items():
+            item[elem] = grid[index]
+        return item
+
+
+def new_grid(shape, memmap=None):
+    """
+    Create a float array filled with NaN, in a temporary memory-mapped file
+    if memmap is set (to True, or to the directory for the file).
+    """
+    import numpy as np
+    if memmap:
+        folder = memmap if isinstance(memmap, str) else None
+        grid = np.memmap(TemporaryFile(dir=folder), 'f4', 'w+', shape=shape)
+        grid[:] = np.nan
+        return grid
+    return np.full(shape, np.nan, dtype='f4')
+
+
+def read_grids(file, elems, dates, memmap=None):
+    """
+    Incrementally decode a GridData response, copying each day's grids into
+    a (time x lat x lon) array for each element as it is read.  Returns a
+    GridData instance.
+    """
+    import numpy as np
+    reader = JsonChunkReader(file)
+    reader.skip(WHITESPACE)
+    if reader.peek() != '{':
+        raise NoData
+    reader.pos += 1
+
+    meta = {}
+    grids = None
+    start = dates[0] if len(dates) else None
+    while True:
+        reader.skip(WHITESPACE + ',')
+        if reader.peek() == '}':
+            break
+        key = reader.value()
+        reader.skip(WHITESPACE + ':')
+        if key != 'data':
+            value = reader.value()
+            if key == 'meta':
+                meta = value
+            elif key == 'error':
+                raise NoData(value)
+            continue
+        if reader.peek() != '[':
+            raise NoData
+        reader.pos += 1
+        while reader.next_item():
+            row = reader.value()
+            index = (parse_grid_date(row[0]) - start).days
+            for elem, values in zip(elems, row[1:]):
+                values = np.asarray(values, dtype='f4')
+                if grids is None:
+                    grids = OrderedDict(
+                        (name, new_grid((len(dates),) + values.shape, memmap))
+                        for name in elems
+                    )
+                values[values == MISSING] = np.nan
+                grids[elem][index] = values
+
+    if grids is None:
+        raise NoData
+    lat = np.asarray(meta.get('lat', []), dtype='f8')
+    lon = np.asarray(meta.get('lon', []), dtype='f8')
+    if lat.ndim == 2:
+        lat, lon = lat[:, 0], lon[0, :]
+    return GridData(dates, lat, lon, grids)
+
+
+def parse_grid_date(value):
+    value = value.replace('-', '')
+    return datetime(int(value[:4]), int(value[4:6]), int(value[6:8])).date()
+
+
+def merge_grids(parts, dates, memmap=None):
+    """
+    Combine GridData for adjacent tiles and date ranges into a single
+    GridData covering all of them.  Cells on shared tile edges are matched
+    by their coordinates.
+    """
+    import numpy as np
+    lat = merge_axis([part.lat for part in parts])
+    lon = merge_axis([part.lon for part in parts])
+    if len(parts[0].lat) > 1 and parts[0].lat[0] > parts[0].lat[-1]:
+        # Keep the row order used by ACIS
+        lat = lat[::-1]
+    elems = list(parts[0].grids.keys())
+    grids = OrderedDict(
+        (elem, new_grid((len(dates), len(lat), len(lon)), memmap))
+        for elem in elems
+    )
+    start = dates[0]
+    for part in parts:
+        first = (part.dates[0] - start).days
+        times = slice(first, first + len(part.dates))
+        rows = positions(lat, part.lat)
+        cols = positions(lon, part.lon)
+        if not isinstance(rows, slice) and not isinstance(cols, slice):
+            rows = rows[:, np.newaxis]
+        for elem in elems:
+            grids[elem][times, rows, cols] = part.grids[elem]
+    return GridData(dates, lat, lon, grids)
+
+
+def merge_axis(values):
+    import numpy as np
+    return np.unique(np.round(np.concatenate(values), PRECISION))
+
+
+def positions(coords, values):
+    """
+    Return the indexes of values in coords, as a slice if they are contiguous
+    """
+    import numpy as np
+    values = np.round(values, PRECISION)
+    if coords[0] > coords[-1]:
+        index = len(coords) - 1 - np.searchsorted(coords[::-1], values)
+    else:
+        index = np.searchsorted(coords, values)
+    if len(index) and (np.diff(index) == 1).all():
+        return slice(index[0], index[-1] + 1)
+    if len(index) and (np.diff(index) == -1).all():
+        stop = index[-1] - 1 if index[-1] > 0 else None
+        return slice(index[0], stop, -1)
+    return index
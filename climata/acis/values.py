@@ -0,0 +1,102 @@
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+
+NAN = float('nan')
+
+# Flag codes for decoded values (see decode_values())
+MISSING = 1
+TRACE = 2
+SUBSEQUENT = 4
+ACCUMULATED = 8
+
+FLAGS = OrderedDict([
+    ('missing', MISSING),
+    ('trace', TRACE),
+    ('subsequent', SUBSEQUENT),
+    ('accumulated', ACCUMULATED),
+])
+
+
+class DecodedValues(Sequence):
+    """
+    A column of ACIS values decoded to floats (see decode_values()), with a
+    flag code for each value.  Items are the float values.
+    """
+
+    def __init__(self, values, codes):
+        self.values = values
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.values[index], self.codes[index])
+        return self.values[index]
+
+    def mask(self, flag):
+        """
+        Return a list of booleans indicating which values have the given flag
+        (missing, trace, subsequent or accumulated).
+        """
+        bit = FLAGS[flag]
+        return [bool(code & bit) for code in self.codes]
+
+    def to_numpy(self):
+        """
+        Return a masked float array (with missing and subsequent values
+        masked) and an OrderedDict with a boolean array for each flag.
+        """
+        import numpy as np
+        values = np.frombuffer(self.values, dtype='f8')
+        codes = np.frombuffer(self.codes, dtype='u1')
+        masks = OrderedDict(
+            (flag, (codes & bit) != 0) for flag, bit in FLAGS.items()
+        )
+        return np.ma.masked_invalid(values, copy=False), masks
+
+
+def decode_values(values):
+    """
+    Decode a sequence of ACIS value strings (e.g. "0.12", "M", "T", "S" or
+    "0.12A") to a DecodedValues column.  Missing ("M") and subsequent ("S")
+    values become NaN, trace values ("T") become 0, and accumulated values
+    ("A" suffix) keep their total.
+    """
+    decoded = {}  # Most values are repeated, so only decode each one once
+    floats = array('d')
+    codes = array('B')
+    for value in values:
+        item = decoded.get(value)
+        if item is None:
+            item = decoded[value] = decode_value(value)
+        floats.append(item[0])
+        codes.append(item[1])
+    return DecodedValues(floats, codes)
+
+
+def decode_value(value):
+    """
+    Return the float value and flag code for a single ACIS value string.
+    """
+    if not isinstance(value, str):
+        if value is None:
+            return NAN, MISSING
+        return float(value), 0
+    code = 0
+    value = value.strip()
+    if value.endswith('A'):
+        code |= ACCUMULATED
+        value = value[:-1]
+    if value == 'M' or not value:
+        return NAN, code | MISSING
+    if value == 'S':
+        return NAN, code | SUBSEQUENT
+    if value == 'T':
+        return 0.0, code | TRACE
+    try:
+        return float(value), code
+    except ValueError:
+        return NAN, code | MISSING
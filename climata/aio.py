@@ -0,0 +1,95 @@
+"""
+asyncio support for climata IO classes (Python 3.5+).
+
+Each IO is validated on the event loop, then loaded and parsed in a worker
+thread so the event loop is never blocked.  Nested IOs that fan out into
+multiple requests (e.g. MultiStationDailyIO, RegionDailyDataIO) create their
+inner IOs concurrently via asyncio.gather(), with at most `concurrency`
+inner requests in flight at once.
+
+Usage:
+
+    from climata.usgs import DailyValueIO
+    from climata.hydromet import MultiStationDailyIO
+
+    async def main():
+        dvals = await DailyValueIO.aload(basin='02070010')
+        multi = await MultiStationDailyIO.aload(
+            station=['ACAO', 'HPD'],
+            parameter='QD',
+            start_date='2014-07-01',
+            end_date='2014-07-31',
+            concurrency=4,
+        )
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from . import base
+
+DEFAULT_CONCURRENCY = 8
+MAX_WORKERS = 32
+
+_executor = None
+_lock = Lock()
+
+
+def get_executor():
+    """
+    Thread pool used for nested IOs.  (Top-level IOs use the event loop's
+    default executor, so that a parent waiting on its nested IOs can never
+    starve them of threads.)
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+async def aload(io_class, concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """
+    Create and load an instance of io_class without blocking the event loop.
+    """
+    loop = asyncio.get_event_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    io = io_class.__new__(io_class)
+    io.set_options(**kwargs)
+
+    def fanout(nested_class, options, skip_nodata):
+        # Called from the worker thread running io.refresh()
+        future = asyncio.run_coroutine_threadsafe(
+            gather_nested(
+                loop, semaphore, nested_class, options, skip_nodata
+            ),
+            loop,
+        )
+        return future.result()
+
+    await loop.run_in_executor(None, refresh, io, fanout)
+    return io
+
+
+async def gather_nested(loop, semaphore, io_class, options, skip_nodata):
+    """
+    Create nested IOs concurrently, preserving the order of options.
+    """
+    async def create(opts):
+        async with semaphore:
+            return await loop.run_in_executor(
+                get_executor(),
+                partial(base.create_nested, io_class, opts, skip_nodata),
+            )
+    return await asyncio.gather(*[create(opts) for opts in options])
+
+
+def refresh(io, fanout):
+    base._nested.fanout = fanout
+    try:
+        io.refresh()
+    finally:
+        base._nested.fanout = None
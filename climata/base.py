@@ -1,11 +1,34 @@
+from __future__ import print_function
+import time
+from io import BytesIO, TextIOWrapper
 from warnings import warn
+from abc import ABCMeta
+from collections import OrderedDict
 from .version import VERSION
-from datetime import datetime, timedelta
+from .cache import get_cache, make_key, CacheEntry
+from .flight import get_flights
+from .session import get_session
+from .dates import compile_format, date_range
+from . import throttle, events
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import product
+from tempfile import TemporaryFile
+from threading import local
+from zipfile import ZipFile
 from wq.io import make_date_mapper, NetLoader, Zipper
+from wq.io.exceptions import LoadFailed, NoData
+from requests.compat import urlencode, urlparse
+from requests.exceptions import ConnectionError, Timeout
 
 
 parse_date = make_date_mapper('%Y-%m-%d')
 
+# Thread-local hook for overriding how nested IOs are created (see
+# WebserviceLoader.load_nested() and climata.aio)
+_nested = local()
+
 
 class FilterOpt(object):
     """
@@ -20,6 +43,11 @@ class FilterOpt(object):
 
     default = None  # Default value
 
+    # Maximum number of values per request (for multi options).  Requests
+    # with more values are split into several requests (see
+    # WebserviceLoader.get_chunks()) and the results merged.
+    chunk = None
+
     def __init__(self, **kwargs):
         """
         Allow setting the above via kwargs
@@ -48,10 +76,25 @@ class FilterOpt(object):
                 return [value]
         return value
 
+    def split(self, value):
+        """
+        Split value into chunks according to self.chunk
+        """
+        if not self.chunk or not self.multi or not value:
+            return [value]
+        return [
+            value[i:i + self.chunk]
+            for i in range(0, len(value), self.chunk)
+        ]
+
 
 class DateOpt(FilterOpt):
     date_only = True
 
+    # Maximum date range per request, as a timedelta (only applies to the
+    # start_date option; see WebserviceLoader.get_chunks())
+    chunk = None
+
     def parse_date(self, value):
         return parse_date(value)
 
@@ -88,9 +131,324 @@ class ChoiceOpt(FilterOpt):
         return value
 
 
-class WebserviceLoader(NetLoader):
+class TransientError(Exception):
+    """
+    Raised (internally) for responses that should be retried
+    """
+
+    def __init__(self, response):
+        super(TransientError, self).__init__(response.status_code)
+        self.response = response
+
+
+class HttpLoader(events.MapEventsMixin, NetLoader):
+    """
+    NetLoader subclass that shares a pooled HTTP session (see climata.session)
+    and an optional response cache (see climata.cache) across all requests.
+    """
+
+    # requests.Session (or compatible) to use instead of the shared session
+    session = None
+
+    # Response cache policy (only used if a cache has been configured via
+    # climata.cache.set_cache()).  TTLs are in seconds, with None meaning
+    # "never expires".
+    cacheable = True
+    cache_ttl = 60 * 60
+
+    # Politeness settings: maximum requests per second to each host (shared
+    # by all IO classes using the same host), with bursts of up to rate_burst
+    # requests.  None means no limit.
+    rate_limit = None
+    rate_burst = 1
+
+    # Transient errors (connection errors and the statuses below) are retried
+    # up to max_retries times, with jittered exponential backoff starting at
+    # retry_backoff seconds.
+    max_retries = 3
+    retry_backoff = 1.0
+    retry_max_backoff = 60.0
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    @property
+    def client(self):
+        """
+        HTTP client for wq.io.loaders.NetLoader
+        """
+        return self.session or get_session()
+
+    _request_key = None
+
+    @property
+    def request_key(self):
+        """
+        Stable fingerprint for the request (computed once per instance).
+        Also used as the response cache key.
+        """
+        if self._request_key is None:
+            self._request_key = self.get_request_key()
+        return self._request_key
+
+    def get_request_key(self):
+        return make_key(self.url, self.params)
+
+    def refresh(self):
+        """
+        Load and parse data (same as wq.io.BaseIO.refresh(), but emits timing
+        events for each phase; see climata.events).
+        """
+        with events.timed(self, 'load'):
+            self.load()
+        if getattr(self, 'empty_file', False):
+            self.data = []
+            self.save_cache()
+            return
+        with events.timed(self, 'parse') as info:
+            self.parse()
+            info['rows'] = len(self.data)
+        self.save_cache()
+        if hasattr(self, 'file') and not self.file.closed:
+            self.file.close()
+
+    def load(self):
+        """
+        Load web service response (overrides wq.io.loaders.NetLoader)
+        """
+        self.file = self._io_class(self.fetch())
+
+    def fetch(self):
+        """
+        Retrieve the response body for the current request, using the
+        response cache if one is configured.  New responses are only cached
+        once they have been parsed (see save_cache()), so that error pages
+        returned with a 200 status are not.
+        """
+        url = self.url
+        params = self.params
+        cache = get_cache() if self.cacheable else None
+        if cache is None:
+            return self.read_response(self.send(url, params))
+
+        key = self.request_key
+        entry = cache.get(key)
+        if entry is not None and entry.fresh:
+            return self.read_entry(entry)
+
+        # Stale or missing; revalidate with server if possible
+        headers = entry.revalidation_headers if entry is not None else {}
+        resp = self.send(url, params, headers)
+        if resp.status_code == 304 and entry is not None:
+            entry.ttl = self.get_cache_ttl()
+            cache.refresh(key, entry)
+            return self.read_entry(entry)
+
+        entry = CacheEntry(
+            resp.content,
+            ttl=self.get_cache_ttl(),
+            etag=resp.headers.get('ETag'),
+            last_modified=resp.headers.get('Last-Modified'),
+            encoding=resp.encoding or resp.apparent_encoding,
+        )
+        self._cache_entry = (cache, key, entry)
+        return self.read_response(resp)
+
+    def save_cache(self):
+        """
+        Cache the response loaded by fetch() (called after it is parsed).
+        """
+        pending = self.__dict__.pop('_cache_entry', None)
+        if pending is not None:
+            cache, key, entry = pending
+            cache.set(key, entry)
+
+    def load_stream(self):
+        """
+        Open the response as a stream rather than reading it into memory
+        (unless a response cache is configured, in which case the response
+        is loaded normally so it can be cached).
+        """
+        if self.cacheable and get_cache() is not None:
+            self.load()
+            return
+        resp = self.send(self.url, self.params, stream=True)
+        resp.raw.decode_content = True
+        if self.binary:
+            self.file = resp.raw
+        else:
+            self.file = TextIOWrapper(resp.raw, resp.encoding or 'utf-8')
+
+    def send(self, url, params=None, headers={}, stream=False):
+        """
+        Issue a GET request and return the response object.  Similar to
+        wq.io.loaders.NetLoader.req(), but also allows conditional and
+        streaming requests.
+        """
+        if isinstance(params, str):
+            url += '?' + params
+            params = None
+
+        if self.debug:
+            if params:
+                debug_url = url + '?' + urlencode(params, doseq=True)
+            else:
+                debug_url = url
+            self.debug_string = "GET: %s" % debug_url
+            print(self.debug_string)
+
+        if self.username is not None and self.password is not None:
+            auth = (self.username, self.password)
+        else:
+            auth = None
+
+        all_headers = self.headers.copy()
+        all_headers.update(headers)
+
+        def request():
+            resp = self.client.request(
+                'GET', url,
+                params=params,
+                headers=all_headers,
+                auth=auth,
+                stream=stream,
+            )
+            if resp.status_code in self.retry_statuses:
+                raise TransientError(resp)
+            return resp
+
+        try:
+            resp = self.retry(
+                urlparse(url).netloc, request,
+                lambda e: isinstance(e, (TransientError, ConnectionError,
+                                         Timeout)),
+            )
+        except TransientError as e:
+            resp = e.response
+
+        if resp.status_code == 304 and headers:
+            return resp
+        if resp.status_code < 200 or resp.status_code > 299:
+            raise LoadFailed(
+                resp.text,
+                path=url,
+                code=resp.status_code,
+            )
+        return resp
+
+    def retry(self, host, request, is_transient):
+        """
+        Call request() after waiting for the host's rate limiter, retrying
+        with backoff if it raises an exception for which is_transient(e) is
+        true.  Request counts and wait times are recorded for each host (see
+        climata.throttle.get_stats()).
+        """
+        limiter = throttle.get_limiter(host, self.rate_limit, self.rate_burst)
+        attempt = 0
+        while True:
+            if limiter is not None:
+                wait = limiter.acquire()
+                if wait:
+                    throttle.record(host, waits=1, wait_time=wait)
+            throttle.record(host, requests=1)
+            try:
+                with events.timed(
+                        self, 'request_end', host=host, attempt=attempt
+                ) as info:
+                    events.emit(
+                        self, 'request_start', host=host, attempt=attempt
+                    )
+                    try:
+                        result = request()
+                    except Exception as e:
+                        info['error'] = e
+                        info['status'] = getattr(
+                            getattr(e, 'response', None), 'status_code', None
+                        )
+                        raise
+                    info['status'] = getattr(result, 'status_code', None)
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                wait = self.get_retry_wait(attempt, e)
+
+                # Release the connection before retrying (e.g. for streamed
+                # responses that were never read)
+                response = getattr(e, 'response', None)
+                if response is not None:
+                    response.close()
+                throttle.record(host, retries=1, waits=1, wait_time=wait)
+                time.sleep(wait)
+                attempt += 1
+
+    def get_retry_wait(self, attempt, error):
+        """
+        Determine how long to wait before retrying (honoring Retry-After if
+        provided by the server)
+        """
+        response = getattr(error, 'response', None)
+        retry_after = None
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.retry_max_backoff)
+        return throttle.backoff(
+            attempt, self.retry_backoff, self.retry_max_backoff
+        )
+
+    def read_response(self, resp):
+        events.emit(self, 'response', bytes=len(resp.content), cached=False)
+        if self.binary:
+            return resp.content
+        else:
+            return resp.text
+
+    def read_entry(self, entry):
+        events.emit(self, 'response', bytes=len(entry.body), cached=True)
+        if self.binary:
+            return entry.body
+        else:
+            return entry.body.decode(entry.encoding or 'utf-8', 'replace')
+
+    @property
+    def user_agent(self):
+        agent = "climata/%s %s %s" % (
+            VERSION,
+            super(HttpLoader, self).user_agent,
+            "https://github.com/heigeo/climata",
+        )
+        return agent
+
+    def get_cache_ttl(self):
+        """
+        Determine how long the response to this request should be cached.
+        """
+        return self.cache_ttl
+
+
+class FilterOptMeta(ABCMeta):
+    """
+    Resolves the FilterOpts for each IO class (including those inherited from
+    superclasses) once, when the class is defined.  (Extends ABCMeta for
+    compatibility with wq.io.BaseIO.)
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(FilterOptMeta, cls).__init__(name, bases, attrs)
+        options = OrderedDict()
+        for key in sorted(dir(cls)):
+            val = getattr(cls, key, None)
+            if isinstance(val, FilterOpt):
+                val.name = key
+                options[key] = val
+        cls._filter_options = options
+        cls._url_params = {
+            key: opt.get_url_param() for key, opt in options.items()
+        }
+
+
+class WebserviceLoader(HttpLoader, metaclass=FilterOptMeta):
     """
-    NetLoader subclass with enhanced functionality for enumerating and
+    HttpLoader subclass with enhanced functionality for enumerating and
     validating URL arguments.
     """
 
@@ -114,48 +472,285 @@ class WebserviceLoader(NetLoader):
     # URL params that apply to every request (if any)
     default_params = {}
 
+    # Requests for periods ending more than historical_age ago rarely change,
+    # and are cached using cache_ttl_historical (see HttpLoader).  Set to None
+    # to never expire them.
+    cache_ttl_historical = 30 * 24 * 60 * 60
+    historical_age = timedelta(days=30)
+
+    # Whether to split large requests according to FilterOpt.chunk, and how
+    # many of the resulting requests to run at once
+    chunked = True
+    chunk_workers = 4
+
+    # Share a single fetch & parse between identical concurrent requests
+    coalesce = True
+
+    # Validate options on init, but defer the request until the data is first
+    # accessed (e.g. by iterating or calling len())
+    lazy = False
+
     def __init__(self, *args, **kwargs):
         """
         Initialize web service (and general IO) options
         """
+        self.set_options(**kwargs)
+        if self.lazy:
+            # Validate options and compute request without loading
+            self.get_request()
+        else:
+            self.refresh()
 
-        #  Validate web service parameters using FilterOpt information
+    def __getattr__(self, name):
+        """
+        Load lazy IOs on first access to data
+        """
+        if name != 'data' or not self.lazy:
+            raise AttributeError(name)
+        if self.__dict__.get('_loading'):
+            raise AttributeError(name)
+        self._loading = True
+        try:
+            self.refresh()
+        finally:
+            self._loading = False
+        return self.__dict__['data']
+
+    def set_options(self, **kwargs):
+        """
+        Validate web service parameters using FilterOpt information
+        """
         self._values = {}
-        for name, opt in self.filter_options.items():
-            opt.name = name
+        self._params = None
+        self._request_key = None
+        for name, opt in self._filter_options.items():
             val = kwargs.pop(name, opt.default)
             self._values[name] = opt.parse(val)
 
         # Mimic BaseIO behavior since it's not a super class of NetLoader
         if kwargs:
             self.__dict__.update(**kwargs)
-        self.refresh()
+        self._extra = kwargs
 
     @classmethod
-    def get_filter_options(cls):
+    def aload(cls, **kwargs):
         """
-        List all filter options defined on class (and superclasses)
+        Coroutine for loading an IO from asyncio code (Python 3.5+), e.g.:
+
+            data = await DailyValueIO.aload(basin='02070010')
+
+        See climata.aio for details.
         """
-        attr = '_filter_options_%s' % id(cls)
+        from .aio import aload
+        return aload(cls, **kwargs)
 
-        options = getattr(cls, attr, {})
-        if options:
-            return options
+    @classmethod
+    def stream(cls, **kwargs):
+        """
+        Iterate over items as they are parsed from the response, rather than
+        loading the entire response first.  Only supported for IO classes
+        that define an iter_parse() method; other classes are loaded and
+        parsed as usual before iterating.  Large requests are not split into
+        chunks (see get_chunks()) when streaming.
 
-        for key in dir(cls):
-            val = getattr(cls, key)
-            if isinstance(val, FilterOpt):
-                options[key] = val
+        Usage:
+
+            for site in StationDataIO.stream(basin='18010203', ...):
+                print site.name, len(site.data)
+        """
+        io = cls.__new__(cls)
+        io.set_options(**kwargs)
+        if not hasattr(io, 'iter_parse'):
+            io.refresh()
+            for item in io.data:
+                yield io.usable_item(item)
+            return
+
+        io.load_stream()
+        try:
+            for i, item in enumerate(io.iter_parse()):
+                if i == 0:
+                    # Allow mappers to determine field names from first item
+                    io.data = [item]
+                yield io.usable_item(item)
+            io.save_cache()
+        finally:
+            io.file.close()
+
+    def load_nested(self, io_class, options, skip_nodata=False, workers=1):
+        """
+        Create an instance of io_class for each set of options (used by IOs
+        that fan out into multiple nested requests).  If skip_nodata is set,
+        IOs raising NoData are returned as None.
+        """
+        fanout = getattr(_nested, 'fanout', None)
+        if fanout is not None:
+            return fanout(io_class, options, skip_nodata)
+        create = partial(create_nested, io_class, skip_nodata=skip_nodata)
+        if workers > 1 and len(options) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(create, options))
+        return [create(opts) for opts in options]
+
+    def refresh(self):
+        """
+        Load and parse data, splitting the request into chunks if needed.
+        """
+        chunks = self.get_chunks()
+        if not chunks:
+            if self.coalesce:
+                self.refresh_shared()
+            else:
+                super(WebserviceLoader, self).refresh()
+            return
+
+        ios = self.load_nested(
+            type(self), chunks, skip_nodata=True, workers=self.chunk_workers
+        )
+        ios = [io for io in ios if io is not None]
+        if not ios:
+            raise NoData
+        self.merge_chunks(ios)
+
+    def refresh_shared(self):
+        """
+        Load and parse data, sharing the result with any identical requests
+        already in progress (in other threads).
+        """
+        def load():
+            super(WebserviceLoader, self).refresh()
+            return self
+
+        # Other instance options (e.g. columnar) may change how the response
+        # is parsed, so only requests with the same options are shared
+        options = tuple(sorted(
+            (name, repr(val)) for name, val in self._extra.items()
+        ))
+        key = (type(self), self.request_key, options)
+        leader, shared = get_flights().call(key, load)
+        if leader is self:
+            return
+
+        # Copy the parsed state from the IO that made the request, with a
+        # separate data list so that each IO can be modified independently.
+        # (Read-only ColumnData can be shared as is.)
+        for name, val in leader.__dict__.items():
+            if name not in self.__dict__:
+                self.__dict__[name] = val
+        if isinstance(leader.data, list):
+            self.data = list(leader.data)
+
+    def get_chunks(self):
+        """
+        Determine options for each sub-request, if the request needs to be
+        split (according to the chunk setting on each FilterOpt).
+        """
+        if not self.chunked:
+            return None
+
+        splits = []
+        for name, opt in sorted(self.filter_options.items()):
+            if not opt.chunk or opt.ignored:
+                continue
+            if isinstance(opt, DateOpt):
+                if name != 'start_date':
+                    continue
+                parts = [{
+                    'start_date': start,
+                    'end_date': end,
+                } for start, end in self.split_dates(opt.chunk)]
+            else:
+                parts = [
+                    {name: value}
+                    for value in opt.split(self.getvalue(name))
+                ]
+            if len(parts) > 1:
+                splits.append(parts)
+
+        if not splits:
+            return None
+
+        # Date ranges are split last, so that the chunks for each region or
+        # station are in chronological order.
+        splits.sort(key=lambda parts: 'start_date' in parts[0])
+        chunks = []
+        for parts in product(*splits):
+            options = self._values.copy()
+            options.update(self._extra)
+            for part in parts:
+                options.update(part)
+            options['chunked'] = False
+            options['lazy'] = False
+            chunks.append(options)
+        return chunks
+
+    def plan(self):
+        """
+        List the requests that would be made to load this IO, without making
+        them.  Each request is a dict with the IO class, method, url, params
+        and fingerprint ("key").  IOs that make follow-up requests based on
+        the results of the first (e.g. snotel.RegionDailyDataIO) also include
+        the "nested" IO class that will be used.
 
-        setattr(cls, attr, options)
-        return options
+        Usage:
+
+            for request in DailyValueIO(basin=..., lazy=True).plan():
+                print request['url'], request['params']
+        """
+        chunks = self.get_chunks()
+        if not chunks:
+            return [self.get_request()]
+        requests = []
+        for options in chunks:
+            options['lazy'] = True
+            requests.extend(type(self)(**options).plan())
+        return requests
+
+    def get_request(self):
+        return {
+            'io': type(self),
+            'method': 'GET',
+            'url': self.url,
+            'params': self.params,
+            'key': self.request_key,
+        }
+
+    def split_dates(self, chunk):
+        """
+        Split requested date range into consecutive ranges no longer than
+        chunk
+        """
+        start = self.getvalue('start_date')
+        end = self.getvalue('end_date')
+        if start is None or end is None:
+            return [(start, end)]
+        ranges = []
+        while start <= end:
+            chunk_end = min(start + chunk - timedelta(days=1), end)
+            ranges.append((start, chunk_end))
+            start = chunk_end + timedelta(days=1)
+        return ranges
+
+    def merge_chunks(self, ios):
+        """
+        Combine results from split requests (see get_chunks()).  The default
+        implementation simply concatenates the data.
+        """
+        self.data = [row for io in ios for row in io.data]
+
+    @classmethod
+    def get_filter_options(cls):
+        """
+        List all filter options defined on class (and superclasses)
+        """
+        return cls._filter_options
 
     @property
     def filter_options(self):
-        return type(self).get_filter_options()
+        return self._filter_options
 
     def get_url_param(self, key):
-        return self.filter_options[key].get_url_param()
+        return self._url_params[key]
 
     def getvalue(self, name):
         return self._values[name]
@@ -210,12 +805,15 @@ class WebserviceLoader(NetLoader):
     @property
     def params(self):
         """
-        URL parameters for wq.io.loaders.NetLoader
+        URL parameters for wq.io.loaders.NetLoader (computed once per
+        instance; a copy is returned so subclasses can modify the result).
         """
-        params, complex = self.get_params()
-        url_params = self.default_params.copy()
-        url_params.update(self.serialize_params(params, complex))
-        return url_params
+        if self._params is None:
+            params, complex = self.get_params()
+            url_params = self.default_params.copy()
+            url_params.update(self.serialize_params(params, complex))
+            self._params = url_params
+        return self._params.copy()
 
     def serialize_params(self, params, complex=False):
         """
@@ -231,23 +829,94 @@ class WebserviceLoader(NetLoader):
                 for key, val in params.items()
             }
 
-    @property
-    def user_agent(self):
-        agent = "climata/%s %s %s" % (
-            VERSION,
-            super(WebserviceLoader, self).user_agent,
-            "https://github.com/heigeo/climata",
-        )
-        return agent
+    def get_cache_ttl(self):
+        """
+        Use cache_ttl_historical for requests with an end date in the past.
+        """
+        end_date = self._values.get('end_date')
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+        if isinstance(end_date, date):
+            if end_date < date.today() - self.historical_age:
+                return self.cache_ttl_historical
+        return super(WebserviceLoader, self).get_cache_ttl()
 
 
 class ZipWebserviceLoader(Zipper, WebserviceLoader):
+    """
+    WebserviceLoader for zip archives.  The archive is downloaded to memory
+    (or to a temporary file, if larger than spool_size) and the inner file is
+    decompressed incrementally as it is parsed.
+    """
     binary = True
+    spool_size = 64 * 1024 * 1024
 
     def load(self):
-        super(ZipWebserviceLoader, self).load()
+        if self.cacheable and get_cache() is not None:
+            super(ZipWebserviceLoader, self).load()
+        else:
+            self.file = self.download()
         self.unzip_file()
 
+    def load_stream(self):
+        # Zip archives can't be read until the download is complete
+        self.load()
+
+    def refresh(self):
+        try:
+            super(ZipWebserviceLoader, self).refresh()
+        finally:
+            # Release the downloaded archive once the inner file is parsed
+            archive = self.__dict__.pop('archive', None)
+            if archive is not None:
+                archive.close()
+
+    def download(self):
+        """
+        Stream the response into a buffer, switching to a temporary file if
+        the archive is larger than spool_size.
+        """
+        resp = self.send(self.url, self.params, stream=True)
+        resp.raw.decode_content = True
+        buf = BytesIO()
+        size = 0
+        try:
+            for chunk in iter(partial(resp.raw.read, 64 * 1024), b''):
+                size += len(chunk)
+                if size > self.spool_size and isinstance(buf, BytesIO):
+                    spool = TemporaryFile()
+                    spool.write(buf.getvalue())
+                    buf = spool
+                buf.write(chunk)
+        finally:
+            resp.close()
+        events.emit(self, 'response', bytes=size, cached=False)
+        buf.seek(0)
+        return buf
+
+    def unzip_file(self):
+        """
+        Open the inner file as a stream (overrides wq.io.loaders.Zipper,
+        which extracts the entire file into memory).
+        """
+        self.archive = self.file
+        zipfile = ZipFile(self.archive)
+        inner_file = zipfile.open(self.get_inner_filename(zipfile))
+        zipfile.close()
+        if self.inner_binary:
+            self.file = inner_file
+        else:
+            self.file = TextIOWrapper(inner_file, 'utf-8', newline='')
+
+
+def create_nested(io_class, options, skip_nodata=False):
+    try:
+        return io_class(**options)
+    except NoData:
+        if skip_nodata:
+            return None
+        raise
+
 
 def fill_date_range(start_date, end_date, date_format=None):
     """
@@ -256,13 +925,10 @@ def fill_date_range(start_date, end_date, date_format=None):
     """
 
     if date_format:
-        start_date = datetime.strptime(start_date, date_format).date()
-        end_date = datetime.strptime(end_date, date_format).date()
-    date_list = []
-    while start_date <= end_date:
-        date_list.append(start_date)
-        start_date = start_date + timedelta(days=1)
-    return date_list
+        parse = compile_format(date_format)
+        start_date = parse(start_date).date()
+        end_date = parse(end_date).date()
+    return date_range(start_date, end_date)
 
 
 def as_list(value):
@@ -1,16 +1,27 @@
 #!/usr/bin/env python
-from climata.acis import StationMetaIO, StationDataIO
-from climata.acis.constants import ELEMENT_BY_NAME, ALL_META_FIELDS
-from climata.base import parse_date
+from climata.acis import StationDataIO
+from climata.acis.catalog import StationCatalog, DEFAULT_PATH
+from climata.acis.constants import ELEMENT_BY_NAME
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import argparse
+import json
 import sys
 from datetime import date, timedelta
 
 curyear = date.today().year
 one_day = timedelta(days=1)
 
+# Number of years to load at once
+WORKERS = 4
+
+# Number of loaded years that can wait to be written (in addition to those
+# being loaded), so that memory use does not depend on the number of years
+BUFFER = 4
+
 
 def load_data(basin, elem, syear=1950, eyear=curyear,
-              inactive=False, years=30):
+              inactive=False, years=30, output=None, workers=WORKERS):
     syear = int(syear)
     eyear = int(eyear)
     inactive = bool(inactive)
@@ -19,12 +30,14 @@ def load_data(basin, elem, syear=1950, eyear=curyear,
         from climata.huc8 import get_huc8
         basin = get_huc8(basin)
 
-    sites = StationMetaIO(
+    # Load site metadata into the local catalog (if not loaded recently)
+    catalog = StationCatalog(DEFAULT_PATH)
+    catalog.update(basin=basin)
+    sites = catalog.search(
         basin=basin,
+        elem=elem,
         start_date='%s-01-01' % syear,
         end_date='%s-12-31' % eyear,
-        parameter=elem,
-        meta=ALL_META_FIELDS,
     )
     include_sites = []
     seen_auths = set()
@@ -54,86 +67,227 @@ def load_data(basin, elem, syear=1950, eyear=curyear,
     include_sites = sorted(include_sites, key=lambda s: s.longitude)
     seen_auths = sorted(seen_auths)
 
-    def get_val(site, field):
-        if hasattr(site, field):
-            return getattr(site, field)
-        else:
-            return site.sids.get(field, "")
-
-    def header(field):
-        vals = [get_val(site, field) for site in include_sites]
-        sys.stdout.write(",".join([field + ":"] + list(map(str, vals))))
-        sys.stdout.write("\n")
+    if output and output.endswith('.parquet'):
+        writer = ParquetWriter(output, include_sites, seen_auths)
+    else:
+        writer = CsvWriter(output, include_sites, seen_auths)
+    try:
+        for sdate, columns in load_years(
+                basin, elem, syear, eyear, include_sites, workers,
+                writer.decoded):
+            writer.write(sdate, columns)
+    finally:
+        writer.close()
 
-    header("name")
-    for auth in seen_auths:
-        header(auth)
-    header("latitude")
-    header("longitude")
 
-    for year in range(syear, eyear + 1):
-        load_year_data(basin, elem, year, include_sites)
+def load_years(basin, elem, syear, eyear, include_sites, workers=WORKERS,
+               decoded=False):
+    """
+    Load each year's data in a pool of worker threads, yielding the years in
+    order.  At most workers + BUFFER years are loaded or waiting at once.
+    """
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for year in range(syear, eyear + 1):
+            if len(pending) >= workers + BUFFER:
+                yield pending.popleft().result()
+            pending.append(executor.submit(
+                load_year_data, basin, elem, year, include_sites, decoded
+            ))
+        while pending:
+            yield pending.popleft().result()
 
 
-def load_year_data(basin, elem, year, include_sites):
+def load_year_data(basin, elem, year, include_sites, decoded=False):
+    """
+    Return the start date and a list with each site's values for the year
+    (or None for sites without data).  If decoded is True, each site's values
+    are a DecodedValues column (see climata.acis.values).
+    """
     sys.stderr.write("Loading %s data...\n" % year)
-    sdate = parse_date('%s-01-01' % year).date()
-    edate = parse_date('%s-12-31' % year).date()
+    sdate = date(year, 1, 1)
+    edate = date(year, 12, 31)
     sitedata = StationDataIO(
         basin=basin,
         start_date=sdate,
         end_date=edate,
         parameter=elem,
+        decoded=decoded,
     )
     sitedata = {site.uid: site for site in sitedata}
-    dates = {}
-    date = sdate
-    while date <= edate:
-        dates[date] = {}
-        date += one_day
 
+    # Each station's rows start on sdate, with one row per day
+    columns = []
     for site in include_sites:
         if site.uid not in sitedata:
+            columns.append(None)
             continue
         data = sitedata[site.uid].data
-        for row in data:
-            dates[row.date][site.uid] = getattr(row, elem)
-
-    date = sdate
-    while date <= edate:
-        data = list(map(str, [
-            dates[date].get(site.uid, "")
-            for site in include_sites
-        ]))
-        sys.stdout.write(",".join([str(date)] + data))
-        sys.stdout.write("\n")
-        date += one_day
-
-
-def usage():
-    sys.stderr.write("""
-Usage: acis_data.py basin elem [syear] [eyear] [inact] [years]
-
- basin:\tbasin(s) (HUC8, required)
- elem:\telement code (required, see below)
- syear:\tStart year (default 1950)
- eyear:\tEnd year (default %s)
- inact:\tInclude inactive sites (default false)
- years:\tOnly include sites with this many years of data (default 30)
+        if decoded:
+            columns.append(data.data.column(elem))
+        else:
+            columns.append([getattr(row, elem) for row in data])
+    return sdate, columns
+
+
+def get_val(site, field):
+    if hasattr(site, field):
+        return getattr(site, field)
+    else:
+        return site.sids.get(field, "")
+
+
+class CsvWriter(object):
+    """
+    Writes one row per date (and one column per site) to a file or stdout,
+    after a header row for each site attribute.
+    """
+
+    # Values are written as returned by ACIS
+    decoded = False
+
+    def __init__(self, output, sites, auths):
+        self.sites = sites
+        self.file = open(output, 'w') if output else sys.stdout
+        self.header("name")
+        for auth in auths:
+            self.header(auth)
+        self.header("latitude")
+        self.header("longitude")
+
+    def header(self, field):
+        vals = [get_val(site, field) for site in self.sites]
+        self.file.write(",".join([field + ":"] + list(map(str, vals))))
+        self.file.write("\n")
+
+    def write(self, sdate, columns):
+        days = (date(sdate.year, 12, 31) - sdate).days + 1
+        columns = [column or [] for column in columns]
+        current = sdate
+        for i in range(days):
+            data = [
+                str(column[i]) if i < len(column) else ""
+                for column in columns
+            ]
+            self.file.write(",".join([str(current)] + data))
+            self.file.write("\n")
+            current += one_day
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
 
+class ParquetWriter(object):
+    """
+    Writes a Parquet file with a date column, and a float column (named by
+    ACIS uid) and boolean trace column (e.g. "1234_trace") for each site,
+    with one row group per year.  Values are decoded by StationDataIO
+    (missing and subsequent values are null and traces are 0), and the site
+    attributes are saved in the "sites" schema metadata.
+    """
+
+    # Values are decoded by StationDataIO (see load_year_data())
+    decoded = True
+
+    def __init__(self, output, sites, auths):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.sites = sites
+        self.schema = pa.schema(
+            [('date', pa.date32())]
+            + [
+                field for site in sites for field in (
+                    (str(site.uid), pa.float64()),
+                    ('%s_trace' % site.uid, pa.bool_()),
+                )
+            ],
+            metadata={'sites': json.dumps([
+                dict(
+                    [('uid', site.uid), ('name', site.name)]
+                    + [(auth, site.sids.get(auth, "")) for auth in auths]
+                    + [('latitude', site.latitude),
+                       ('longitude', site.longitude)]
+                ) for site in sites
+            ])},
+        )
+        self.writer = pq.ParquetWriter(output, self.schema)
+
+    def write(self, sdate, columns):
+        import numpy as np
+        import pyarrow as pa
+        days = (date(sdate.year, 12, 31) - sdate).days + 1
+        start = np.datetime64(sdate, 'D')
+        arrays = [pa.array(start + np.arange(days).astype('timedelta64[D]'))]
+        for column in columns:
+            values = np.full(days, np.nan)
+            mask = np.ones(days, dtype=bool)
+            trace = np.zeros(days, dtype=bool)
+            if column:
+                decoded, flags = column[:days].to_numpy()
+                values[:len(decoded)] = decoded.data
+                mask[:len(decoded)] = np.ma.getmaskarray(decoded)
+                trace[:len(decoded)] = flags['trace']
+            arrays.append(pa.array(values, mask=mask))
+            arrays.append(pa.array(trace))
+        self.writer.write_table(
+            pa.Table.from_arrays(arrays, schema=self.schema)
+        )
+
+    def close(self):
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Export daily ACIS data for all sites in a basin, with\n"
+                    "one row per date and one column per site.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
 Inactive sites are considered to be sites that have not had any data for n
 years, where n is the same as the years argument.
 
 Available elem codes:
-""" % curyear)
-
-    for elem in sorted(ELEMENT_BY_NAME.keys()):
-        sys.stderr.write(" %s:\t%s\n" % (elem, ELEMENT_BY_NAME[elem]['desc']))
-    exit()
+""" + "".join(
+            " %s:\t%s\n" % (elem, ELEMENT_BY_NAME[elem]['desc'])
+            for elem in sorted(ELEMENT_BY_NAME.keys())
+        ),
+    )
+    parser.add_argument('basin', help="basin(s) (HUC8, required)")
+    parser.add_argument(
+        'elem', choices=sorted(ELEMENT_BY_NAME.keys()),
+        help="element code (required, see below)",
+    )
+    parser.add_argument(
+        'syear', nargs='?', default=1950, help="Start year (default 1950)"
+    )
+    parser.add_argument(
+        'eyear', nargs='?', default=curyear,
+        help="End year (default %s)" % curyear,
+    )
+    parser.add_argument(
+        'inactive', nargs='?', default=False,
+        help="Include inactive sites (default false)",
+    )
+    parser.add_argument(
+        'years', nargs='?', default=30,
+        help="Only include sites with this many years of data (default 30)",
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help="Output file (default stdout); use a .parquet extension to "
+             "write Parquet (requires pyarrow)",
+    )
+    parser.add_argument(
+        '-w', '--workers', type=int, default=WORKERS,
+        help="Number of years to load at once (default %s)" % WORKERS,
+    )
+    args = parser.parse_args()
+    load_data(
+        args.basin, args.elem, args.syear, args.eyear,
+        args.inactive, args.years, args.output, args.workers,
+    )
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3 or sys.argv[2] not in ELEMENT_BY_NAME:
-        usage()
-        exit()
-    load_data(*sys.argv[1:])
+    main()
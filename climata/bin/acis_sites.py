@@ -1,11 +1,8 @@
 #!/usr/bin/env python
 from __future__ import print_function
 import sys
-from datetime import date
-from climata.acis import StationMetaIO
-from climata.acis.constants import (
-    ELEMENT_BY_NAME, ELEMENT_BY_ID, ALL_META_FIELDS
-)
+from climata.acis.catalog import StationCatalog, DEFAULT_PATH, ELEMS
+from climata.acis.constants import ELEMENT_BY_NAME, ELEMENT_BY_ID
 
 elems = ELEMENT_BY_NAME.copy()
 
@@ -27,21 +24,19 @@ def load_sites(*basin_ids):
             from climata.huc8 import get_huc8
             basins.extend(get_huc8(basin))
 
-    # Load sites with data since 1900
-    sites = StationMetaIO(
-        basin=basins,
-        parameter=list(elems.keys()),
-        start_date='1900-01-01',
-        end_date=date.today(),
-        meta=ALL_META_FIELDS,
-    )
+    # Load site metadata into the local catalog (if not loaded recently)
+    catalog = StationCatalog(DEFAULT_PATH)
+    catalog.update(basin=basins)
 
-    # Load all sites (to get sites without data)
-    seen_sites = [site.uid for site in sites]
-    nodata_sites = [
-        site for site in StationMetaIO(basin=basins)
-        if site.uid not in seen_sites
-    ]
+    # Separate sites with data since 1900 from sites without data
+    sites = catalog.search(basin=basins)
+    data_sites = set(
+        site.uid for elem in ELEMS for site in catalog.search(
+            basin=basins, elem=elem, start_date='1900-01-01'
+        )
+    )
+    nodata_sites = [site for site in sites if site.uid not in data_sites]
+    sites = [site for site in sites if site.uid in data_sites]
 
     # Determine the following from the site lists:
     seen_auths = set()  # Which authority codes are actually used by any site
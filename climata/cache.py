@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+from threading import RLock
+from tempfile import mkstemp
+
+
+def make_key(url, params=None, method='GET'):
+    """
+    Compute a stable key (or "fingerprint") for a fully serialized request
+    """
+    if isinstance(params, dict):
+        params = sorted(
+            (str(key), str(val)) for key, val in params.items()
+        )
+    request = json.dumps([method, url, params])
+    return hashlib.sha1(request.encode('utf-8')).hexdigest()
+
+
+class CacheEntry(object):
+    """
+    A single cached web service response.
+    """
+
+    def __init__(self, body, stored=None, ttl=None,
+                 etag=None, last_modified=None, encoding=None):
+        self.body = body
+        self.stored = stored if stored is not None else time.time()
+        self.ttl = ttl  # None means the entry never expires
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encoding = encoding
+
+    @property
+    def fresh(self):
+        if self.ttl is None:
+            return True
+        return time.time() - self.stored < self.ttl
+
+    @property
+    def revalidation_headers(self):
+        """
+        Conditional request headers for revalidating a stale entry
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    @property
+    def meta(self):
+        return {
+            'stored': self.stored,
+            'ttl': self.ttl,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'encoding': self.encoding,
+        }
+
+
+class ResponseCache(object):
+    """
+    Size-bounded on-disk cache for web service responses.  Each entry is
+    stored as a pair of files (the raw response body and a small JSON file
+    with the expiration and revalidation metadata).  When the total size of
+    the cached bodies exceeds max_size, the least recently used entries are
+    removed.
+
+    Usage:
+
+        from climata.cache import ResponseCache, set_cache
+        set_cache(ResponseCache('~/.cache/climata', max_size=10 ** 9))
+    """
+
+    def __init__(self, path, max_size=256 * 1024 ** 2):
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self.lock = RLock()
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+    def body_path(self, key):
+        return os.path.join(self.path, key + '.body')
+
+    def meta_path(self, key):
+        return os.path.join(self.path, key + '.json')
+
+    def get(self, key):
+        """
+        Return the CacheEntry for key (whether fresh or not), or None.
+        """
+        with self.lock:
+            try:
+                with open(self.meta_path(key)) as f:
+                    meta = json.load(f)
+                with open(self.body_path(key), 'rb') as f:
+                    body = f.read()
+            except (IOError, OSError, ValueError):
+                return None
+
+            # Mark entry as recently used
+            self._touch(key)
+            return CacheEntry(body, **meta)
+
+    def set(self, key, entry):
+        with self.lock:
+            self._write(self.body_path(key), entry.body)
+            self._write(
+                self.meta_path(key),
+                json.dumps(entry.meta).encode('utf-8'),
+            )
+            self.evict()
+
+    def refresh(self, key, entry):
+        """
+        Reset the expiration timer for an entry that was revalidated by the
+        server (i.e. a 304 Not Modified response).
+        """
+        entry.stored = time.time()
+        with self.lock:
+            self._write(
+                self.meta_path(key),
+                json.dumps(entry.meta).encode('utf-8'),
+            )
+
+    def delete(self, key):
+        with self.lock:
+            for path in self.body_path(key), self.meta_path(key):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def clear(self):
+        with self.lock:
+            for key, size, used in self.entries():
+                self.delete(key)
+
+    def entries(self):
+        """
+        List (key, size, last used) for each cached body
+        """
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith('.body'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((name[:-5], stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_size
+        """
+        if self.max_size is None:
+            return
+        entries = self.entries()
+        total = sum(size for key, size, used in entries)
+        for key, size, used in sorted(entries, key=lambda e: e[2]):
+            if total <= self.max_size:
+                break
+            self.delete(key)
+            total -= size
+
+    def _touch(self, key):
+        try:
+            os.utime(self.body_path(key), None)
+        except OSError:
+            pass
+
+    def _write(self, path, data):
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+_cache = None
+
+
+def get_cache():
+    return _cache
+
+
+def set_cache(cache):
+    """
+    Configure the ResponseCache to be used by all climata IO classes
+    (or None to disable caching).
+    """
+    global _cache
+    _cache = cache
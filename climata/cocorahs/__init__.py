@@ -1,9 +1,11 @@
-from wq.io import TimeSeriesMapper, XmlParser, BaseIO
+from wq.io import XmlParser, BaseIO
+from xml.etree.ElementTree import iterparse
 from datetime import datetime
 from climata.base import WebserviceLoader, FilterOpt, DateOpt, ChoiceOpt
+from climata.dates import DateMapper
 
 
-class CocorahsIO(WebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
+class CocorahsIO(WebserviceLoader, XmlParser, DateMapper, BaseIO):
     """
     Retrieves CoCoRaHS observations from data.cocorahs.org
 
@@ -12,6 +14,12 @@ class CocorahsIO(WebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
     data = CocorahsIO(state='MN', county='HN')
     for row in data:
         print row.stationname, row.observationdate.date(), row.totalprecipamt
+
+    The response is parsed incrementally, one report element at a time, so
+    large state-wide requests can also be streamed:
+
+    for row in CocorahsIO.stream(state='MN', start_date=..., end_date=...):
+        print row.stationnumber, row.totalprecipamt
     """
 
     # Customize date parameters
@@ -47,6 +55,7 @@ class CocorahsIO(WebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
     )
 
     # Configuration for wq.io base classes
+    binary = True
     url = "http://data.cocorahs.org/cocorahs/export/exportreports.aspx"
 
     root_tag = 'Cocorahs'
@@ -85,6 +94,25 @@ class CocorahsIO(WebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
             # i.e. self.getvalue('reporttype') == "MultiDay"
             return 'MultiDayPrecipReports/MultiDayPrecipReport'
 
+    def parse(self):
+        self.data = list(self.iter_parse())
+
+    def iter_parse(self):
+        """
+        Incrementally parse reports from the response (see also
+        WebserviceLoader.stream()).  Each report element is discarded as
+        soon as it has been read.
+        """
+        parent_tag, item_tag = self.item_tag.split('/')
+        parent = None
+        for event, elem in iterparse(self.file, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == parent_tag:
+                    parent = elem
+            elif elem.tag == item_tag and parent is not None:
+                yield self.parse_item(elem)
+                parent.remove(elem)
+
     def serialize_params(self, params, complex):
         params = super(CocorahsIO, self).serialize_params(params, complex)
         fmt = '%m/%d/%Y'
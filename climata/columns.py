@@ -0,0 +1,376 @@
+"""
+Compact, column-oriented storage for parsed time series.
+
+Parsers can store values in typed arrays rather than one dict per row; each
+row dict is only built when the row is accessed (e.g. by a wq.io mapper while
+iterating).  ArrayMixin converts parsed time series to numpy arrays or an
+Apache Arrow table without mapping each row.
+"""
+
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from datetime import date, datetime, timedelta, timezone
+from .dates import DateParser, DateRange
+from .events import MapEventsMixin
+
+EPOCH = datetime(1970, 1, 1)
+
+# Offset value for dates without time zone information
+NAIVE = -(2 ** 31)
+
+NAN = float('nan')
+
+
+class ColumnData(Sequence):
+    """
+    Read-only sequence of row dicts backed by one sequence (e.g. an array)
+    per column.
+    """
+
+    def __init__(self, columns):
+        self.columns = OrderedDict(columns)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(
+                (name, column[index]) for name, column in self.columns.items()
+            )
+        return {
+            name: column[index] for name, column in self.columns.items()
+        }
+
+    def column(self, name):
+        return self.columns[name]
+
+
+class DateColumn(Sequence):
+    """
+    Compact storage for a column of datetimes, as seconds since the epoch
+    (of the local time) and UTC offsets in minutes.
+    """
+
+    def __init__(self):
+        self.times = array('d')
+        self.offsets = array('i')
+        self.zones = {}
+
+    def append(self, value):
+        """
+        Add a datetime (or an ISO 8601 string, or None for missing values)
+        """
+        seconds, offset = encode_datetime(value)
+        self.times.append(seconds)
+        self.offsets.append(offset)
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            column = type(self)()
+            column.times = self.times[index]
+            column.offsets = self.offsets[index]
+            return column
+        seconds = self.times[index]
+        if seconds != seconds:
+            return None
+        value = EPOCH + timedelta(seconds=seconds)
+        offset = self.offsets[index]
+        if offset == NAIVE:
+            return value
+        zone = self.zones.get(offset)
+        if zone is None:
+            zone = self.zones[offset] = timezone(timedelta(minutes=offset))
+        return value.replace(tzinfo=zone)
+
+    def to_numpy(self):
+        """
+        Convert to a datetime64 array (in UTC for dates with a known offset,
+        with NaT for missing dates).
+        """
+        import numpy as np
+        seconds = np.frombuffer(self.times, dtype='f8')
+        offsets = np.frombuffer(self.offsets, dtype='i4')
+        seconds = seconds - np.where(offsets == NAIVE, 0, offsets * 60.0)
+        dates = np.full(len(seconds), 'NaT', dtype='datetime64[s]')
+        valid = ~np.isnan(seconds)
+        dates[valid] = seconds[valid].astype('i8')
+        return dates
+
+
+class DayColumn(DateColumn):
+    """
+    DateColumn for values without times, returning dates rather than
+    datetimes.
+    """
+
+    def __getitem__(self, index):
+        value = super(DayColumn, self).__getitem__(index)
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+
+class ArrayMixin(MapEventsMixin):
+    """
+    Mixin for time series IOs, adding to_numpy() and to_arrow() (and map
+    events; see climata.events).  Columns are
+    converted directly from the parsed data (rather than via each mapped
+    namedtuple): dates become datetime64 arrays and values become masked
+    float arrays (with missing or non-numeric values masked).
+
+    Usage:
+
+        data = DailyValueIO(station='05331000', ...)
+        for series in data:
+            arrays = series.data.to_numpy()
+            print arrays['date'], arrays['value'].mean()
+    """
+
+    date_fields = ['date']  # Mapped names of date columns
+    text_fields = []  # Mapped names of columns to leave as strings
+
+    def get_columns(self):
+        """
+        Return the parsed data as an OrderedDict of (mapped) field names and
+        raw column values.
+        """
+        if isinstance(self.data, ColumnData):
+            columns = self.data.columns.items()
+        elif not self.data:
+            return OrderedDict()
+        else:
+            columns = [
+                (name, [row.get(name) for row in self.data])
+                for name in self.get_field_names()
+            ]
+        return OrderedDict(
+            (self.map_column_name(name), column) for name, column in columns
+        )
+
+    def map_column_name(self, name):
+        if len(self.data) == 0 and hasattr(self, 'tuple_field_name'):
+            # TupleMapper.field_map raises NoData for empty series
+            return self.tuple_field_name(name)
+        return self.map_field(name)
+
+    def to_numpy(self):
+        """
+        Return an OrderedDict of numpy arrays, one for each field.
+        """
+        return OrderedDict(
+            (name, self.numpy_column(name, column))
+            for name, column in self.get_columns().items()
+        )
+
+    def numpy_column(self, name, column):
+        import numpy as np
+        if isinstance(column, (DateColumn, DateRange)):
+            return column.to_numpy()
+        if name in self.date_fields:
+            return numpy_dates(column, getattr(self, 'date_formats', None))
+        if name in self.text_fields:
+            return np.array(column, dtype=object)
+        return numpy_floats(column)
+
+    def to_arrow(self):
+        """
+        Return a pyarrow.Table with one column for each field.
+        """
+        import numpy as np
+        import pyarrow as pa
+        names, arrays = [], []
+        for name, column in self.to_numpy().items():
+            if np.ma.isMaskedArray(column):
+                column = pa.array(
+                    column.data, mask=np.ma.getmaskarray(column)
+                )
+            elif column.dtype.kind == 'M':
+                column = pa.array(column, mask=np.isnat(column))
+            else:
+                column = pa.array(column.tolist())
+            names.append(name)
+            arrays.append(column)
+        return pa.Table.from_arrays(arrays, names=names)
+
+
+def float_column(values):
+    """
+    Convert a sequence of numeric strings to an array of floats (with NaN for
+    blank values).  Raises ValueError if any value is not a number.
+    """
+    return array('d', [float(value) if value else NAN for value in values])
+
+
+def date_column(values):
+    """
+    Convert a sequence of ISO 8601 strings to a DateColumn (with None for
+    blank values).  Raises ValueError if any value is not a complete date.
+    """
+    column = DateColumn()
+    encoded = {}  # Dates are often repeated, so only convert each one once
+    for value in values:
+        item = encoded.get(value)
+        if item is None:
+            item = encoded[value] = encode_datetime(parse_date_value(value))
+        column.times.append(item[0])
+        column.offsets.append(item[1])
+    return column
+
+
+def date_text_column(values):
+    """
+    Like date_text_list(), but stores the values in a DayColumn if they are
+    all dates, or a DateColumn if they all include times.  Columns with
+    partial or invalid values (or a mix of dates and times) are returned as
+    lists.
+    """
+    parsed = date_text_list(values)
+    kinds = set(type(value) for value in parsed if value is not None)
+    if kinds - {date, datetime} or len(kinds) > 1:
+        return parsed
+    column = DateColumn() if datetime in kinds else DayColumn()
+    encoded = {}
+    for value in parsed:
+        item = encoded.get(value)
+        if item is None:
+            when = value
+            if type(value) is date:
+                when = datetime(value.year, value.month, value.day)
+            item = encoded[value] = encode_datetime(when)
+        column.times.append(item[0])
+        column.offsets.append(item[1])
+    return column
+
+
+def date_text_list(values):
+    """
+    Convert a sequence of ISO 8601 strings to a list (see parse_date_text()).
+    """
+    parsed = {}
+    dates = []
+    for value in values:
+        if value not in parsed:
+            parsed[value] = parse_date_text(value)
+        dates.append(parsed[value])
+    return dates
+
+
+def parse_date_text(value):
+    """
+    Parse an ISO 8601 string to a date, or a datetime if it includes a time.
+    Blank values become None, and partial (e.g. 1950-10) or invalid values
+    are left as text.
+    """
+    if not value:
+        return None
+    if len(value) < 10:
+        return value
+    try:
+        if len(value) == 10:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        return parse_datetime(value)
+    except (ValueError, OverflowError):
+        return value
+
+
+def parse_date_value(value):
+    if not value:
+        return None
+    if len(value) < 10:
+        # Avoid filling in partial dates (e.g. 1950-10) with defaults
+        raise ValueError("Incomplete date: %s" % value)
+    return parse_datetime(value)
+
+
+def encode_datetime(value):
+    """
+    Convert a datetime (or an ISO 8601 string, or None) to the seconds and
+    offset values stored by DateColumn.
+    """
+    if value is None:
+        return NAN, NAIVE
+    if not isinstance(value, datetime):
+        value = parse_datetime(value)
+    offset = value.utcoffset()
+    if offset is None:
+        offset = NAIVE
+    else:
+        offset = int(offset.total_seconds() // 60)
+        value = value.replace(tzinfo=None)
+    return (value - EPOCH).total_seconds(), offset
+
+
+def numpy_floats(values):
+    """
+    Convert a sequence of numbers (or numeric strings) to a masked float
+    array, with blank and non-numeric values masked.
+    """
+    import numpy as np
+    if isinstance(values, array) and values.typecode == 'd':
+        floats = np.frombuffer(values, dtype='f8')
+    else:
+        try:
+            floats = np.array(values, dtype='f8')
+        except (TypeError, ValueError):
+            floats = np.array([to_float(value) for value in values], 'f8')
+    return np.ma.masked_invalid(floats, copy=False)
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def numpy_dates(values, formats=None):
+    """
+    Convert a sequence of dates, datetimes or date strings (in one of the
+    given strptime formats, or ISO 8601) to a datetime64 array.  Datetimes
+    with time zones are converted to UTC.
+    """
+    import numpy as np
+    parser = DateParser(formats or [])
+    parsed = {}
+    dates = []
+    for value in values:
+        if value not in parsed:
+            parsed[value] = to_datetime64(value, parser)
+        dates.append(parsed[value])
+    return np.array(dates, dtype='datetime64[s]')
+
+
+def to_datetime64(value, parser=None):
+    import numpy as np
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            value = (parser or DateParser([])).parse(value)
+        except ValueError:
+            try:
+                value = parse_datetime(value)
+            except ValueError:
+                value = None
+    if value is None:
+        return np.datetime64('NaT', 's')
+    if isinstance(value, datetime) and value.utcoffset() is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return np.datetime64(value, 's')
+
+
+def parse_datetime(value):
+    """
+    Parse an ISO 8601 date and time (with optional UTC offset)
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        from dateutil.parser import parse
+        return parse(value)
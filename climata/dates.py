@@ -0,0 +1,265 @@
+"""
+Fast date parsing for time series responses.
+
+wq.io's TimeSeriesMapper tries every value against each of an IO's
+date_formats with strptime.  DateParser instead compiles each format once,
+using fixed-offset slicing for fixed-width layouts (e.g. ISO 8601 and
+%m/%d/%Y dates), and remembers which format matched each column so the other
+formats are only tried if it stops matching.  date_range() builds sequences
+of dates in bulk, and DateRange represents one without creating each date.
+"""
+
+import re
+from collections.abc import Sequence
+from datetime import date, datetime, timedelta
+from wq.io import TimeSeriesMapper, make_date_mapper
+
+# Width of each supported fixed-width strptime directive
+WIDTHS = {
+    '%Y': 4,
+    '%m': 2,
+    '%d': 2,
+    '%H': 2,
+    '%I': 2,
+    '%M': 2,
+    '%S': 2,
+    '%p': 2,
+}
+
+# Order of datetime() arguments (with defaults matching strptime)
+PARTS = [('%Y', 1900), ('%m', 1), ('%d', 1), ('%H', 0), ('%M', 0), ('%S', 0)]
+
+# Normalizes digits and AM/PM so values can be checked against a format's
+# layout in one step (e.g. "07/01/2014" and "%m/%d/%Y" both become
+# "00/00/0000")
+LAYOUT = str.maketrans('0123456789AaPpMm', '0000000000ppppmm')
+
+# Collapses runs of digits, for comparing layouts without zero padding
+DIGITS = re.compile('0+')
+
+
+def compile_format(fmt):
+    """
+    Return a function that parses strings in the given strptime format (or
+    'iso8601'), raising ValueError if they do not match.  As with wq.io's
+    make_date_mapper(), formats without a year return times.
+
+    Fixed-width formats are parsed by slicing each field at a fixed offset.
+    Values with the same layout apart from zero padding (e.g. 7/1/2014) are
+    passed to strptime, and any other values are rejected immediately.
+    """
+    strptime = make_date_mapper(fmt)
+    layout = parse_layout(fmt)
+    if layout is None:
+        return strptime
+    mask, fields = layout
+
+    # Slice each datetime() argument present in the format, filling in
+    # defaults for leading arguments (e.g. the date for time-only formats)
+    defaults, slices = [], []
+    for directive, default in PARTS:
+        if directive == '%H' and '%I' in fields:
+            directive = '%I'
+        if directive in fields:
+            slices.append(fields[directive])
+        elif slices:
+            break
+        else:
+            defaults.append(default)
+    ampm = fields.get('%p')
+    if len(slices) != len(fields) - (ampm is not None):
+        # Not a contiguous sequence of date and time fields
+        return strptime
+    time_only = '%Y' not in fields
+    unpadded = DIGITS.sub('0', mask)
+
+    def fallback(value, layout):
+        if DIGITS.sub('0', layout) != unpadded:
+            raise ValueError("%s does not match format %s" % (value, fmt))
+        return strptime(value)
+
+    if not defaults and ampm is None and not time_only:
+        # Most common case (ISO 8601, %m/%d/%Y etc.)
+        def parse(value):
+            layout = value.translate(LAYOUT)
+            if layout != mask:
+                return fallback(value, layout)
+            return datetime(*[int(value[s]) for s in slices])
+        return parse
+
+    def parse(value):
+        layout = value.translate(LAYOUT)
+        if layout != mask:
+            return fallback(value, layout)
+        parts = defaults + [int(value[s]) for s in slices]
+        if ampm is not None:
+            hour = parts[3]
+            if not 1 <= hour <= 12:
+                return strptime(value)
+            parts[3] = hour % 12 + (12 if value[ampm][0] in 'Pp' else 0)
+        result = datetime(*parts)
+        if time_only:
+            return result.time()
+        return result
+    return parse
+
+
+def parse_layout(fmt):
+    """
+    Return the normalized layout (see LAYOUT) and a slice for each field in
+    the given format, or None if the format is not fixed-width.
+    """
+    if fmt == 'iso8601':
+        return None
+    mask = ''
+    fields = {}
+    i = 0
+    while i < len(fmt):
+        if fmt[i] != '%':
+            mask += fmt[i].translate(LAYOUT)
+            i += 1
+            continue
+        directive = fmt[i:i + 2]
+        width = WIDTHS.get(directive)
+        if width is None or directive in fields:
+            return None
+        fields[directive] = slice(len(mask), len(mask) + width)
+        mask += 'pm' if directive == '%p' else '0' * width
+        i += 2
+    if not fields:
+        return None
+    return mask, fields
+
+
+class DateParser(object):
+    """
+    Parses date strings in any of the given formats, detecting and caching
+    the format used by each column (identified by key).
+
+    Usage:
+
+        parser = DateParser(['%m/%d/%Y %H:%M', '%m/%d/%Y'])
+        parser.parse('07/01/2014', 'date')
+    """
+
+    def __init__(self, formats):
+        self.formats = list(formats)
+        self.parsers = [compile_format(fmt) for fmt in self.formats]
+        self.detected = {}
+
+    def parse(self, value, key=None):
+        """
+        Parse value with the format last detected for key, or with the first
+        format that matches.  Raises ValueError if no format matches.
+        """
+        parser = self.detected.get(key)
+        if parser is not None:
+            try:
+                return parser(value)
+            except ValueError:
+                pass
+        for parser in self.parsers:
+            try:
+                result = parser(value)
+            except ValueError:
+                continue
+            self.detected[key] = parser
+            return result
+        raise ValueError("%s does not match any date format" % value)
+
+
+class DateMapper(TimeSeriesMapper):
+    """
+    TimeSeriesMapper that parses date_formats with DateParser.  Values in
+    columns already detected as dates skip the numeric conversion.
+    """
+    date_parser = None
+
+    def map_value(self, field, value):
+        if not isinstance(value, str):
+            return value
+        if self.date_parser is None:
+            self.date_parser = DateParser(self.date_formats or [])
+        parser = self.date_parser
+
+        value = value.strip()
+        if self.map_floats and field not in parser.detected:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        try:
+            return parser.parse(value, field)
+        except ValueError:
+            pass
+        if self.map_floats and field in parser.detected:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        return value
+
+
+def date_range(start_date, end_date, as_numpy=False):
+    """
+    Return every date from start_date to end_date (inclusive), as a list of
+    dates (or datetimes, if start_date is a datetime) or as a numpy
+    datetime64 array.
+    """
+    days = max((end_date - start_date).days + 1, 0)
+    if as_numpy:
+        import numpy as np
+        unit = 's' if isinstance(start_date, datetime) else 'D'
+        start = np.datetime64(start_date, unit)
+        return start + np.arange(days).astype('timedelta64[D]')
+    if isinstance(start_date, datetime):
+        return [start_date + timedelta(days=i) for i in range(days)]
+    first = start_date.toordinal()
+    return list(map(date.fromordinal, range(first, first + days)))
+
+
+class DateRange(Sequence):
+    """
+    Immutable sequence of consecutive dates from start_date to end_date
+    (inclusive).  Dates are only created when accessed, so one instance can
+    be shared by many time series with the same period.
+    """
+
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.count = max((end_date - start_date).days + 1, 0)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return DateRange(
+                self.start_date + timedelta(days=start),
+                self.start_date + timedelta(days=stop - 1),
+            )
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("date index out of range")
+        return self.start_date + timedelta(days=index)
+
+    def __eq__(self, other):
+        if isinstance(other, DateRange):
+            return (self.start_date, self.count) == (
+                other.start_date, other.count
+            )
+        return list(self) == other
+
+    def __repr__(self):
+        return "DateRange(%r, %r)" % (self.start_date, self.end_date)
+
+    def to_numpy(self):
+        """
+        Convert to a datetime64 array (see date_range())
+        """
+        return date_range(self.start_date, self.end_date, as_numpy=True)
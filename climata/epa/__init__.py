@@ -1,9 +1,10 @@
-from wq.io import BaseIO, TimeSeriesMapper, XmlParser
+from wq.io import BaseIO, XmlParser
 from climata.base import ZipWebserviceLoader, FilterOpt, DateOpt, ChoiceOpt
+from climata.dates import DateMapper
 from .constants import DOMAINS
 
 
-class WqxDomainIO(ZipWebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
+class WqxDomainIO(ZipWebserviceLoader, XmlParser, DateMapper, BaseIO):
     """
     Load WQX / STORET domain values from EPA web services.
 
@@ -27,6 +28,9 @@ class WqxDomainIO(ZipWebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
     domain = ChoiceOpt(choices=DOMAINS, required=True)
     base_url = 'http://cdx.epa.gov/wqx/download/DomainValues/'
 
+    # Domain lists change infrequently
+    cache_ttl = 24 * 60 * 60
+
     @property
     def url(self):
         domain = self.getvalue('domain')
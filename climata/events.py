@@ -0,0 +1,118 @@
+"""
+Instrumentation hooks for climata IO classes.
+
+Register a callback to receive a dict describing each phase of every request,
+e.g. to forward timings to a metrics pipeline:
+
+    from climata import events
+
+    def log_event(event):
+        print(event['event'], event['io'], event.get('elapsed'))
+
+    events.register(log_event)
+
+Every event includes "event" (the event name), "io" (the IO class name),
+"key" (the request fingerprint, if any) and "time".  Events and the extra
+information they include:
+
+    request_start: host, attempt
+    request_end:   host, attempt, elapsed, status (if HTTP), error (if any)
+    response:      bytes, cached
+    load:          elapsed (the entire load phase, including any requests)
+    convert:       elapsed, rows (SNOTEL SOAP results converted to dicts)
+    parse:         elapsed, rows
+    fill:          elapsed, rows (filling in the dates for a time series)
+    map:           elapsed, rows (mapping rows to namedtuples while iterating)
+
+Nested time series IOs (e.g. the data for each station) also emit map
+events, without a key.
+
+Callbacks are called synchronously in the thread making the request, so they
+should return quickly.  Exceptions raised by callbacks are not caught.
+"""
+
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+_callbacks = []
+_lock = Lock()
+
+
+def register(callback):
+    """
+    Register a function to be called with each event.
+    """
+    with _lock:
+        if callback not in _callbacks:
+            _callbacks.append(callback)
+
+
+def unregister(callback):
+    with _lock:
+        if callback in _callbacks:
+            _callbacks.remove(callback)
+
+
+def enabled():
+    return bool(_callbacks)
+
+
+def emit(io, event, **info):
+    """
+    Send an event from io to all registered callbacks.
+    """
+    if not _callbacks:
+        return
+    info['event'] = event
+    info['io'] = type(io).__name__
+    info['key'] = getattr(io, 'request_key', None)
+    info['time'] = time.time()
+    for callback in list(_callbacks):
+        callback(info)
+
+
+@contextmanager
+def timed(io, event, **info):
+    """
+    Emit an event with the time spent in the block.  The block can add
+    information to the event via the yielded dict.
+    """
+    if not _callbacks:
+        yield info
+        return
+    start = time.monotonic()
+    try:
+        yield info
+    finally:
+        info['elapsed'] = time.monotonic() - start
+        emit(io, event, **info)
+
+
+class MapEventsMixin(object):
+    """
+    IO mixin that emits a "map" event after each complete iteration, with the
+    time spent mapping rows (excluding time spent by the consumer).  Used by
+    HttpLoader and by nested time series IOs (via climata.columns.ArrayMixin).
+    """
+
+    def __iter__(self):
+        iterator = super(MapEventsMixin, self).__iter__()
+        if not _callbacks:
+            for item in iterator:
+                yield item
+            return
+
+        elapsed = 0
+        rows = 0
+        while True:
+            start = time.monotonic()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.monotonic() - start
+            rows += 1
+            yield item
+        emit(self, 'map', elapsed=elapsed, rows=rows)
@@ -0,0 +1,64 @@
+from threading import Event, Lock
+
+
+class Flight(object):
+    """
+    A call in progress, shared by every caller requesting the same key.
+    """
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+        self.callers = 1
+
+
+class SingleFlight(object):
+    """
+    Ensures that concurrent calls with the same key only run once.  The first
+    caller runs the function, while any others block until it completes and
+    then receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = Lock()
+
+    def call(self, key, fn):
+        """
+        Run fn() (unless a call with the same key is already in progress) and
+        return a (result, shared) tuple, where shared indicates whether the
+        result came from another caller.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                flight.callers += 1
+                leader = False
+            else:
+                flight = self.flights[key] = Flight()
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+        return flight.result, flight.callers > 1
+
+
+_flights = SingleFlight()
+
+
+def get_flights():
+    return _flights
@@ -1,9 +1,11 @@
-from wq.io import NetLoader, TupleMapper, BaseIO
+from wq.io import TupleMapper, BaseIO
+from climata.base import HttpLoader
 from climata.parsers import RdbParser
 
 
-class HucIO(NetLoader, RdbParser, TupleMapper, BaseIO):
+class HucIO(HttpLoader, RdbParser, TupleMapper, BaseIO):
     url = "http://water.usgs.gov/GIS/new_huc_rdb.txt"
+    cache_ttl = 7 * 24 * 60 * 60
 
     def parse(self):
         super(HucIO, self).parse()
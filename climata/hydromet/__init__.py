@@ -1,6 +1,11 @@
-from wq.io import CsvParser, TimeSeriesMapper, TupleMapper, BaseIO
+import csv
+from io import TextIOWrapper
+from wq.io import CsvParser, TupleMapper, BaseIO
 from collections import OrderedDict
-from climata.base import WebserviceLoader, FilterOpt
+from datetime import timedelta
+from climata.base import WebserviceLoader, FilterOpt, DateOpt
+from climata.columns import ArrayMixin
+from climata.dates import DateMapper, DateParser
 from wq.io.exceptions import NoData
 from requests.compat import urlencode
 
@@ -23,8 +28,13 @@ class HydrometLoader(WebserviceLoader):
     # Hydromet parameter codes are also required (multiple allowed)
     parameter = FilterOpt(required=True, multi=True)
 
+    # The USBR Perl scripts throttle or fail under heavy parallel use
+    rate_limit = 2
+    rate_burst = 2
+    max_retries = 5
 
-class HydrometIO(HydrometLoader, CsvParser, TimeSeriesMapper, BaseIO):
+
+class HydrometIO(HydrometLoader, CsvParser, ArrayMixin, DateMapper, BaseIO):
     """
     Base class for retrieving Hydromet data from USBR.
     Use DailyDataIO or InstantDataIO instead, depending on your needs.
@@ -38,6 +48,11 @@ class HydrometIO(HydrometLoader, CsvParser, TimeSeriesMapper, BaseIO):
     # TimeSeriesMapper configuration
     date_formats = ['%m/%d/%Y %H:%M', '%m/%d/%Y']
 
+    @property
+    def date_fields(self):
+        # For ArrayMixin
+        return self.key_fields
+
     def clean_field_name(self, field):
         return field.replace(self.getvalue('station').upper(), "").strip()
 
@@ -73,31 +88,39 @@ class HydrometIO(HydrometLoader, CsvParser, TimeSeriesMapper, BaseIO):
             ('format', 2),
         ]))
 
-    # Help CsvParser find data starting with BEGIN DATA
-    def reader_class(self):
-        cls = super(HydrometIO, self).reader_class()
+    # The response is decoded as it is parsed (see iter_parse())
+    binary = True
 
-        class Reader(cls):
-            def choose_header(self, rows):
-                for i, row in enumerate(rows):
-                    if len(row) > 0 and row[0] == "BEGIN DATA":
-                        return i + 1, rows[i + 1]
-                raise NoData
-        return Reader
-
-    # Remove END DATA and trailing HTML from output
     def parse(self):
-        super(HydrometIO, self).parse()
-        if not self.data:
-            return
-        end_i = None
-        for i in range(len(self.data)):
-            row = self.data[-i - 1]
-            if "END DATA" in row.values():
-                end_i = i
-        if end_i is None:
-            return
-        self.data = self.data[:-end_i - 1]
+        self.data = list(self.iter_parse())
+
+    def iter_parse(self):
+        """
+        Incrementally parse rows between BEGIN DATA and END DATA (skipping the
+        surrounding HTML), converting dates and numeric values as each row is
+        read.  Also used by WebserviceLoader.stream().
+        """
+        file = self.file
+        if isinstance(file.read(0), bytes):
+            file = TextIOWrapper(file, encoding='utf-8', errors='replace')
+        rows = csv.reader(iter_data_lines(file))
+        self.field_names = next(rows, None)
+        if not self.field_names:
+            raise NoData
+        field_names = self.field_names
+        key = field_names[0]
+        parser = DateParser(self.date_formats)
+        for row in rows:
+            if not row:
+                continue
+            date = row[0].strip()
+            try:
+                date = parser.parse(date, key)
+            except ValueError:
+                pass
+            values = [date]
+            values.extend(parse_value(val) for val in row[1:])
+            yield dict(zip(field_names, values))
 
 
 class DailyDataIO(HydrometIO):
@@ -135,17 +158,28 @@ class MultiStationDailyIO(HydrometLoader, TupleMapper, BaseIO):
 
     # Customize load function with nested IOs
     def load(self):
+        stations = self.getvalue('station')
+        ios = self.load_nested(DailyDataIO, self.get_nested_options())
         self.data = [{
             'station': station,
-            'data': DailyDataIO(
-                station=station,
-                parameter=self.getvalue('parameter'),
-                start_date=self.getvalue('start_date'),
-                end_date=self.getvalue('end_date'),
-                debug=self.debug,
-            )
+            'data': io,
+        } for station, io in zip(stations, ios)]
+
+    def get_nested_options(self):
+        return [{
+            'station': station,
+            'parameter': self.getvalue('parameter'),
+            'start_date': self.getvalue('start_date'),
+            'end_date': self.getvalue('end_date'),
+            'debug': self.debug,
         } for station in self.getvalue('station')]
 
+    def plan(self):
+        requests = []
+        for options in self.get_nested_options():
+            requests.extend(DailyDataIO(lazy=True, **options).plan())
+        return requests
+
     def parse(self):
         pass
 
@@ -164,6 +198,9 @@ class InstantDataIO(HydrometIO):
     script = "webdaycsv.pl"
     key_fields = ['datetime']
 
+    # Long periods of instant data are split into multiple requests
+    start_date = DateOpt(required=True, chunk=timedelta(days=366))
+
 
 # PN also has an agrimet.pl that can return all data from the last 2 weeks of
 # data for a station (no params need to be specified)
@@ -179,6 +216,9 @@ class AgrimetRecentIO(InstantDataIO):
     """
     script = "agrimet.pl"
 
+    # Always returns the most recent data
+    cache_ttl = 15 * 60
+
     start_date = FilterOpt(ignored=True)
     end_date = FilterOpt(ignored=True)
     parameter = FilterOpt(ignored=True)
@@ -191,3 +231,33 @@ class AgrimetRecentIO(InstantDataIO):
             ('format', 2),
             ('back', 360)
         ]))
+
+
+def iter_data_lines(file):
+    """
+    Yield the lines between BEGIN DATA and END DATA (raising NoData if there
+    is no BEGIN DATA line).
+    """
+    lines = iter(file)
+    for line in lines:
+        if line.strip() == "BEGIN DATA":
+            break
+    else:
+        raise NoData
+    for line in lines:
+        if line.strip() == "END DATA":
+            return
+        yield line
+
+
+def parse_value(value):
+    """
+    Convert numeric values to float (and blank values to None)
+    """
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
@@ -1,15 +1,16 @@
-from wq.io import (
-    XmlNetIO, XmlParser, BaseIO,
-    TupleMapper, TimeSeriesMapper
-)
+from collections import OrderedDict
+from datetime import datetime, time
+from wq.io import XmlNetIO, XmlParser, BaseIO, TupleMapper
 from climata.base import (
     WebserviceLoader, ZipWebserviceLoader,
     FilterOpt, DateOpt, ChoiceOpt
 )
-from .parsers import EnsembleCsvParser
+from climata.columns import ArrayMixin
+from climata.dates import DateMapper
+from .parsers import EnsembleCsvParser, EnsembleData
 
 
-class HydroForecastIO(WebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
+class HydroForecastIO(WebserviceLoader, XmlParser, DateMapper, BaseIO):
     """
     Loads hydrograph forecast data (next 3 days) from weather.gov
     """
@@ -35,6 +36,9 @@ class HydroForecastIO(WebserviceLoader, XmlParser, TimeSeriesMapper, BaseIO):
     ]
     url = 'http://water.weather.gov/ahps2/hydrograph_to_xml.php'
 
+    # Forecasts are updated frequently
+    cache_ttl = 15 * 60
+
     def parse_item(self, elem):
         valid = elem.find('valid')
         primary = elem.find('primary')
@@ -110,12 +114,15 @@ class EnsembleForecastIO(ZipWebserviceLoader, EnsembleCsvParser,
         ]
         if not date_filter:
             return
-        date_filter = date_filter.strftime('%Y-%m-%d') + " 23:59:59"
+        date_filter = datetime.combine(date_filter, time(23, 59, 59))
         for item in self.data:
-            item['data'] = [
-                row for row in item['data']
-                if row['date'] <= date_filter
-            ]
+            ensemble = item['data']
+            count = 0
+            for date in ensemble.dates:
+                if date > date_filter:
+                    break
+                count += 1
+            item['data'] = ensemble.truncate(count)
 
     def usable_item(self, item):
         item = item.copy()
@@ -123,7 +130,7 @@ class EnsembleForecastIO(ZipWebserviceLoader, EnsembleCsvParser,
         return super(EnsembleForecastIO, self).usable_item(item)
 
 
-class TimeSeriesIO(TimeSeriesMapper, BaseIO):
+class TimeSeriesIO(ArrayMixin, DateMapper, BaseIO):
     date_formats = ["%Y-%m-%d %H:%M:%S"]
 
     def usable_item(self, item):
@@ -131,6 +138,33 @@ class TimeSeriesIO(TimeSeriesMapper, BaseIO):
         # Convert KCFS to CFS
         return uitem._replace(value=uitem.value * 1000)
 
+    def to_numpy(self):
+        if not isinstance(self.data, EnsembleData):
+            arrays = super(TimeSeriesIO, self).to_numpy()
+            if 'value' in arrays:
+                arrays['value'] = arrays['value'] * 1000
+            return arrays
+
+        import numpy as np
+        dates, years, values = self.to_matrix()
+        return OrderedDict([
+            ('date', np.repeat(dates, len(years))),
+            ('year', np.tile(years, len(dates))),
+            ('value', values.ravel()),
+        ])
+
+    def to_matrix(self):
+        """
+        Return the dates (as datetime64), trace years, and a 2-D masked array
+        of values in CFS (dates x years), e.g. for computing statistics
+        across ensemble members:
+
+            dates, years, values = item.data.to_matrix()
+            median = numpy.ma.median(values, axis=1)
+        """
+        dates, years, values = self.data.to_numpy()
+        return dates, years, values * 1000
+
 
 class SiteIO(XmlNetIO):
     """
@@ -1,50 +1,136 @@
+from array import array
+from collections.abc import Sequence
 from wq.io.parsers.base import TableParser
 from csv import reader
+from climata.columns import DateColumn, date_column, to_float, NAN
 
 
 class EnsembleCsvParser(TableParser):
+    """
+    Parser for CNRFC ensemble CSV files.  Each site/parameter ensemble is
+    stored as a dense array of values (see EnsembleData), rather than as one
+    dict per date, site and trace.
+    """
     header_row = 0
     max_header_row = 0
     start_row = 2
 
     def parse(self):
         csvdata = reader(self.file)
-        sitedata = {}
+        ensembles = {}
 
         # Extract metadata from first two rows
         sites = next(csvdata)[1:]
         params = next(csvdata)[1:]
-        years = []
-        for site, param in zip(sites, params):
-            if site not in sitedata:
-                sitedata[site] = {}
-            if param not in sitedata[site]:
-                sitedata[site][param] = []
-                year = 1950
+        columns = {}
+        for i, (site, param) in enumerate(zip(sites, params)):
+            columns.setdefault((site, param), []).append(i)
+        for key, indexes in columns.items():
+            # Each trace corresponds to a historical year, starting in 1950
+            years = list(range(1950, 1950 + len(indexes)))
+            ensembles[key] = EnsembleData(None, years)
+
+        # Use a slice to copy each ensemble's values if its traces are in
+        # adjacent columns
+        getters = []
+        for key, indexes in columns.items():
+            start, end = indexes[0], indexes[-1] + 1
+            if indexes == list(range(start, end)):
+                getters.append((ensembles[key].values, slice(start, end)))
             else:
-                year += 1
-            years.append(year)
+                getters.append((ensembles[key].values, indexes))
 
-        # Extract data from remaining rows
+        # Extract data from remaining rows (converting each row at once)
+        dates = []
+        count = len(sites)
         for row in csvdata:
-            date = row[0]
-            for site, param, year, val in zip(sites, params, years, row[1:]):
-                data = {
-                    'date': date,
-                    'year': year,
-                    'value': val,
-                }
-                sitedata[site][param].append(data)
+            if not row:
+                continue
+            dates.append(row[0])
+            vals = row[1:count + 1]
+            try:
+                vals = [float(val) if val else NAN for val in vals]
+            except ValueError:
+                vals = [to_float(val) for val in vals]
+            if len(vals) < count:
+                vals += [NAN] * (count - len(vals))
+            for values, index in getters:
+                if isinstance(index, slice):
+                    values.extend(vals[index])
+                else:
+                    values.extend([vals[i] for i in index])
+
+        # All ensembles share the same date index
+        dates = date_column(dates)
 
         # Repackage into IO-friendly arrays
         self.data = []
-        for site in sitedata:
+        for (site, param), ensemble in ensembles.items():
+            ensemble.dates = dates
             siteid = site
             if len(siteid) == 6 and siteid[-1] == "L":
                 siteid = siteid[:5]
-            for param in sitedata[site]:
-                self.data.append({
-                    'site': siteid,
-                    'parameter': param,
-                    'data': sitedata[site][param],
-                })
+            self.data.append({
+                'site': siteid,
+                'parameter': param,
+                'data': ensemble,
+            })
+
+
+class EnsembleData(Sequence):
+    """
+    Ensemble forecast values for one site and parameter, stored as a flat
+    array with one row per date and one column per trace year.  Items are
+    dicts with date, year and value, for use by nws.TimeSeriesIO.
+    """
+
+    def __init__(self, dates, years, values=None):
+        self.dates = dates
+        self.years = years
+        if values is None:
+            values = array('d')
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        row, col = divmod(index, len(self.years))
+        return {
+            'date': self.dates[row],
+            'year': self.years[col],
+            'value': self.values[index],
+        }
+
+    def truncate(self, count):
+        """
+        Return a copy with only the first count dates.
+        """
+        return type(self)(
+            self.dates[:count],
+            self.years,
+            self.values[:count * len(self.years)],
+        )
+
+    def to_numpy(self):
+        """
+        Return the dates (as datetime64), trace years and a 2-D masked array
+        of values (dates x years).
+        """
+        import numpy as np
+        if isinstance(self.dates, DateColumn):
+            dates = self.dates.to_numpy()
+        else:
+            dates = np.array(self.dates, dtype='datetime64[s]')
+        values = np.frombuffer(self.values, dtype='f8').reshape(
+            len(dates), len(self.years)
+        )
+        return (
+            dates,
+            np.array(self.years),
+            np.ma.masked_invalid(values, copy=False),
+        )
@@ -1,66 +1,434 @@
+import json
+import re
+from io import TextIOWrapper
+from array import array
+from xml.etree.ElementTree import iterparse
 from wq.io import CsvParser, BaseIO, TimeSeriesMapper
 from wq.io.parsers.base import BaseParser
-from owslib.waterml.wml11 import WaterML_1_1 as WaterML
+from wq.io.exceptions import ParseFailed
+from .columns import (
+    ArrayMixin, ColumnData, DateColumn, float_column, date_text_column,
+    date_text_list
+)
 
 
 class RdbParser(CsvParser):
     """
     Parser for RDB format (basically TSV with an extra header row)
+
+    The second header row contains the type of each column (5s, 10n, 12d
+    etc.), which is used to convert numeric and date columns in bulk.  Date
+    values become dates (or datetimes if they include a time), with None for
+    blank values; partial (e.g. 1950-10) or invalid dates are left as text.
+    Set columnar to True to store the data as one array per column (see
+    climata.columns.ColumnData) rather than a list of row dicts.
     """
     max_header_row = 100
     delimiter = '\t'
+    columnar = False
 
     def parse(self):
-        super(RdbParser, self).parse()
-        # Skip second row which contains column lengths (5s, 10s, etc.)
-        self.data = self.data[1:]
+        fields = self.get_field_names()
+        Reader = self.reader_class()
+        self.csvdata = Reader(
+            self.file,
+            fields,
+            delimiter=self.delimiter,
+            quotechar=self.quotechar,
+        )
+        self.field_names = self.csvdata.fieldnames
+        if not fields:
+            self.header_row = self.csvdata.header_row
+        self.extra_data = {}
+
+        # Read remaining rows directly (rather than as dicts)
+        rows = [row for row in self.csvdata.reader if row]
+        spec = rows.pop(0) if rows else []
+        columns = self.parse_columns(rows, spec)
+        if self.columnar:
+            self.data = ColumnData(zip(self.field_names, columns))
+        else:
+            names = self.field_names
+            self.data = [dict(zip(names, row)) for row in zip(*columns)]
+
+    def parse_columns(self, rows, spec):
+        """
+        Convert rows into a list of columns, using the column types in spec.
+        """
+        count = len(self.field_names)
+        if any(len(row) != count for row in rows):
+            # Like DictReader, fill in missing values with None (and discard
+            # extra values)
+            rows = [
+                (row + [None] * (count - len(row)))[:count] for row in rows
+            ]
+
+        if rows:
+            columns = [list(column) for column in zip(*rows)]
+        else:
+            columns = [[] for name in self.field_names]
+
+        for i, column in enumerate(columns):
+            kind = spec[i][-1:] if i < len(spec) else 's'
+            if kind == 'n':
+                try:
+                    columns[i] = float_column(column)
+                except ValueError:
+                    # Leave as strings if any value is invalid
+                    pass
+            elif kind == 'd' and self.columnar:
+                columns[i] = date_text_column(column)
+            elif kind == 'd':
+                columns[i] = date_text_list(column)
+        return columns
 
 
-class TimeSeriesIO(TimeSeriesMapper, BaseIO):
+class TimeSeriesIO(ArrayMixin, TimeSeriesMapper, BaseIO):
     """
     Inner IO class for use by WaterMlParser.
     """
 
-    # owslib already handles date parsing
+    # WaterMlParser already handles date parsing
     date_formats = []
 
 
+WML = '{http://www.cuahsi.org/waterML/1.1/}'
+WHITESPACE = ' \t\r\n'
+SEPARATORS = re.compile(r'[ \t\r\n,]*')
+
+
 class WaterMlParser(BaseParser):
     """
-    wq.io-compatible Parser mixin for WaterML timeseries data.
+    wq.io-compatible Parser mixin for WaterML 1.1 timeseries data.
     Generates a nested IO for each actual time series.
 
-    Leverages owslib.waterml internally.
+    The response is parsed incrementally, one timeSeries element at a time,
+    with the values for each series stored in compact arrays (see
+    climata.columns).  The JSON rendering of WaterML 1.1 provided by NWIS
+    (format=json) is also supported (set use_json to True).
     """
 
     nested = True
-    no_pickle_parser = ['response']
+    use_json = False
+    json_path = ['value', 'timeSeries']
+
+    # Values are decoded one at a time, so only a small buffer is needed
+    json_chunk_size = 8 * 1024
 
     def parse(self):
-        response = WaterML(self.file.read().encode('utf-8')).response
-        self.response = response
-        self.data = list(map(self.parse_timeseries, response.time_series))
-
-    def parse_timeseries(self, ts):
-        site = ts.source_info
-        param = ts.variable
-        lng, lat = list(map(float, site.location.geo_coords[0]))
-
-        # FIXME: This assumes there is only one values array, which might not
-        # always be the case? (Same for site_codes below and geo_coords above.)
-        values = ts.values[0]
-        data = [{
-            'date': date,
-            'value': value,
-        } for date, value in values.get_date_values()]
+        self.data = list(self.iter_parse())
+
+    def iter_parse(self):
+        """
+        Incrementally parse time series from the response (see also
+        WebserviceLoader.stream()).
+        """
+        if self.use_json:
+            return self.iter_parse_json()
+        return self.iter_parse_xml()
+
+    def iter_parse_xml(self):
+        values = None
+        for event, elem in iterparse(self.file, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == WML + 'timeSeries':
+                    dates, vals = DateColumn(), array('d')
+                    values = None
+                elif elem.tag == WML + 'values' and values is None:
+                    # FIXME: This assumes there is only one values array,
+                    # which might not always be the case? (Same for
+                    # site_codes and geo coordinates below.)
+                    values = elem
+            elif elem.tag == WML + 'value':
+                if values is not None and elem in values:
+                    dates.append(elem.attrib['dateTime'])
+                    vals.append(parse_value(elem.text))
+                    # Discard each value element once it has been read
+                    values.remove(elem)
+            elif elem.tag == WML + 'timeSeries':
+                yield self.parse_timeseries(elem, ColumnData([
+                    ('date', dates),
+                    ('value', vals),
+                ]))
+                elem.clear()
 
+    def parse_timeseries(self, elem, data):
+        site = elem.find(WML + 'sourceInfo')
+        param = elem.find(WML + 'variable')
+        geo = site.find(WML + 'geoLocation/' + WML + 'geogLocation')
+
+        return {
+            'site_name': site.findtext(WML + 'siteName'),
+            'site_code': site.findtext(WML + 'siteCode'),
+            'variable_name': param.findtext(WML + 'variableName'),
+            'variable_code': param.findtext(WML + 'variableCode'),
+            'unit': param.findtext(WML + 'unit/' + WML + 'unitCode'),
+            'latitude': float(geo.findtext(WML + 'latitude')),
+            'longitude': float(geo.findtext(WML + 'longitude')),
+            'data': TimeSeriesIO(data=data)
+        }
+
+    def iter_parse_json(self):
+        reader = JsonChunkReader(self.file, self.json_chunk_size)
+        reader.seek_key(self.json_path)
+        while reader.next_item():
+            # Decode each series key by key, so that the values are read
+            # incrementally (as in iter_parse_xml()) rather than decoding the
+            # entire series at once
+            ts = {}
+            blocks = []
+            reader.start('{')
+            for key in reader.iter_keys():
+                if key == 'values':
+                    reader.start('[')
+                    while reader.next_item():
+                        blocks.append(self.parse_json_values(reader))
+                else:
+                    ts[key] = reader.value()
+            # FIXME: See iter_parse_xml()
+            if blocks:
+                data = blocks[0]
+            else:
+                data = ColumnData([
+                    ('date', DateColumn()),
+                    ('value', array('d')),
+                ])
+            yield self.parse_json_timeseries(ts, data)
+
+    def parse_json_values(self, reader):
+        """
+        Read a block of values into compact arrays, one value at a time.
+        """
+        dates, vals = DateColumn(), array('d')
+        reader.start('{')
+        for key in reader.iter_keys():
+            if key != 'value':
+                # Qualifiers, methods etc.
+                reader.value()
+                continue
+            reader.start('[')
+            for row in reader.iter_items():
+                dates.append(row['dateTime'])
+                vals.append(parse_value(row.get('value')))
+        return ColumnData([
+            ('date', dates),
+            ('value', vals),
+        ])
+
+    def parse_json_timeseries(self, ts, data):
+        site = ts['sourceInfo']
+        param = ts['variable']
+        geo = site['geoLocation']['geogLocation']
         return {
-            'site_name': site.site_name,
-            'site_code': site.site_codes[0],
-            'variable_name': param.variable_name,
-            'variable_code': param.variable_code,
-            'unit': param.unit.code,
-            'latitude': lat,
-            'longitude': lng,
+            'site_name': site['siteName'],
+            'site_code': site['siteCode'][0]['value'],
+            'variable_name': param['variableName'],
+            'variable_code': param['variableCode'][0]['value'],
+            'unit': param['unit']['unitCode'],
+            'latitude': float(geo['latitude']),
+            'longitude': float(geo['longitude']),
             'data': TimeSeriesIO(data=data)
         }
+
+
+def parse_value(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def iter_json_array(file, key, decoder=None, chunk_size=64 * 1024):
+    """
+    Incrementally decode the items in a JSON array nested under the given key
+    in a top level object (e.g. {"data": [...]}), without reading the entire
+    file into memory at once.  key can also be a list of keys for arrays in
+    nested objects (e.g. ['value', 'timeSeries'] for {"value": {"timeSeries":
+    [...]}}).
+    """
+    reader = JsonChunkReader(file, chunk_size, decoder)
+    reader.seek_key(key)
+    while reader.next_item():
+        yield reader.value()
+
+
+class JsonChunkReader(object):
+    """
+    Text buffer for iter_json_array(), refilled from file as needed.
+    """
+
+    def __init__(self, file, chunk_size=64 * 1024, decoder=None):
+        if isinstance(file.read(0), bytes):
+            # JSON is always UTF-8; decode as each chunk is read
+            file = TextIOWrapper(file, encoding='utf-8')
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.item_size = 0  # Size of the last decoded value
+        self.decoder = decoder or json.JSONDecoder()
+        self.key_decoder = json.JSONDecoder()
+
+    def fill(self, size=None):
+        """
+        Discard consumed text and read more from file
+        """
+        if self.eof:
+            raise ParseFailed("Unexpected end of JSON data")
+        text = self.file.read(size or self.chunk_size)
+        if not text:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+
+    def peek(self):
+        while self.pos >= len(self.buffer):
+            self.fill()
+        return self.buffer[self.pos]
+
+    def skip(self, chars):
+        while self.peek() in chars:
+            self.pos += 1
+
+    def next_item(self):
+        """
+        Advance to the next item in the current array, if any.
+        """
+        self.skip(WHITESPACE + ',')
+        if self.peek() == ']':
+            self.pos += 1
+            return False
+        return True
+
+    def start(self, char):
+        """
+        Advance past the opening bracket of the next object or array.
+        """
+        self.skip(WHITESPACE)
+        if self.peek() != char:
+            raise ParseFailed("Expected %s" % char)
+        self.pos += 1
+
+    def iter_keys(self):
+        """
+        Yield each key in the current object (after start('{')).  The value
+        for each key must be read (e.g. with value()) before the next key.
+        """
+        while True:
+            self.skip(WHITESPACE + ',')
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            key, self.pos = self.decode(self.key_decoder)
+            self.skip(WHITESPACE)
+            if self.peek() != ':':
+                raise ParseFailed("Expected : after %s" % key)
+            self.pos += 1
+            self.skip(WHITESPACE)
+            yield key
+
+    def iter_items(self):
+        """
+        Yield each item in the current array (after start('[')).  Equivalent
+        to calling next_item() and value() for each item, but faster for long
+        arrays of small items.
+        """
+        decode = self.decoder.raw_decode
+        skip = SEPARATORS.match
+        while True:
+            buffer, pos = self.buffer, self.pos
+            size = len(buffer)
+            try:
+                while True:
+                    pos = skip(buffer, pos).end()
+                    if pos == size:
+                        break
+                    if buffer[pos] == ']':
+                        self.pos = pos + 1
+                        return
+                    value, end = decode(buffer, pos)
+                    if end == size:
+                        # Value may be truncated (e.g. a number)
+                        break
+                    pos = end
+                    yield value
+            except ValueError:
+                # Incomplete item
+                pass
+            self.pos = pos
+            self.fill()
+
+    def value(self):
+        """
+        Decode the next value
+        """
+        value, self.pos = self.decode(self.decoder)
+        return value
+
+    def seek_key(self, key):
+        """
+        Advance to the start of the array for key in the top level object.
+        key can also be a list of keys, for arrays in nested objects.
+        """
+        if isinstance(key, (list, tuple)):
+            path = list(key)
+        else:
+            path = [key]
+        found = 0  # Number of keys in path found so far
+        depth = 0
+        while True:
+            char = self.peek()
+            if char == '"':
+                # Decode entire string to avoid matching brackets within it
+                value, self.pos = self.decode(json.JSONDecoder())
+                if depth == found + 1 and value == path[found]:
+                    self.skip(WHITESPACE)
+                    if self.peek() != ':':
+                        # String value rather than object key
+                        continue
+                    self.pos += 1
+                    self.skip(WHITESPACE)
+                    found += 1
+                    if found < len(path):
+                        if self.peek() != '{':
+                            raise ParseFailed("%s is not an object" % value)
+                        continue
+                    if self.peek() != '[':
+                        raise ParseFailed("%s is not an array" % value)
+                    self.pos += 1
+                    return
+                continue
+            if char in '{[':
+                depth += 1
+            elif char in '}]':
+                depth -= 1
+                if depth == found:
+                    raise ParseFailed("%s not found" % path[found])
+            self.pos += 1
+
+    def decode(self, decoder):
+        """
+        Decode the next JSON value, reading more text as needed (doubling the
+        read size each time to avoid repeatedly re-parsing large items).
+        """
+        # Assume the value is likely to be similar in size to the last one
+        needed = self.item_size + self.item_size // 8
+        available = len(self.buffer) - self.pos
+        if needed > available and not self.eof:
+            self.fill(needed - available)
+
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                self.fill(size)
+                size *= 2
+            else:
+                if end == len(self.buffer) and not self.eof:
+                    # Value may be truncated (e.g. a number)
+                    self.fill(size)
+                    continue
+                self.item_size = end - self.pos
+                return value, end
@@ -0,0 +1,150 @@
+"""
+Record and replay web service responses, for testing and benchmarking without
+network access.
+
+Usage:
+
+    from climata import replay, session
+    from climata.acis import StationMetaIO
+
+    # Save each response to fixtures/ while making live requests
+    session.set_session(replay.RecordingSession('fixtures/'))
+    StationMetaIO(state='MN')
+
+    # Later, load the same request from fixtures/ (without network access)
+    session.set_session(replay.ReplaySession('fixtures/'))
+    StationMetaIO(state='MN')
+
+SNOTEL SOAP requests can be recorded and replayed the same way with the suds
+transports in climata.snotel.transport.
+
+Fixtures are stored as two files named after the request fingerprint (see
+climata.cache.make_key()): <key>.body with the raw response and <key>.json
+with the request URL, status code and headers.
+"""
+
+import io
+import json
+import os
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from .cache import make_key
+
+
+class FixtureNotFound(LookupError):
+    """
+    Raised by ReplaySession when no fixture matches the request.
+    """
+
+
+class FixtureStore(object):
+    """
+    Directory of recorded responses.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, method, url, params=None):
+        return make_key(url, params, method)
+
+    def filename(self, key, ext):
+        return os.path.join(self.path, '%s.%s' % (key, ext))
+
+    def save(self, key, body, **meta):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        with open(self.filename(key, 'body'), 'wb') as f:
+            f.write(body)
+        with open(self.filename(key, 'json'), 'w') as f:
+            json.dump(meta, f, indent=2, sort_keys=True)
+
+    def load(self, key):
+        """
+        Return (body, meta) for key, or raise FixtureNotFound.
+        """
+        try:
+            with open(self.filename(key, 'json')) as f:
+                meta = json.load(f)
+            with open(self.filename(key, 'body'), 'rb') as f:
+                body = f.read()
+        except (IOError, OSError):
+            raise FixtureNotFound(key)
+        return body, meta
+
+    def __contains__(self, key):
+        return os.path.exists(self.filename(key, 'json'))
+
+
+def make_response(body, status=200, headers=None, url=None, encoding=None):
+    """
+    Build a requests.Response from a recorded body, usable with both regular
+    and streaming requests.
+    """
+    resp = Response()
+    resp.status_code = status
+    resp.headers = CaseInsensitiveDict(headers or {})
+    resp.url = url
+    resp.encoding = encoding
+    resp.raw = io.BytesIO(body)
+    resp._content = body
+    return resp
+
+
+class RecordingSession(object):
+    """
+    Passes requests through to a requests.Session (or compatible object) and
+    saves each response to a FixtureStore.
+    """
+
+    def __init__(self, path, session=None):
+        if session is None:
+            from .session import make_session
+            session = make_session()
+        self.session = session
+        self.store = FixtureStore(path)
+
+    def request(self, method, url, params=None, stream=False, **kwargs):
+        resp = self.session.request(method, url, params=params, **kwargs)
+        headers = {
+            key: val for key, val in resp.headers.items()
+            if key.lower() in ('content-type', 'etag', 'last-modified')
+        }
+        encoding = resp.encoding or resp.apparent_encoding
+        self.store.save(
+            self.store.key(method, url, params), resp.content,
+            url=url,
+            params=params,
+            status=resp.status_code,
+            headers=headers,
+            encoding=encoding,
+        )
+        # Return a copy, since the original body has already been consumed
+        return make_response(
+            resp.content, resp.status_code, headers, url, encoding
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class ReplaySession(object):
+    """
+    Returns recorded responses from a FixtureStore instead of making requests.
+    """
+
+    def __init__(self, path):
+        self.store = FixtureStore(path)
+
+    def request(self, method, url, params=None, **kwargs):
+        body, meta = self.store.load(self.store.key(method, url, params))
+        return make_response(
+            body,
+            meta['status'],
+            meta['headers'],
+            meta['url'],
+            meta['encoding'],
+        )
+
+    def close(self):
+        pass
@@ -0,0 +1,74 @@
+import requests
+from requests.adapters import HTTPAdapter
+from threading import Lock
+
+# Default connection pool configuration
+POOL_CONNECTIONS = 10  # Number of hosts to keep pools for
+POOL_MAXSIZE = 10  # Connections to keep alive for each host
+HOST_POOL_SIZES = {}  # Override pool size for specific hosts
+
+_session = None
+_lock = Lock()
+
+
+def make_session(pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE,
+                 host_pool_sizes=HOST_POOL_SIZES):
+    """
+    Create a requests.Session with keep-alive connection pools and
+    compressed transfer encoding.  host_pool_sizes can be used to allow more
+    (or fewer) concurrent connections to specific hosts, e.g.:
+
+        make_session(host_pool_sizes={'data.rcc-acis.org': 20})
+    """
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    session.headers['Connection'] = 'keep-alive'
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    for host, size in host_pool_sizes.items():
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        session.mount('http://%s/' % host, adapter)
+        session.mount('https://%s/' % host, adapter)
+
+    return session
+
+
+def get_session():
+    """
+    Return the shared session used by all climata IO classes (creating it if
+    needed).
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def set_session(session):
+    """
+    Replace the shared session, e.g. with a custom requests.Session (or any
+    object with a compatible request() method) for testing.  Set to None to
+    recreate the default session on next use.
+    """
+    global _session
+    with _lock:
+        if _session is not None and _session is not session:
+            _session.close()
+        _session = session
+
+
+def configure(**kwargs):
+    """
+    Recreate the shared session with the given pool options (see
+    make_session()).
+    """
+    set_session(make_session(**kwargs))
@@ -1,26 +1,54 @@
 from __future__ import print_function
+from functools import partial
 
-from wq.io import BaseIO, TupleMapper, TimeSeriesMapper
+from wq.io import BaseIO, TupleMapper
 from wq.io.parsers.base import BaseParser
 from wq.io.exceptions import NoData
 from wq.io.util import flattened
 
 from suds.client import Client
+from suds.cache import NoCache
 from suds.sudsobject import asdict, Object as SudsObject
+from suds.transport import TransportError
+from requests.compat import urlparse
 from climata.base import WebserviceLoader, FilterOpt, DateOpt
 from climata.base import fill_date_range, as_list
+from climata.cache import make_key
+from climata.columns import ArrayMixin, ColumnData
+from climata.dates import DateMapper
+from climata import events
 
 url = 'https://wcc.sc.egov.usda.gov/awdbWebService/services?WSDL'
 _server = None
+_transport = None
 
 
 def get_server():
     global _server
     if _server is None:
-        _server = Client(url).service
+        if _transport is not None:
+            # Bypass the WSDL cache so the transport sees every request
+            client = Client(url, transport=_transport, cache=NoCache())
+        else:
+            client = Client(url)
+        _server = client.service
     return _server
 
 
+def set_transport(transport):
+    """
+    Use a custom suds transport for all SNOTEL requests (e.g. one of the
+    record/replay transports in climata.snotel.transport).  Set to None to
+    restore the default transport.
+    """
+    global _server, _transport
+    _transport = transport
+    _server = None
+    # Reload the element list through the new transport
+    if '_cache' in ElementIO.__dict__:
+        del ElementIO._cache
+
+
 class SnotelIO(WebserviceLoader, BaseParser, TupleMapper, BaseIO):
     """
     Base class for accessing SNOTEL AWDB SOAP web services.
@@ -29,6 +57,11 @@ class SnotelIO(WebserviceLoader, BaseParser, TupleMapper, BaseIO):
     webservice_name = "awdbWebService"
     data_function = None
 
+    # AWDB tends to throttle or fail under heavy parallel use
+    rate_limit = 4
+    rate_burst = 4
+    max_retries = 5
+
     # Override Default WebserviceLoader options
     start_date = DateOpt(ignored=True)
     end_date = DateOpt(ignored=True)
@@ -43,16 +76,34 @@ class SnotelIO(WebserviceLoader, BaseParser, TupleMapper, BaseIO):
             self.print_debug()
         params = self.params
         fn = getattr(get_server(), self.data_function)
-        self.data = fn(**params)
+        self.data = self.retry(
+            urlparse(url).netloc, lambda: fn(**params), self.is_transient
+        )
         if len(self.data) == 0:
             self.data = []
-        else:
+            return
+        with events.timed(self, 'convert') as info:
             self.data = as_list(self.data)
             if isinstance(self.data[0], SudsObject):
                 parse = asdict
             else:
                 parse = str
             self.data = [parse(row) for row in self.data]
+            info['rows'] = len(self.data)
+
+    def is_transient(self, error):
+        if isinstance(error, TransportError):
+            return error.httpcode in self.retry_statuses
+        return isinstance(error, (IOError, OSError))
+
+    def get_request_key(self):
+        return make_key(url, self.params, self.data_function)
+
+    def get_request(self):
+        request = super(SnotelIO, self).get_request()
+        request['method'] = self.data_function
+        request['url'] = url
+        return request
 
     # Some records may have additional fields; loop through entire
     # array to ensure all field names are accounted for.  (Otherwise BaseIO
@@ -105,10 +156,17 @@ class StationIO(SnotelIO):
 
     def load(self):
         super(StationIO, self).load()
-        self.data = [
-            StationMetaIO(station=station, debug=self.debug).data[0]
-            for station in self.data
-        ]
+        ios = self.load_nested(StationMetaIO, [{
+            'station': station,
+            'debug': self.debug,
+        } for station in self.data])
+        self.data = [io.data[0] for io in ios]
+
+    def get_request(self):
+        request = super(StationIO, self).get_request()
+        # Followed by one request per station
+        request['nested'] = StationMetaIO
+        return request
 
 
 class StationMetaIO(SnotelIO):
@@ -166,7 +224,7 @@ class StationDataIO(StationElementIO):
 
     def load(self):
         super(StationDataIO, self).load()
-        data = []
+        rows = []
         for row in self.data:
 
             # Only include records matching the specified duration
@@ -176,25 +234,34 @@ class StationDataIO(StationElementIO):
             elem = self.getvalue('parameter')
             if elem and row['elementCd'] != elem:
                 continue
+            rows.append(row)
+
+        # getStationElements() sometimes returns parameters that don't
+        # actually have data for the requested timeframe - silently catch
+        # the exception and remove parameter from results.
+        ios = self.load_nested(self.inner_io_class, [{
+            'station': row['stationTriplet'],
+            'parameter': row['elementCd'],
+            'start_date': self.getvalue('start_date'),
+            'end_date': self.getvalue('end_date'),
+            'debug': self.debug,
+        } for row in rows], skip_nodata=True)
 
-            # getStationElements() sometimes returns parameters that don't
-            # actually have data for the requested timeframe - silently catch
-            # the exception and remove parameter from results.
-            try:
-                row['data'] = self.inner_io_class(
-                    station=row['stationTriplet'],
-                    parameter=row['elementCd'],
-                    start_date=self.getvalue('start_date'),
-                    end_date=self.getvalue('end_date'),
-                    debug=self.debug,
-                )
-            except NoData:
+        data = []
+        for row, io in zip(rows, ios):
+            if io is None:
                 continue
-
+            row['data'] = io
             data.append(row)
 
         self.data = data
 
+    def get_request(self):
+        request = super(StationDataIO, self).get_request()
+        # Followed by one request per element
+        request['nested'] = self.inner_io_class
+        return request
+
 
 class ElementIO(SnotelIO):
     """
@@ -219,12 +286,14 @@ class ElementIO(SnotelIO):
         }
 
 
-class DailyDataIO(SnotelIO):
+class DailyDataIO(ArrayMixin, SnotelIO):
     """
     Wrapper for getData(), used internally by StationDailyDataIO
     """
     data_function = 'getData'
 
+    text_fields = ['flag']  # For ArrayMixin
+
     # Applicable WebserviceLoader default options
     station = FilterOpt(required=True, url_param='stationTriplets')
     parameter = FilterOpt(required=True, url_param='elementCd')
@@ -246,15 +315,18 @@ class DailyDataIO(SnotelIO):
             raise NoData
         bd = data['beginDate']
         ed = data['endDate']
-        dates = fill_date_range(bd, ed, date_format='%Y-%m-%d %H:%M:%S')
+        with events.timed(self, 'fill') as info:
+            dates = fill_date_range(bd, ed, date_format='%Y-%m-%d %H:%M:%S')
+            info['rows'] = len(dates)
         vals = as_list(data['values'])
         flags = as_list(data['flags'])
 
-        self.data = [{
-            'date': date,
-            'value': val,
-            'flag': flag
-        } for date, val, flag in zip(dates, vals, flags)]
+        count = min(len(dates), len(vals), len(flags))
+        self.data = ColumnData([
+            ('date', dates[:count]),
+            ('value', vals[:count]),
+            ('flag', flags[:count]),
+        ])
 
 
 class StationDailyDataIO(StationDataIO):
@@ -327,23 +399,32 @@ class RegionDailyDataIO(StationIO):
 
     def load(self):
         super(RegionDailyDataIO, self).load()
-        for station in self.data:
-            station['data'] = flattened(
-                StationDailyDataIO,
-                station=station['stationTriplet'],
-                start_date=self.getvalue('start_date'),
-                end_date=self.getvalue('end_date'),
-                parameter=self.getvalue('parameter'),
-                debug=self.debug,
-            )
-
-
-class HourlyDataIO(TimeSeriesMapper, SnotelIO):
+        ios = self.load_nested(partial(flattened, StationDailyDataIO), [{
+            'station': station['stationTriplet'],
+            'start_date': self.getvalue('start_date'),
+            'end_date': self.getvalue('end_date'),
+            'parameter': self.getvalue('parameter'),
+            'debug': self.debug,
+        } for station in self.data])
+        for station, io in zip(self.data, ios):
+            station['data'] = io
+
+    def get_request(self):
+        request = super(RegionDailyDataIO, self).get_request()
+        request['nested'] = StationDailyDataIO
+        return request
+
+
+class HourlyDataIO(ArrayMixin, DateMapper, SnotelIO):
     """
     Wrapper for getHourlyData(), used internally by StationHourlyDataIO
     """
     data_function = 'getHourlyData'
 
+    # ArrayMixin configuration
+    date_fields = ['datetime']
+    text_fields = ['flag']
+
     # TimeSeriesMapper configuration
     date_formats = [
         '%Y-%m-%d %H:%M:%S',
@@ -0,0 +1,87 @@
+"""
+suds transports for recording and replaying SNOTEL AWDB SOAP requests (see
+climata.replay).
+
+Usage:
+
+    from climata import snotel
+    from climata.snotel.transport import ReplayTransport
+
+    snotel.set_transport(ReplayTransport('fixtures/'))
+"""
+
+import json
+from io import BytesIO
+from xml.etree import ElementTree
+from suds.transport import Transport, Reply
+from suds.transport.https import HttpAuthenticated
+from climata.replay import FixtureStore
+
+
+def get_key(store, request, method):
+    message = request.message
+    if message is not None:
+        message = normalize(message)
+    return store.key(method, str(request.url), message)
+
+
+def normalize(message):
+    """
+    suds assigns namespace prefixes in a different order from run to run, so
+    fixtures are keyed on each element's full (namespace-qualified) name and
+    text rather than on the raw XML.
+    """
+    root = ElementTree.fromstring(message)
+    return json.dumps([
+        [elem.tag, (elem.text or '').strip(), sorted(elem.attrib.items())]
+        for elem in root.iter()
+    ])
+
+
+class RecordingTransport(Transport):
+    """
+    Passes SOAP requests (and WSDL downloads) through to another suds
+    transport, saving each response to a FixtureStore.
+    """
+
+    def __init__(self, path, transport=None):
+        super(RecordingTransport, self).__init__()
+        self.transport = transport or HttpAuthenticated()
+        self.options = self.transport.options
+        self.store = FixtureStore(path)
+
+    def open(self, request):
+        body = self.transport.open(request).read()
+        self.store.save(
+            get_key(self.store, request, 'GET'), body,
+            url=str(request.url), status=200,
+        )
+        return BytesIO(body)
+
+    def send(self, request):
+        reply = self.transport.send(request)
+        self.store.save(
+            get_key(self.store, request, 'POST'), reply.message,
+            url=str(request.url), status=reply.code,
+            headers=dict(reply.headers),
+        )
+        return reply
+
+
+class ReplayTransport(Transport):
+    """
+    Returns recorded SOAP responses from a FixtureStore (raises
+    climata.replay.FixtureNotFound for unrecorded requests).
+    """
+
+    def __init__(self, path):
+        super(ReplayTransport, self).__init__()
+        self.store = FixtureStore(path)
+
+    def open(self, request):
+        body, meta = self.store.load(get_key(self.store, request, 'GET'))
+        return BytesIO(body)
+
+    def send(self, request):
+        body, meta = self.store.load(get_key(self.store, request, 'POST'))
+        return Reply(meta['status'], meta['headers'], body)
@@ -0,0 +1,106 @@
+import time
+import random
+from threading import Lock
+from collections import defaultdict
+
+# Set to False to disable rate limiting (e.g. when replaying recorded
+# responses; see climata.replay)
+ENABLED = True
+
+_limiters = {}
+_stats = defaultdict(lambda: {
+    'requests': 0,  # Requests attempted (including retries)
+    'retries': 0,  # Requests retried after a transient error
+    'waits': 0,  # Requests delayed by the rate limiter or a retry backoff
+    'wait_time': 0.0,  # Total time spent waiting (in seconds)
+})
+_lock = Lock()
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket allowing on average `rate` requests per second,
+    with bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self):
+        """
+        Wait for a token if needed, and return the time spent waiting.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+            # Reserve a token (possibly going negative, so that concurrent
+            # callers queue up behind each other)
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            wait = -self.tokens / self.rate
+
+        time.sleep(wait)
+        return wait
+
+    def restrict(self, rate, burst=1):
+        """
+        Lower the rate and/or burst if the given limits are stricter
+        """
+        with self.lock:
+            self.rate = min(self.rate, float(rate))
+            self.burst = min(self.burst, burst)
+            self.tokens = min(self.tokens, self.burst)
+
+
+def get_limiter(host, rate, burst=1):
+    """
+    Return the shared TokenBucket for host (or None if rate limiting is
+    disabled).  If IO classes for the same host request different limits,
+    the strictest rate and burst are used.
+    """
+    if rate is None or not ENABLED:
+        return None
+    with _lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(rate, burst)
+            _limiters[host] = limiter
+        elif rate < limiter.rate or burst < limiter.burst:
+            limiter.restrict(rate, burst)
+        return limiter
+
+
+def backoff(attempt, base, cap):
+    """
+    Exponential backoff with "full jitter"
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def record(host, **counts):
+    with _lock:
+        stats = _stats[host]
+        for key, val in counts.items():
+            stats[key] += val
+
+
+def get_stats():
+    """
+    Request, retry and wait counts for each host
+    """
+    with _lock:
+        return {host: stats.copy() for host, stats in _stats.items()}
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
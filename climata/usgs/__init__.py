@@ -1,5 +1,7 @@
-from wq.io import NetLoader, TupleMapper, BaseIO
-from climata.base import WebserviceLoader, FilterOpt, DateOpt, ChoiceOpt
+from wq.io import TupleMapper, BaseIO
+from climata.base import (
+    HttpLoader, WebserviceLoader, FilterOpt, DateOpt, ChoiceOpt
+)
 from climata.parsers import RdbParser, WaterMlParser
 from .constants import SITE_TYPES
 
@@ -32,6 +34,10 @@ class NwisLoader(WebserviceLoader):
     # Each NWIS webservice uses the same base URL, with a service path
     service = None
 
+    # Avoid overloading NWIS with parallel requests
+    rate_limit = 10
+    rate_burst = 10
+
     @property
     def url(self):
         return "http://waterservices.usgs.gov/nwis/%s/" % self.service
@@ -43,12 +49,25 @@ class NwisWaterMlIO(NwisLoader, WaterMlParser, TupleMapper, BaseIO):
     DailyValuesIO or InstantValuesIO instead depending on your needs.
     """
 
-    default_params = {
-        'format': 'waterml,1.1',
-    }
+    # NWIS limits the number of sites and basins per request
+    basin = FilterOpt(url_param='huc', multi=True, chunk=10)
+    station = FilterOpt(url_param='site', multi=True, chunk=100)
 
+    # Both formats are parsed incrementally from the raw response bytes
+    binary = True
 
-class ParameterIO(NetLoader, RdbParser, TupleMapper, BaseIO):
+    # Response format (the JSON rendering is generally faster to parse)
+    format = ChoiceOpt(
+        default='waterml,1.1',
+        choices=['waterml,1.1', 'json'],
+    )
+
+    @property
+    def use_json(self):
+        return self.getvalue('format') == 'json'
+
+
+class ParameterIO(HttpLoader, RdbParser, TupleMapper, BaseIO):
     """
     Base class for loading USGS NWIS parameter code definitions.  Use
     FixedParameterIO or NumericParameterIO instead depending on your needs.
@@ -84,7 +103,7 @@ class SiteIO(NwisLoader, RdbParser, TupleMapper, BaseIO):
 
 class DailyValueIO(NwisWaterMlIO):
     """
-    Load USGS daily values from NWIS webservices (via WaterML format).
+    Load USGS daily values from NWIS webservices (via WaterML or JSON).
 
     Usage:
 
@@ -94,6 +113,9 @@ class DailyValueIO(NwisWaterMlIO):
             print dval.site_code, dval.variable_code
             for row in dval.data:
                 print row.date, row.value
+
+    Pass format='json' to use the NWIS JSON rendering instead of WaterML
+    (the items are the same, but the JSON is generally faster to parse).
     """
 
     service = 'dv'
@@ -101,7 +123,7 @@ class DailyValueIO(NwisWaterMlIO):
 
 class InstantValueIO(NwisWaterMlIO):
     """
-    Load USGS instant values from NWIS webservices (via WaterML format).
+    Load USGS instant values from NWIS webservices (via WaterML or JSON).
 
     Usage:
 
@@ -111,10 +133,16 @@ class InstantValueIO(NwisWaterMlIO):
             print ival.site_code, ival.variable_code
             for row in ival.data:
                 print row.date, row.value
+
+    Pass format='json' to use the NWIS JSON rendering instead of WaterML
+    (the items are the same, but the JSON is generally faster to parse).
     """
 
     service = 'iv'
 
+    # Recent instant values are updated frequently
+    cache_ttl = 15 * 60
+
 
 # Preset classes for USGS waterdata code definitions
 
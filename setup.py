@@ -41,23 +41,26 @@ setup(
     author_email='gis@houstoneng.com',
     url='https://github.com/heigeo/climata',
     license='MIT',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     description=DESCRIPTION,
     long_description=long_description(),
+    python_requires='>=3.5',
     install_requires=[
         'wq.io>=0.7.0',
-        'owslib>=0.9',
+        'python-dateutil',
         "suds-jurko",
     ],
+    extras_require={
+        'numpy': ['numpy'],
+        'arrow': ['numpy', 'pyarrow'],
+    },
     scripts=['climata/bin/acis_sites.py', 'climata/bin/acis_data.py'],
     classifiers=[
         'Development Status :: 4 - Beta',
         'Environment :: Web Environment',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
+        'Programming Language :: Python :: 3 :: Only',
         'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
         'Natural Language :: English',
@@ -1,4 +1,5 @@
 import unittest
+from io import BytesIO
 
 
 class ClimataTestCase(unittest.TestCase):
@@ -10,3 +11,67 @@ class ClimataTestCase(unittest.TestCase):
                 hasattr(item, field),
                 "%s missing %s field" % (type(item).__name__, field)
             )
+
+
+class FakeResponse(object):
+    """
+    Minimal stand-in for requests.Response
+    """
+
+    def __init__(self, status_code, content=b'', headers={}):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode('utf-8', 'replace')
+        self.headers = headers
+        self.encoding = 'utf-8'
+        self.raw = BytesIO(content)
+
+    def close(self):
+        self.raw.close()
+
+
+class FakeClient(object):
+    """
+    Minimal stand-in for requests.Session, returning canned responses
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+    def close(self):
+        pass
+
+
+HYDROMET_CSV = """<HTML><BODY><PRE>
+BEGIN DATA
+      DATE,  %s QD
+07/01/2014,   123.45
+07/02/2014,   150.00
+END DATA
+</PRE></BODY></HTML>
+"""
+
+
+class HydrometClient(FakeClient):
+    """
+    Returns Hydromet CSV data for the requested station
+    """
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(url)
+        station = url.split('parameter=')[1].split('+')[0]
+        return FakeResponse(200, (HYDROMET_CSV % station).encode('utf-8'))
+
+
+RDB = """# Synthetic RDB file
+#
+agency_cd\tsite_no\tdec_lat_va\tbegin_date\tcount_nu\tnote
+5s\t15s\t16n\t20d\t5n\t10n
+USGS\t05331000\t44.9444\t1950-10-01\t24000\t
+USGS\t05331580\t\t\t12\tn/a
+"""
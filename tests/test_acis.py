@@ -1,10 +1,409 @@
-from .base import ClimataTestCase
-from climata.acis import StationMetaIO, StationDataIO
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+from io import StringIO
+from unittest import mock
+from .base import ClimataTestCase, FakeResponse, FakeClient
+from climata.acis import StationMetaIO, StationDataIO, GridDataIO
+from climata.acis.catalog import StationCatalog, ELEMS
+from climata import throttle
+from climata.session import get_session, set_session
+from climata.bin import acis_data, acis_sites
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+def multistndata(*stations):
+    return FakeResponse(200, json.dumps({'data': [{
+        'meta': {'uid': uid, 'name': 'Station %s' % uid, 'll': [-93, 45]},
+        'data': data,
+    } for uid, data in enumerate(stations)]}).encode('utf-8'))
+
+
+class YearClient(FakeClient):
+    """
+    Returns station metadata for one station (uid 1) and a year of pcpn
+    values for each MultiStnData request, with earlier years taking longer
+    to load.
+    """
+
+    def __init__(self):
+        super(YearClient, self).__init__()
+        self.years = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(kwargs)
+        params = kwargs['params']
+        site = (1, [-93.5, 45.0], ['1950-01-01', '2014-12-31'])
+        if url.endswith('StnMeta'):
+            return stnmeta(site, ranges='elems' in params)
+        year = int(params['sdate'][:4])
+        time.sleep((2014 - year) * 0.1)
+        self.years.append(year)
+        days = (date(year, 12, 31) - date(year, 1, 1)).days + 1
+        values = ['T', 'M'] + ['0.%s' % str(year)[2:]] * (days - 2)
+        return FakeResponse(200, json.dumps({'data': [{
+            'meta': {'uid': 1, 'name': 'Station 1', 'll': [-93.5, 45.0]},
+            'data': [[value] for value in values],
+        }]}).encode('utf-8'))
+
+
+def griddata(west, east, *days):
+    lon = list(range(west, east + 1))
+    lat = [46, 45]
+    return FakeResponse(200, json.dumps({
+        'meta': {
+            'lat': [[y] * len(lon) for y in lat],
+            'lon': [lon for y in lat],
+        },
+        'data': [
+            [day, [[value] * len(lon) for y in lat]] for day, value in days
+        ],
+    }).encode('utf-8'))
+
+
+def stnmeta(*sites, **kwargs):
+    # Set ranges=False to mimic requests without elems
+    ranges = kwargs.get('ranges', True)
+    meta = []
+    for uid, ll, pcpn in sites:
+        site = {
+            'uid': uid,
+            'name': 'Station %s' % uid,
+            'state': 'MN',
+            'sids': ['2100%s 2' % uid, 'ST%s 7' % uid],
+            'll': ll,
+        }
+        if ranges:
+            site['valid_daterange'] = [
+                pcpn if elem == 'pcpn' else [] for elem in ELEMS
+            ]
+        meta.append(site)
+    return FakeResponse(200, json.dumps({'meta': meta}).encode('utf-8'))
 
 
 class AcisTestCase(ClimataTestCase):
     module = "acis"
 
+    def load_data(self, *responses, **kwargs):
+        options = dict(
+            state='MN',
+            start_date='2014-07-01',
+            end_date='2014-07-02',
+            parameter=['pcpn', 'maxt'],
+        )
+        options.update(kwargs)
+        set_session(FakeClient(*responses))
+        try:
+            return StationDataIO(**options)
+        finally:
+            set_session(None)
+
+    def test_shared_dates(self):
+        data = self.load_data(multistndata(
+            [['0.10', 'M'], ['T', '75']],
+            [['0.20', '80'], ['0.00', '81']],
+        ))
+        self.assertEqual(len(data), 2)
+
+        # Every station shares the same date axis
+        self.assertIs(data[0].data.dates, data[1].data.dates)
+        self.assertEqual(len(data[1].data), 2)
+        row = data[1].data[1]
+        self.assertEqual(row.date, date(2014, 7, 2))
+        self.assertEqual(row.maxt, 81)
+
+    def test_chunks_meta(self):
+        # Split requests always include uid, even if not requested
+        set_session(FakeClient(*[multistndata([['0.10']]) for i in range(3)]))
+        try:
+            data = StationDataIO(
+                state='MN',
+                start_date='1990-01-01',
+                end_date='2014-12-31',
+                parameter='pcpn',
+                meta=['name'],
+            )
+            requests = get_session().requests
+        finally:
+            set_session(None)
+        self.assertEqual(len(requests), 3)
+        for req in requests:
+            self.assertEqual(req['params']['meta'], 'name,uid')
+        self.assertEqual(len(data), 1)
+        self.assertNotIn('uid', data.get_field_names())
+        self.assertEqual(data[0].name, 'Station 0')
+        self.assertFalse(hasattr(data[0], 'uid'))
+
+    def test_add(self):
+        data = self.load_data(multistndata(
+            [[['0.10', 'A'], ['M', '']], [['T', ''], ['75', '']]],
+        ), add='f')
+        rows = list(data[0].data)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            [(row.date.day, row.elem, row.value, row.f) for row in rows],
+            [
+                (1, 'pcpn', 0.1, 'A'),
+                (1, 'maxt', 'M', ''),
+                (2, 'pcpn', 'T', ''),
+                (2, 'maxt', 75, ''),
+            ]
+        )
+
+    def test_decoded(self):
+        data = self.load_data(multistndata(
+            [['0.10', 'M'], ['T', '75'], ['S', '76'], ['0.50A', '77']],
+        ), end_date='2014-07-04', decoded=True)
+        rows = list(data[0].data)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[3].date, date(2014, 7, 4))
+        self.assertEqual(rows[1].pcpn, 0)
+        self.assertTrue(math.isnan(rows[2].pcpn))
+        self.assertEqual(rows[3].pcpn, 0.5)
+        self.assertTrue(math.isnan(rows[0].maxt))
+
+        pcpn = data[0].data.data.column('pcpn')
+        self.assertEqual(pcpn.mask('trace'), [False, True, False, False])
+        self.assertEqual(pcpn.mask('subsequent'), [False, False, True, False])
+        self.assertEqual(pcpn.mask('accumulated'), [False, False, False, True])
+        self.assertEqual(
+            data[0].data.data.column('maxt').mask('missing'),
+            [True, False, False, False]
+        )
+
+    def test_decoded_add(self):
+        data = self.load_data(multistndata(
+            [[['0.10', 'A'], ['M', '']], [['T', ''], ['75', '']]],
+        ), add='f', decoded=True)
+        rows = list(data[0].data)
+        self.assertEqual(
+            [(row.date.day, row.elem, row.value, row.f) for row in rows[1:]],
+            [
+                (1, 'maxt', rows[1].value, ''),
+                (2, 'pcpn', 0, ''),
+                (2, 'maxt', 75, ''),
+            ]
+        )
+        self.assertTrue(math.isnan(rows[1].value))
+
+    @unittest.skipUnless(np, "numpy not installed")
+    def test_decoded_numpy(self):
+        data = self.load_data(multistndata(
+            [['0.10', 'M'], ['T', '75']],
+        ), decoded=True)
+        arrays = data[0].data.to_numpy()
+        self.assertEqual(list(arrays), [
+            'date',
+            'pcpn', 'pcpn_missing', 'pcpn_trace', 'pcpn_subsequent',
+            'pcpn_accumulated',
+            'maxt', 'maxt_missing', 'maxt_trace', 'maxt_subsequent',
+            'maxt_accumulated',
+        ])
+        self.assertEqual(arrays['pcpn'].tolist(), [0.1, 0])
+        self.assertEqual(arrays['pcpn_trace'].tolist(), [False, True])
+        self.assertEqual(arrays['maxt'].tolist(), [None, 75])
+
+    @unittest.skipUnless(np, "numpy not installed")
+    def test_grid_data(self):
+        set_session(FakeClient(
+            griddata(-94, -92, ('2014-07-01', 1), ('2014-07-02', -999)),
+            griddata(-92, -91, ('2014-07-01', 2), ('2014-07-02', 3)),
+        ))
+        try:
+            data = GridDataIO(
+                bbox='-94,45,-91,46',
+                start_date='2014-07-01',
+                end_date='2014-07-02',
+                parameter='pcpn',
+                memmap=True,
+            )
+            requests = get_session().requests
+        finally:
+            set_session(None)
+
+        # Tiles are requested separately and merged by coordinate
+        self.assertEqual(
+            [req['params']['bbox'] for req in requests],
+            ['-94.0,45.0,-92.0,46.0', '-92.0,45.0,-91.0,46.0'],
+        )
+        arrays = data.to_numpy()
+        self.assertEqual(arrays['lat'].tolist(), [46, 45])
+        self.assertEqual(arrays['lon'].tolist(), [-94, -93, -92, -91])
+        self.assertEqual(arrays['pcpn'].shape, (2, 2, 4))
+        self.assertEqual(arrays['pcpn'][0, 0].tolist(), [1, 1, 2, 2])
+        self.assertTrue(np.isnan(arrays['pcpn'][1, 0, :2]).all())
+        self.assertEqual(data[1].date, date(2014, 7, 2))
+        self.assertEqual(data[1].pcpn.shape, (2, 4))
+
+    def test_catalog(self):
+        catalog = StationCatalog(':memory:')
+        set_session(FakeClient(
+            stnmeta(
+                (1, [-93.5, 45.0], ['1950-01-01', '2014-12-31']),
+                (2, [-92.5, 46.5], ['2000-01-01', '2014-12-31']),
+            ),
+            stnmeta(
+                (1, [-93.5, 45.0], None),
+                (2, [-92.5, 46.5], None),
+                (3, [-94.5, 44.0], None),
+                ranges=False,
+            ),
+            stnmeta(
+                (1, [-93.5, 45.0], ['1950-01-01', '2014-12-31']),
+            ),
+            stnmeta((1, [-93.5, 45.0], None), ranges=False),
+        ))
+        try:
+            self.assertEqual(catalog.update(basin='07010206'), 1)
+            # Fresh regions are not reloaded
+            self.assertEqual(catalog.update(basin=['07010206']), 0)
+
+            self.assertEqual(
+                [site.uid for site in catalog.search(basin='07010206')],
+                [1, 2, 3]
+            )
+            self.assertEqual(
+                [site.uid for site in catalog.search(bbox='-95,43,-94,45')],
+                [3]
+            )
+            sites = catalog.search(
+                bbox='-94,44.5,-92,47', elem='pcpn', min_years=30
+            )
+            self.assertEqual([site.uid for site in sites], [1])
+            self.assertEqual(sites[0].sids, {'COOP': '21001', 'NWSLI': 'ST1'})
+            self.assertEqual(
+                sites[0].valid_daterange['pcpn'][0].date(), date(1950, 1, 1)
+            )
+            self.assertEqual(sites[0].valid_daterange['snow'], (None, None))
+            self.assertEqual(
+                len(catalog.search(elem='pcpn', start_date='2001-01-01')), 2
+            )
+            self.assertEqual(catalog.find('COOP', '21002').uid, 2)
+            self.assertEqual(catalog.get(3).longitude, -94.5)
+
+            # Stations without data are stored but not matched by elem
+            self.assertTrue(catalog.get(1).has_data)
+            self.assertFalse(catalog.get(3).has_data)
+            self.assertEqual(len(catalog.search(elem='pcpn')), 2)
+
+            # Stale regions are reloaded, dropping stations no longer listed
+            catalog.max_age = 0
+            self.assertEqual(catalog.update(basin='07010206'), 1)
+            self.assertEqual(
+                [site.uid for site in catalog.search(basin='07010206')], [1]
+            )
+        finally:
+            set_session(None)
+            catalog.close()
+
+    def test_sites_output(self):
+        set_session(FakeClient(
+            stnmeta(
+                (1, [-93.5, 45.0], ['1950-01-01', '2014-12-31']),
+                (2, [-92.5, 46.5], ['2000-01-01', '2014-12-31']),
+            ),
+            stnmeta(
+                (1, [-93.5, 45.0], None),
+                (2, [-92.5, 46.5], None),
+                (3, [-94.5, 44.0], None),
+                ranges=False,
+            ),
+        ))
+        folder = tempfile.mkdtemp()
+        path = os.path.join(folder, 'acis.sqlite3')
+        output = StringIO()
+        try:
+            with mock.patch.object(acis_sites, 'DEFAULT_PATH', path):
+                with redirect_stdout(output):
+                    acis_sites.load_sites('07010206')
+        finally:
+            set_session(None)
+            shutil.rmtree(folder)
+
+        # Same rows as before the catalog (including the station without
+        # data, which is only returned without elems)
+        header, *rows = output.getvalue().splitlines()
+        self.assertTrue(header.startswith(
+            'ACIS uid,name,COOP,NWSLI,latitude,longitude,start,end,years,'
+        ))
+        self.assertEqual(rows, [
+            '1,Station 1,21001,ST1,45.0,-93.5,1950-01-01,2014-12-31,65,'
+            + ',' * 8 + 'period,,',
+            '2,Station 2,21002,ST2,46.5,-92.5,2000-01-01,2014-12-31,15,'
+            + ',' * 8 + 'period,,',
+            '3,Station 3,21003,ST3,44.0,-94.5,NO DATA',
+        ])
+
+    def load_years(self, output):
+        client = YearClient()
+        set_session(client)
+        throttle.ENABLED = False
+        folder = tempfile.mkdtemp()
+        path = os.path.join(folder, 'acis.sqlite3')
+        output = os.path.join(folder, output)
+        try:
+            with mock.patch.object(acis_data, 'DEFAULT_PATH', path):
+                acis_data.load_data(
+                    '07010206', 'pcpn', 2011, 2014, years=1, output=output
+                )
+            # Later years are loaded first, but written in order
+            self.assertEqual(client.years, [2014, 2013, 2012, 2011])
+            if output.endswith('.parquet'):
+                return pq.read_table(output)
+            with open(output) as f:
+                return f.read().splitlines()
+        finally:
+            set_session(None)
+            throttle.ENABLED = True
+            shutil.rmtree(folder)
+
+    def test_data_csv(self):
+        lines = self.load_years('data.csv')
+        self.assertEqual(lines[:2], ['name:,Station 1', 'COOP:,21001'])
+        rows = [line.split(',') for line in lines[5:]]
+        self.assertEqual(len(rows), 365 * 3 + 366)
+        self.assertEqual(
+            [row[0] for row in rows],
+            sorted(row[0] for row in rows),
+        )
+        self.assertEqual(rows[0], ['2011-01-01', 'T'])
+        self.assertEqual(rows[1], ['2011-01-02', 'M'])
+        self.assertEqual(rows[2], ['2011-01-03', '0.11'])
+        self.assertEqual(rows[-1], ['2014-12-31', '0.14'])
+
+    @unittest.skipUnless(pq, "pyarrow not installed")
+    def test_data_parquet(self):
+        table = self.load_years('data.parquet')
+        self.assertEqual(table.column_names, ['date', '1', '1_trace'])
+        self.assertEqual(table.num_rows, 365 * 3 + 366)
+        dates = table.column('date').to_pylist()
+        self.assertEqual(dates[0], date(2011, 1, 1))
+        self.assertEqual(dates, sorted(dates))
+
+        # Missing values are null and traces are 0 (and flagged)
+        values = table.column('1').to_pylist()
+        self.assertEqual(values[:3], [0, None, 0.11])
+        self.assertEqual(values[-365:-362], [0, None, 0.14])
+        self.assertEqual(values.count(None), 4)
+        trace = table.column('1_trace').to_pylist()
+        self.assertEqual(trace[:3], [True, False, False])
+        self.assertEqual(trace.count(True), 4)
+
     def test_station_meta(self):
         data = StationMetaIO(
             county='27053',
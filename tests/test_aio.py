@@ -0,0 +1,46 @@
+import asyncio
+from .base import ClimataTestCase, HydrometClient
+from climata.session import set_session
+from climata.hydromet import DailyDataIO, MultiStationDailyIO
+
+
+class AsyncTestCase(ClimataTestCase):
+    module = "aio"
+
+    def setUp(self):
+        self.client = HydrometClient()
+        set_session(self.client)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        set_session(None)
+        self.loop.close()
+
+    def test_aload(self):
+        data = self.loop.run_until_complete(DailyDataIO.aload(
+            station='ACAO',
+            parameter='QD',
+            start_date='2014-07-01',
+            end_date='2014-07-02',
+        ))
+        self.assertEqual(len(data), 2)
+        self.assertHasFields(data[0], ("date", "qd"))
+
+    def test_aload_nested(self):
+        stations = ['ACAO', 'HPD', 'KFLO', 'ABEI']
+        data = self.loop.run_until_complete(MultiStationDailyIO.aload(
+            station=stations,
+            parameter='QD',
+            start_date='2014-07-01',
+            end_date='2014-07-02',
+            concurrency=2,
+        ))
+        self.assertEqual(len(self.client.requests), 4)
+        self.assertEqual([site.station for site in data], stations)
+        for site in data:
+            self.assertEqual(len(site.data), 2)
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(DailyDataIO.aload(station='ACAO'))
+        self.assertEqual(len(self.client.requests), 0)
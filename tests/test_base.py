@@ -0,0 +1,368 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from datetime import date, timedelta
+from .base import (
+    ClimataTestCase, FakeResponse, FakeClient, HydrometClient, RDB
+)
+from climata.session import get_session, set_session
+from climata.usgs import SiteIO
+from climata.columns import ColumnData
+from climata.acis import StationDataIO, StationMetaIO
+from climata.hydromet import DailyDataIO, MultiStationDailyIO
+from climata.base import parse_date
+from climata import throttle, events
+from wq.io.exceptions import LoadFailed
+
+
+class AcisClient(FakeClient):
+    """
+    Generates MultiStnData responses with one station per basin, plus an
+    extra station in the last basin that only has data from 2010 on.
+    """
+
+    def request(self, method, url, params=None, **kwargs):
+        self.requests.append(params)
+        start = parse_date(params['sdate']).date()
+        end = parse_date(params['edate']).date()
+        days = (end - start).days + 1
+        stations = [{
+            'meta': {'uid': int(basin), 'name': basin, 'll': [-93, 45]},
+            'data': [[str((start + timedelta(i)).year)] for i in range(days)],
+        } for basin in params['basin'].split(',')]
+        if end.year >= 2010 and '07010011' in params['basin']:
+            stations.append({
+                'meta': {'uid': 0, 'name': 'new', 'll': [-93, 45]},
+                'data': [['1'] for i in range(days)],
+            })
+        body = json.dumps({'data': stations})
+        return FakeResponse(200, body.encode('utf-8'))
+
+
+class WebserviceTestCase(ClimataTestCase):
+    module = "base"
+
+    def setUp(self):
+        self.client = AcisClient()
+        set_session(self.client)
+
+    def tearDown(self):
+        set_session(None)
+
+    def test_split(self):
+        basins = ['0701%04d' % i for i in range(12)]
+        data = StationDataIO(
+            basin=basins,
+            parameter='pcpn',
+            start_date='1990-01-01',
+            end_date='2014-12-31',
+        )
+
+        # 3 basin chunks x 3 date chunks
+        self.assertEqual(len(self.client.requests), 9)
+        self.assertEqual(len(data), 13)
+        self.assertEqual(
+            [site.uid for site in data],
+            [int(basin) for basin in basins] + [0]
+        )
+
+        # Time series should be complete and in order
+        days = (date(2014, 12, 31) - date(1990, 1, 1)).days + 1
+        site = data[0]
+        self.assertEqual(len(site.data), days)
+        self.assertEqual(site.data[0].date, date(1990, 1, 1))
+        self.assertEqual(site.data[0].pcpn, 1990)
+        self.assertEqual(site.data[-1].date, date(2014, 12, 31))
+        self.assertEqual(site.data[-1].pcpn, 2014)
+
+        # Periods without data should be filled in
+        site = data[-1]
+        self.assertEqual(len(site.data), days)
+        self.assertEqual(site.data[0].pcpn, 'M')
+        self.assertEqual(site.data[-1].pcpn, 1)
+
+    def test_no_split(self):
+        StationDataIO(
+            basin='07010000',
+            parameter='pcpn',
+            start_date='2014-01-01',
+            end_date='2014-12-31',
+        )
+        self.assertEqual(len(self.client.requests), 1)
+
+    def test_stream(self):
+        sites = StationDataIO.stream(
+            basin=['07010000', '07010011'],
+            parameter='pcpn',
+            start_date='2014-01-01',
+            end_date='2014-12-31',
+        )
+        uids = []
+        for site in sites:
+            self.assertHasFields(site, ("latitude", "longitude", "data"))
+            self.assertEqual(len(site.data), 365)
+            uids.append(site.uid)
+        self.assertEqual(uids, [7010000, 7010011, 0])
+
+
+class ThrottleTestCase(ClimataTestCase):
+    module = "base"
+
+    def setUp(self):
+        throttle.reset_stats()
+
+    def tearDown(self):
+        set_session(None)
+
+    def load(self, *responses):
+        set_session(FakeClient(*responses))
+        return StationMetaIO(basin='07010000', retry_backoff=0)
+
+    def test_retry(self):
+        data = self.load(
+            FakeResponse(503),
+            FakeResponse(500),
+            FakeResponse(200, b'{"meta": [{"uid": 1}]}'),
+        )
+        self.assertEqual(len(data), 1)
+        stats = throttle.get_stats()['data.rcc-acis.org']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['retries'], 2)
+
+    def test_retry_close(self):
+        # Responses are closed before retrying
+        responses = [FakeResponse(503), FakeResponse(500)]
+        self.load(*responses + [FakeResponse(200, b'{"meta": [{"uid": 1}]}')])
+        self.assertTrue(all(resp.raw.closed for resp in responses))
+
+    def test_retry_limit(self):
+        with self.assertRaises(LoadFailed):
+            self.load(*[FakeResponse(503) for i in range(4)])
+        stats = throttle.get_stats()['data.rcc-acis.org']
+        self.assertEqual(stats['requests'], 4)
+
+    def test_no_retry(self):
+        with self.assertRaises(LoadFailed):
+            self.load(FakeResponse(404), FakeResponse(200))
+        stats = throttle.get_stats()['data.rcc-acis.org']
+        self.assertEqual(stats['retries'], 0)
+
+    def test_rate_limit(self):
+        bucket = throttle.TokenBucket(rate=100, burst=2)
+        waits = [bucket.acquire() for i in range(4)]
+        self.assertEqual(waits[:2], [0, 0])
+        self.assertGreater(waits[2], 0)
+        self.assertLessEqual(waits[3], 0.02)
+
+    def test_shared_limiter(self):
+        limiter = throttle.get_limiter('example.com', 10, burst=5)
+        self.assertIs(throttle.get_limiter('example.com', 20), limiter)
+        self.assertEqual((limiter.rate, limiter.burst), (10, 1))
+        self.assertIs(throttle.get_limiter('example.com', 2, 5), limiter)
+        self.assertEqual((limiter.rate, limiter.burst), (2, 1))
+
+
+class FilterOptTestCase(ClimataTestCase):
+    module = "base"
+
+    def test_schema(self):
+        options = StationDataIO.get_filter_options()
+        self.assertIs(options, StationDataIO._filter_options)
+        self.assertEqual(options['start_date'].name, 'start_date')
+        self.assertEqual(StationDataIO._url_params['start_date'], 'sdate')
+        self.assertEqual(list(options), sorted(options))
+
+    def test_request_key(self):
+        def make(**kwargs):
+            io = StationMetaIO.__new__(StationMetaIO)
+            io.set_options(**kwargs)
+            return io
+
+        key = make(basin='07010000', parameter='pcpn').request_key
+        self.assertEqual(
+            key, make(parameter='pcpn', basin='07010000').request_key
+        )
+        self.assertNotEqual(
+            key, make(basin='07010001', parameter='pcpn').request_key
+        )
+
+
+class SlowClient(FakeClient):
+    def request(self, method, url, params=None, **kwargs):
+        self.requests.append(params)
+        time.sleep(0.2)
+        return FakeResponse(200, b'{"meta": [{"uid": 1}, {"uid": 2}]}')
+
+
+class SlowRdbClient(FakeClient):
+    def request(self, method, url, params=None, **kwargs):
+        self.requests.append(params)
+        time.sleep(0.2)
+        return FakeResponse(200, RDB.encode('utf-8'))
+
+
+class CoalesceTestCase(ClimataTestCase):
+    module = "base"
+
+    def setUp(self):
+        self.client = SlowClient()
+        set_session(self.client)
+
+    def tearDown(self):
+        set_session(None)
+
+    def load(self, basins):
+        barrier = Barrier(len(basins))
+
+        def create(basin):
+            barrier.wait()
+            return StationMetaIO(basin=basin)
+
+        with ThreadPoolExecutor(len(basins)) as executor:
+            return list(executor.map(create, basins))
+
+    def test_coalesce(self):
+        ios = self.load(['07010000'] * 4)
+        self.assertEqual(len(self.client.requests), 1)
+        for io in ios:
+            self.assertEqual([site.uid for site in io], [1, 2])
+        ios[0].data.pop()
+        self.assertEqual(len(ios[1]), 2)
+
+    def test_coalesce_options(self):
+        # Options that change parsing are not shared between requests
+        set_session(SlowRdbClient())
+        barrier = Barrier(4)
+
+        def create(columnar):
+            barrier.wait()
+            return SiteIO(state='MN', columnar=columnar)
+
+        with ThreadPoolExecutor(4) as executor:
+            ios = list(executor.map(create, [True, False, True, False]))
+        self.assertEqual(len(get_session().requests), 2)
+        for io, columnar in zip(ios, [True, False, True, False]):
+            self.assertEqual(isinstance(io.data, ColumnData), columnar)
+            self.assertEqual(io[0].site_no, '05331000')
+
+    def test_no_coalesce(self):
+        self.load(['07010000', '07010001'])
+        self.assertEqual(len(self.client.requests), 2)
+
+
+class EventsTestCase(ClimataTestCase):
+    module = "base"
+
+    def setUp(self):
+        self.events = []
+        events.register(self.events.append)
+        self.body = b'{"meta": [{"uid": 1}, {"uid": 2}]}'
+        set_session(FakeClient(
+            FakeResponse(503), FakeResponse(200, self.body)
+        ))
+
+    def tearDown(self):
+        events.unregister(self.events.append)
+        set_session(None)
+
+    def test_events(self):
+        data = StationMetaIO(basin='07010000', retry_backoff=0)
+        list(data)
+        self.assertEqual([event['event'] for event in self.events], [
+            'request_start', 'request_end',
+            'request_start', 'request_end',
+            'response', 'load', 'parse', 'map',
+        ])
+        for event in self.events:
+            self.assertEqual(event['io'], 'StationMetaIO')
+            self.assertEqual(event['key'], data.request_key)
+
+        first, retry = self.events[1], self.events[3]
+        response, load, parse, map = self.events[4:]
+        self.assertEqual(first['status'], 503)
+        self.assertIn('error', first)
+        self.assertEqual(retry['status'], 200)
+        self.assertEqual(retry['attempt'], 1)
+        self.assertEqual(response['bytes'], len(self.body))
+        self.assertGreaterEqual(load['elapsed'], 0)
+        self.assertEqual(parse['rows'], 2)
+        self.assertEqual(map['rows'], 2)
+
+    def test_nested_events(self):
+        set_session(AcisClient())
+        data = StationDataIO(
+            basin='07010000', parameter='pcpn',
+            start_date='2014-07-01', end_date='2014-07-10',
+        )
+        for site in data:
+            list(site.data)
+        maps = [event for event in self.events if event['event'] == 'map']
+        self.assertEqual(
+            [(event['io'], event['rows']) for event in maps],
+            [('DataIO', 10), ('StationDataIO', 1)]
+        )
+        self.assertIsNone(maps[0]['key'])
+
+
+class LazyTestCase(ClimataTestCase):
+    module = "base"
+
+    def setUp(self):
+        self.client = AcisClient()
+        set_session(self.client)
+
+    def tearDown(self):
+        set_session(None)
+
+    def test_lazy(self):
+        data = StationDataIO(
+            basin='07010000',
+            parameter='pcpn',
+            start_date='2014-01-01',
+            end_date='2014-01-31',
+            lazy=True,
+        )
+        self.assertEqual(len(self.client.requests), 0)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(len(self.client.requests), 1)
+        self.assertEqual(len(data[0].data), 31)
+        self.assertEqual(len(self.client.requests), 1)
+
+    def test_lazy_validation(self):
+        with self.assertRaises(ValueError):
+            StationDataIO(basin='07010000', parameter='pcpn', lazy=True)
+
+    def test_plan(self):
+        data = StationDataIO(
+            basin=['0701%04d' % i for i in range(12)],
+            parameter='pcpn',
+            start_date='1990-01-01',
+            end_date='2014-12-31',
+            lazy=True,
+        )
+        plan = data.plan()
+        self.assertEqual(len(plan), 9)
+        self.assertEqual(len(set(request['key'] for request in plan)), 9)
+        self.assertEqual(plan[0]['params']['sdate'], '1990-01-01')
+        self.assertEqual(plan[0]['io'], StationDataIO)
+        self.assertEqual(len(self.client.requests), 0)
+
+    def test_plan_nested(self):
+        stations = ['ACAO', 'HPD']
+        self.client = HydrometClient()
+        set_session(self.client)
+        data = MultiStationDailyIO(
+            station=stations,
+            parameter='QD',
+            start_date='2014-07-01',
+            end_date='2014-07-02',
+            lazy=True,
+        )
+        plan = data.plan()
+        self.assertEqual(
+            [request['io'] for request in plan], [DailyDataIO] * 2
+        )
+        self.assertEqual(len(self.client.requests), 0)
+        self.assertEqual([site.station for site in data], stations)
+        self.assertEqual(len(self.client.requests), 2)
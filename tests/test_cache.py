@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+from .base import ClimataTestCase, FakeResponse, FakeClient
+from climata.cache import ResponseCache, CacheEntry, set_cache, make_key
+from climata.session import set_session
+from climata.base import WebserviceLoader, DateOpt
+from wq.io import JsonParser, BaseIO
+from wq.io.exceptions import ParseFailed
+
+
+class CachedIO(WebserviceLoader, JsonParser, BaseIO):
+    url = "http://example.com/data"
+    start_date = DateOpt(url_param='sdate')
+    end_date = DateOpt(url_param='edate')
+    cache_ttl = 0
+
+
+class CacheTestCase(ClimataTestCase):
+    module = "cache"
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.path, max_size=10)
+
+    def tearDown(self):
+        set_cache(None)
+        set_session(None)
+        shutil.rmtree(self.path)
+
+    def test_key(self):
+        key1 = make_key('http://example.com', {'a': 1, 'b': 2})
+        key2 = make_key('http://example.com', {'b': 2, 'a': 1})
+        key3 = make_key('http://example.com', {'a': 2, 'b': 2})
+        self.assertEqual(key1, key2)
+        self.assertNotEqual(key1, key3)
+
+    def test_get_set(self):
+        self.cache.set('test', CacheEntry(b'data', ttl=None, etag='"abc"'))
+        entry = self.cache.get('test')
+        self.assertEqual(entry.body, b'data')
+        self.assertTrue(entry.fresh)
+        self.assertEqual(
+            entry.revalidation_headers, {'If-None-Match': '"abc"'}
+        )
+        self.assertIsNone(self.cache.get('missing'))
+
+    def test_expired(self):
+        self.cache.set('test', CacheEntry(b'data', ttl=60, stored=0))
+        entry = self.cache.get('test')
+        self.assertFalse(entry.fresh)
+        self.cache.refresh('test', entry)
+        self.assertTrue(self.cache.get('test').fresh)
+
+    def test_lru(self):
+        self.cache.set('first', CacheEntry(b'12345'))
+        self.cache.set('second', CacheEntry(b'12345'))
+        os.utime(self.cache.body_path('first'), (100, 100))
+        os.utime(self.cache.body_path('second'), (50, 50))
+
+        # Entry 'second' was least recently used and should be removed
+        self.cache.set('third', CacheEntry(b'12345'))
+        self.assertIsNotNone(self.cache.get('first'))
+        self.assertIsNone(self.cache.get('second'))
+        self.assertIsNotNone(self.cache.get('third'))
+
+    def test_loader(self):
+        set_cache(self.cache)
+        self.cache.max_size = None
+        client = FakeClient(
+            FakeResponse(200, b'[{"id": 1}]', {'ETag': '"v1"'}),
+            FakeResponse(304),
+            FakeResponse(200, b'[{"id": 2}]'),
+        )
+        set_session(client)
+
+        # Recent data should be revalidated (since cache_ttl = 0)
+        for i in range(2):
+            io = CachedIO(start_date='2000-01-01')
+            self.assertEqual(io.data, [{'id': 1}])
+        self.assertEqual(len(client.requests), 2)
+        self.assertEqual(
+            client.requests[-1]['headers']['If-None-Match'], '"v1"'
+        )
+
+        # Historical periods should not expire right away
+        for i in range(2):
+            io = CachedIO(
+                start_date='2000-01-01', end_date='2000-01-31'
+            )
+            self.assertEqual(io.data, [{'id': 2}])
+        self.assertEqual(len(client.requests), 3)
+
+    def test_loader_error(self):
+        set_cache(self.cache)
+        self.cache.max_size = None
+        client = FakeClient(
+            FakeResponse(200, b'Service unavailable'),
+            FakeResponse(200, b'[{"id": 1}]'),
+            FakeResponse(200, b'[{"id": 2}]'),
+        )
+        set_session(client)
+
+        # Responses that cannot be parsed should not be cached
+        options = dict(start_date='2000-01-01', end_date='2000-01-31')
+        with self.assertRaises(ParseFailed):
+            CachedIO(**options)
+        self.assertEqual(CachedIO(**options).data, [{'id': 1}])
+        self.assertEqual(CachedIO(**options).data, [{'id': 1}])
+        self.assertEqual(len(client.requests), 2)
+
+        # Historical entries expire after cache_ttl_historical
+        entry = self.cache.get(CachedIO(**options).request_key)
+        self.assertEqual(entry.ttl, CachedIO.cache_ttl_historical)
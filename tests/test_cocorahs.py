@@ -1,10 +1,52 @@
-from .base import ClimataTestCase
+from .base import ClimataTestCase, FakeResponse, FakeClient
 from climata.cocorahs import CocorahsIO
+from climata.session import set_session
+from datetime import datetime
+
+COCORAHS_XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<Cocorahs><DailyPrecipReports>
+<DailyPrecipReport>
+<StationNumber>MN-HN-1</StationNumber>
+<ObservationDate>2014-07-01</ObservationDate>
+<ObservationTime>07:00 AM</ObservationTime>
+<TotalPrecipAmt>0.25</TotalPrecipAmt>
+</DailyPrecipReport>
+<DailyPrecipReport>
+<StationNumber>MN-HN-2</StationNumber>
+<ObservationDate>2014-07-01</ObservationDate>
+<ObservationTime>08:00 AM</ObservationTime>
+<TotalPrecipAmt>0.50</TotalPrecipAmt>
+</DailyPrecipReport>
+</DailyPrecipReports></Cocorahs>
+"""
 
 
 class CocorahsTestCase(ClimataTestCase):
     module = "cocorahs"
 
+    def test_parse(self):
+        options = dict(
+            state='MN',
+            county='HN',
+            start_date='2014-07-01',
+            end_date='2014-07-01',
+        )
+        set_session(FakeClient(
+            FakeResponse(200, COCORAHS_XML),
+            FakeResponse(200, COCORAHS_XML),
+        ))
+        try:
+            data = CocorahsIO(**options)
+            rows = list(CocorahsIO.stream(**options))
+        finally:
+            set_session(None)
+
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[1].stationnumber, 'MN-HN-2')
+        self.assertEqual(data[1].observationdate, datetime(2014, 7, 1))
+        self.assertEqual(data[1].totalprecipamt, 0.5)
+        self.assertEqual(rows, list(data))
+
     def test_cocorahs(self):
         data = CocorahsIO(
             state='MN',
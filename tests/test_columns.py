@@ -0,0 +1,118 @@
+import json
+import re
+import unittest
+from array import array
+from datetime import datetime
+from io import StringIO
+from .base import ClimataTestCase, HydrometClient
+from .test_parsers import WaterMlIO, WATERML
+from climata.session import set_session
+from climata.columns import ColumnData, DateColumn
+from climata.acis import DataIO
+from climata.hydromet import DailyDataIO
+from climata.nws import TimeSeriesIO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipUnless(np, "numpy not installed")
+class ArrayTestCase(ClimataTestCase):
+    module = "columns"
+
+    def test_waterml(self):
+        series = WaterMlIO(file=StringIO(WATERML))[0]
+        arrays = series.data.to_numpy()
+        self.assertEqual(list(arrays), ['date', 'value'])
+
+        # Dates are converted to UTC
+        self.assertEqual(
+            arrays['date'][0], np.datetime64('2014-07-01T05:00:00')
+        )
+        self.assertEqual(arrays['value'].tolist(), [31200, 31300])
+
+    def test_acis(self):
+        data = DataIO(
+            data=[['0.10', 'M'], ['T', '75']],
+            parameter=['pcpn', 'maxt'],
+            start_date=datetime(2014, 7, 1),
+            end_date=datetime(2014, 7, 2),
+        )
+        arrays = data.to_numpy()
+        self.assertEqual(list(arrays), ['date', 'pcpn', 'maxt'])
+        self.assertEqual(arrays['date'][1], np.datetime64('2014-07-02'))
+
+        # Missing and non-numeric values are masked
+        self.assertEqual(arrays['pcpn'].tolist(), [0.1, None])
+        self.assertEqual(arrays['maxt'].tolist(), [None, 75])
+
+    def test_hydromet(self):
+        set_session(HydrometClient())
+        try:
+            data = DailyDataIO(
+                station='ACAO',
+                parameter='QD',
+                start_date='2014-07-01',
+                end_date='2014-07-02',
+            )
+        finally:
+            set_session(None)
+        arrays = data.to_numpy()
+        self.assertEqual(arrays['date'][0], np.datetime64('2014-07-01'))
+        self.assertEqual(arrays['qd'].tolist(), [123.45, 150.0])
+
+    def test_nws(self):
+        data = TimeSeriesIO(data=[
+            {'date': '2014-07-01 12:00:00', 'year': 1950, 'value': '1.5'},
+        ])
+        arrays = data.to_numpy()
+        self.assertEqual(arrays['value'].tolist(), [1500])
+        self.assertEqual(arrays['value'][0], next(iter(data)).value)
+
+    def test_empty(self):
+        # Series without any values still have (empty) typed columns
+        xml = re.sub(r'<ns1:value dateTime.*?</ns1:value>', '', WATERML)
+        io = WaterMlIO.__new__(WaterMlIO)
+        io.use_json = True
+        io.file = StringIO(json.dumps({'value': {'timeSeries': [{
+            'sourceInfo': {
+                'siteName': 'MISSISSIPPI RIVER AT ST. PAUL, MN',
+                'siteCode': [{'value': '05331000'}],
+                'geoLocation': {'geogLocation': {
+                    'latitude': 44.9444, 'longitude': -93.0897,
+                }},
+            },
+            'variable': {
+                'variableCode': [{'value': '00060'}],
+                'variableName': 'Streamflow',
+                'unit': {'unitCode': 'ft3/s'},
+            },
+            'values': [{'value': []}],
+        }]}}))
+        io.refresh()
+        nws = TimeSeriesIO(data=ColumnData([
+            ('date', DateColumn()),
+            ('year', array('d')),
+            ('value', array('d')),
+        ]))
+        for data in WaterMlIO(file=StringIO(xml))[0].data, io[0].data, nws:
+            self.assertEqual(len(data), 0)
+            arrays = data.to_numpy()
+            self.assertEqual(arrays['date'].dtype, np.dtype('datetime64[s]'))
+            self.assertEqual(len(arrays['value']), 0)
+            if pyarrow:
+                self.assertEqual(data.to_arrow().num_rows, 0)
+
+    @unittest.skipUnless(pyarrow, "pyarrow not installed")
+    def test_arrow(self):
+        series = WaterMlIO(file=StringIO(WATERML))[0]
+        table = series.data.to_arrow()
+        self.assertEqual(table.column_names, ['date', 'value'])
+        self.assertEqual(table.num_rows, 2)
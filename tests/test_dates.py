@@ -0,0 +1,82 @@
+import unittest
+from datetime import date, datetime, time
+from .base import ClimataTestCase
+from climata.base import fill_date_range
+from climata.dates import compile_format, DateParser, date_range
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class DatesTestCase(ClimataTestCase):
+    module = "dates"
+
+    def test_compile_format(self):
+        formats = [
+            '%Y-%m-%d %I:%M %p',
+            '%Y-%m-%dT%H:%M:%S',
+            '%m/%d/%Y',
+            '%m/%d/%Y %H:%M',
+            '%I:%M %p',
+        ]
+        values = [
+            '2014-07-01 07:15 PM',
+            '2014-07-01 12:05 am',
+            '2014-07-01T23:59:00',
+            '07/01/2014',
+            '7/1/2014',
+            '07/01/2014 13:30',
+            '12:30 AM',
+            '13:30 PM',
+            '2014-13-01T00:00:00',
+            'invalid',
+        ]
+        for fmt in formats:
+            parse = compile_format(fmt)
+            for value in values:
+                try:
+                    expected = datetime.strptime(value, fmt)
+                except ValueError:
+                    with self.assertRaises(ValueError):
+                        parse(value)
+                    continue
+                if '%Y' not in fmt:
+                    expected = expected.time()
+                self.assertEqual(parse(value), expected)
+
+    def test_date_parser(self):
+        parser = DateParser(['%Y-%m-%d %I:%M %p', '%Y-%m-%d', '%I:%M %p'])
+        self.assertEqual(
+            parser.parse('2014-07-01', 'date'), datetime(2014, 7, 1)
+        )
+        self.assertEqual(parser.parse('07:00 AM', 'time'), time(7, 0))
+
+        # The detected format is tried first, then the others
+        self.assertIs(parser.detected['date'], parser.parsers[1])
+        self.assertEqual(
+            parser.parse('2014-07-01 07:00 AM', 'date'),
+            datetime(2014, 7, 1, 7, 0)
+        )
+        with self.assertRaises(ValueError):
+            parser.parse('1.5', 'date')
+
+    def test_date_range(self):
+        dates = date_range(date(2014, 2, 27), date(2014, 3, 2))
+        self.assertEqual(len(dates), 4)
+        self.assertEqual(dates[-1], date(2014, 3, 2))
+        self.assertEqual(date_range(date(2014, 3, 2), date(2014, 3, 1)), [])
+        self.assertEqual(
+            fill_date_range(
+                '2014-01-01 00:00:00', '2014-01-02 00:00:00',
+                date_format='%Y-%m-%d %H:%M:%S',
+            ),
+            [date(2014, 1, 1), date(2014, 1, 2)]
+        )
+
+    @unittest.skipUnless(np, "numpy not installed")
+    def test_date_range_numpy(self):
+        dates = date_range(date(2014, 2, 27), date(2014, 3, 2), as_numpy=True)
+        self.assertEqual(dates.dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(dates[-1], np.datetime64('2014-03-02'))
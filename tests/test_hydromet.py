@@ -1,5 +1,6 @@
-from .base import ClimataTestCase
+from .base import ClimataTestCase, FakeResponse, FakeClient, HydrometClient
 from climata.hydromet import DailyDataIO, InstantDataIO, AgrimetRecentIO
+from climata.session import set_session
 from datetime import datetime, date
 from wq.io.exceptions import NoData
 
@@ -7,6 +8,39 @@ from wq.io.exceptions import NoData
 class HydrometTestCase(ClimataTestCase):
     module = "hydromet"
 
+    def test_parse(self):
+        set_session(HydrometClient())
+        options = dict(
+            station='ACAO',
+            parameter='QD',
+            start_date='2014-07-01',
+            end_date='2014-07-02',
+        )
+        try:
+            data = DailyDataIO(**options)
+            rows = list(DailyDataIO.stream(**options))
+        finally:
+            set_session(None)
+
+        # END DATA and trailing HTML are excluded
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[1].date, datetime(2014, 7, 2))
+        self.assertEqual(data[1].qd, 150.0)
+        self.assertEqual(rows, list(data))
+
+    def test_parse_nodata(self):
+        set_session(FakeClient(FakeResponse(200, b'<HTML>No data</HTML>')))
+        try:
+            with self.assertRaises(NoData):
+                DailyDataIO(
+                    station='ACAO',
+                    parameter='QD',
+                    start_date='2014-07-01',
+                    end_date='2014-07-02',
+                )
+        finally:
+            set_session(None)
+
     def test_daily_data(self):
         data = DailyDataIO(
             station='HPD',
@@ -1,6 +1,16 @@
-from .base import ClimataTestCase
+from .base import ClimataTestCase, FakeResponse, FakeClient
 from climata.nws import EnsembleSiteIO, EnsembleForecastIO, HydroForecastIO
+from climata.session import set_session
 from datetime import datetime, date
+from io import BytesIO
+import zipfile
+
+ENSEMBLE_CSV = """GMT,KLAO3,KLAO3,KLAO3,KLAO3L,KLAO3L
+,QINE,QINE,QINE,QINE,QINE
+2014-01-01 12:00:00,1.5,2.5,3.5,0.1,0.2
+2014-01-02 12:00:00,1.0,,3.0,0.1,0.2
+2014-01-03 12:00:00,0.5,1.5,2.5,0.1,0.2
+"""
 
 
 class NwsTestCase(ClimataTestCase):
@@ -63,6 +73,53 @@ class NwsTestCase(ClimataTestCase):
         for row in item.data:
             self.assertLess(row.date.date(), date(2014, 2, 15))
 
+    def load_ensemble(self, **kwargs):
+        output = BytesIO()
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('ensemble.csv', ENSEMBLE_CSV)
+        set_session(FakeClient(FakeResponse(200, output.getvalue())))
+        try:
+            return EnsembleForecastIO(
+                basin='klamath',
+                start_date='2014-01-01',
+                end_date='2014-01-02',
+                station='KLAO3',
+                **kwargs
+            )
+        finally:
+            set_session(None)
+
+    def test_ensemble_parse(self):
+        data = self.load_ensemble()
+
+        # KLAO3L is treated as the same site
+        self.assertEqual(len(data), 2)
+        item = data[0]
+        self.assertEqual(item.site, "KLAO3")
+        self.assertEqual(len(item.data), 6)
+
+        row = item.data[1]
+        self.assertEqual(row.date, datetime(2014, 1, 1, 12))
+        self.assertEqual(row.year, 1951)
+        self.assertEqual(row.value, 2500)
+
+        try:
+            import numpy
+        except ImportError:
+            return
+        dates, years, values = item.data.to_matrix()
+        self.assertEqual(values.shape, (2, 3))
+        self.assertEqual(years.tolist(), [1950, 1951, 1952])
+        self.assertEqual(values.mean(axis=0).tolist(), [1250, 2500, 3250])
+        self.assertEqual(numpy.ma.count_masked(values), 1)
+
+    def test_ensemble_spool(self):
+        # Archives larger than spool_size are downloaded to a temporary file
+        data = self.load_ensemble(spool_size=16)
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0].data[1].value, 2500)
+        self.assertFalse(hasattr(data, 'archive'))
+
     def test_ensemble_sites(self):
         sites = EnsembleSiteIO()
         self.assertGreater(len(sites), 0)
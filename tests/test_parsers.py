@@ -0,0 +1,183 @@
+import json
+import math
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+from wq.io import TupleMapper, BaseIO
+from .base import ClimataTestCase, RDB
+from climata.parsers import WaterMlParser, RdbParser
+from climata.columns import ColumnData
+
+WATERML = """<?xml version="1.0" encoding="UTF-8"?>
+<ns1:timeSeriesResponse xmlns:ns1="http://www.cuahsi.org/waterML/1.1/">
+<ns1:queryInfo><ns1:criteria /></ns1:queryInfo>
+<ns1:timeSeries name="USGS:05331000:00060:00000">
+<ns1:sourceInfo>
+<ns1:siteName>MISSISSIPPI RIVER AT ST. PAUL, MN</ns1:siteName>
+<ns1:siteCode network="NWIS" agencyCode="USGS">05331000</ns1:siteCode>
+<ns1:geoLocation><ns1:geogLocation srs="EPSG:4326">
+<ns1:latitude>44.9444</ns1:latitude>
+<ns1:longitude>-93.0897</ns1:longitude>
+</ns1:geogLocation></ns1:geoLocation>
+</ns1:sourceInfo>
+<ns1:variable>
+<ns1:variableCode vocabulary="NWIS:UnitValues">00060</ns1:variableCode>
+<ns1:variableName>Streamflow, ft&#179;/s</ns1:variableName>
+<ns1:unit><ns1:unitCode>ft3/s</ns1:unitCode></ns1:unit>
+</ns1:variable>
+<ns1:values>
+<ns1:value dateTime="2014-07-01T00:00:00.000-05:00">31200</ns1:value>
+<ns1:value dateTime="2014-07-01T00:15:00.000-05:00">31300</ns1:value>
+<ns1:qualifier qualifierID="0"><ns1:qualifierCode>P</ns1:qualifierCode>
+</ns1:qualifier>
+</ns1:values>
+<ns1:values>
+<ns1:value dateTime="2014-07-01T00:00:00.000-05:00">1</ns1:value>
+</ns1:values>
+</ns1:timeSeries>
+</ns1:timeSeriesResponse>
+"""
+
+
+class WaterMlIO(WaterMlParser, TupleMapper, BaseIO):
+    pass
+
+
+class WaterMlTestCase(ClimataTestCase):
+    module = "parsers"
+
+    def test_parse(self):
+        data = WaterMlIO(file=StringIO(WATERML))
+        self.assertEqual(len(data), 1)
+        series = data[0]
+        self.assertEqual(series.site_code, '05331000')
+        self.assertEqual(series.variable_code, '00060')
+        self.assertEqual(series.unit, 'ft3/s')
+        self.assertEqual(series.latitude, 44.9444)
+        self.assertEqual(series.longitude, -93.0897)
+
+        # Only the first values element is used
+        self.assertEqual(len(series.data), 2)
+        row = series.data[1]
+        tz = timezone(timedelta(hours=-5))
+        self.assertEqual(row.date, datetime(2014, 7, 1, 0, 15, tzinfo=tz))
+        self.assertEqual(row.date.utcoffset(), timedelta(hours=-5))
+        self.assertEqual(row.value, 31300)
+
+    def test_stream(self):
+        io = WaterMlIO.__new__(WaterMlIO)
+        io.file = StringIO(WATERML)
+        series = list(io.iter_parse())
+        self.assertEqual(len(series), 1)
+        self.assertEqual(list(series[0]['data'].data)[0]['value'], 31200)
+
+    def test_parse_json(self):
+        self.check_json(8 * 1024)
+
+    def test_parse_json_chunks(self):
+        # Values split across reads are decoded correctly
+        for chunk_size in 1, 7, 64:
+            self.check_json(chunk_size)
+
+    def check_json(self, chunk_size):
+        io = WaterMlIO.__new__(WaterMlIO)
+        io.use_json = True
+        io.json_chunk_size = chunk_size
+        io.file = StringIO(json.dumps({'value': {
+            'queryInfo': {'note': [{'value': 'timeSeries'}]},
+            'timeSeries': [{
+                'sourceInfo': {
+                    'siteName': 'MISSISSIPPI RIVER AT ST. PAUL, MN',
+                    'siteCode': [{'value': '05331000'}],
+                    'geoLocation': {'geogLocation': {
+                        'latitude': 44.9444, 'longitude': -93.0897,
+                    }},
+                },
+                'variable': {
+                    'variableCode': [{'value': '00060'}],
+                    'variableName': 'Streamflow',
+                    'unit': {'unitCode': 'ft3/s'},
+                },
+                'values': [{
+                    'value': [{
+                        'value': '31200',
+                        'dateTime': '2014-07-01T00:00:00.000-05:00',
+                    }, {
+                        'value': '31300',
+                        'dateTime': '2014-07-01T00:15:00.000-05:00',
+                    }],
+                    'qualifier': [{'qualifierCode': 'P'}],
+                }, {
+                    'value': [{
+                        'value': '1',
+                        'dateTime': '2014-07-01T00:00:00.000-05:00',
+                    }],
+                }],
+            }],
+        }}))
+        io.refresh()
+        series = io[0]
+        self.assertEqual(series.site_code, '05331000')
+        self.assertEqual(series.variable_code, '00060')
+        self.assertEqual(series.latitude, 44.9444)
+
+        # Only the first values block is used
+        self.assertEqual([row.value for row in series.data], [31200, 31300])
+        row = series.data[0]
+        self.assertEqual(row.date.utcoffset(), timedelta(hours=-5))
+        self.assertEqual(row.value, 31200)
+
+
+class RdbIO(RdbParser, TupleMapper, BaseIO):
+    pass
+
+
+class RdbTestCase(ClimataTestCase):
+    module = "parsers"
+
+    def test_parse(self):
+        data = RdbIO(file=StringIO(RDB))
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data[0].site_no, '05331000')
+        self.assertEqual(data[0].dec_lat_va, 44.9444)
+        self.assertEqual(data[0].begin_date, date(1950, 10, 1))
+        self.assertEqual(data[1].count_nu, 12)
+        self.assertTrue(math.isnan(data[1].dec_lat_va))
+        self.assertIsNone(data[1].begin_date)
+
+        # Columns with invalid values are left as strings
+        self.assertEqual(data[1].note, 'n/a')
+
+    def test_columnar(self):
+        data = RdbIO(file=StringIO(RDB), columnar=True)
+        self.assertIsInstance(data.data, ColumnData)
+        self.assertEqual(data.data.column('count_nu').tolist(), [24000, 12])
+        self.assertEqual(data[0].begin_date, date(1950, 10, 1))
+        self.assertIsNone(data[1].begin_date)
+
+    def test_partial_dates(self):
+        rdb = (
+            "site_no\tbegin_date\n15s\t20d\n"
+            "05331000\t1950-10-01\n"
+            "05331580\t1950-10\n"
+            "05331833\t1950\n"
+            "05340500\t\n"
+        )
+        # Partial dates are left as text
+        expected = [date(1950, 10, 1), '1950-10', '1950', None]
+        for columnar in False, True:
+            data = RdbIO(file=StringIO(rdb), columnar=columnar)
+            self.assertEqual([row.begin_date for row in data], expected)
+
+    def test_datetimes(self):
+        rdb = (
+            "site_no\tdatetime\n15s\t20d\n"
+            "05331000\t2014-07-01 12:15\n"
+            "05331000\t2014-07-01 12:30\n"
+            "05331000\t\n"
+        )
+        expected = [
+            datetime(2014, 7, 1, 12, 15), datetime(2014, 7, 1, 12, 30), None
+        ]
+        for columnar in False, True:
+            data = RdbIO(file=StringIO(rdb), columnar=columnar)
+            self.assertEqual([row.datetime for row in data], expected)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from .base import ClimataTestCase, FakeResponse, FakeClient
+from climata import replay, snotel, throttle
+from climata.session import set_session
+from climata.acis import StationMetaIO
+from climata.snotel import StationDailyDataIO
+from climata.snotel.transport import RecordingTransport, ReplayTransport
+from benchmarks.cases import CASES
+from benchmarks.run import FIXTURES, count_rows
+from benchmarks.synthetic import SyntheticTransport
+
+
+class ReplayTestCase(ClimataTestCase):
+    module = "replay"
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        set_session(None)
+        shutil.rmtree(self.path)
+
+    def test_record_replay(self):
+        body = b'{"meta": [{"uid": 1, "ll": [-93, 45]}]}'
+        client = FakeClient(FakeResponse(
+            200, body, {'Content-Type': 'application/json'}
+        ))
+        set_session(replay.RecordingSession(self.path, client))
+        StationMetaIO(basin='07010000')
+        self.assertEqual(len(client.requests), 1)
+
+        set_session(replay.ReplaySession(self.path))
+        data = StationMetaIO(basin='07010000')
+        self.assertEqual(data[0].uid, 1)
+        self.assertEqual(data[0].latitude, 45)
+
+        with self.assertRaises(replay.FixtureNotFound):
+            StationMetaIO(basin='07010001')
+
+
+class ReplayTransportTestCase(ClimataTestCase):
+    module = "replay"
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        throttle.ENABLED = False
+
+    def tearDown(self):
+        snotel.set_transport(None)
+        throttle.ENABLED = True
+        shutil.rmtree(self.path)
+
+    def load(self, end_date='2014-07-03'):
+        return StationDailyDataIO(
+            station='302:OR:SNTL', parameter='WTEQ',
+            start_date='2014-07-01', end_date=end_date,
+        )
+
+    def test_record_replay(self):
+        snotel.set_transport(
+            RecordingTransport(self.path, SyntheticTransport())
+        )
+        recorded = [(row.date, row.value) for row in self.load()[0].data]
+        self.assertEqual(len(recorded), 3)
+
+        snotel.set_transport(ReplayTransport(self.path))
+        data = self.load()
+        self.assertEqual(data[0].element_name, 'SNOW WATER EQUIVALENT')
+        self.assertEqual(
+            [(row.date, row.value) for row in data[0].data], recorded
+        )
+
+        with self.assertRaises(replay.FixtureNotFound):
+            self.load(end_date='2014-07-04')
+
+
+class BenchmarkFixtureTestCase(ClimataTestCase):
+    """
+    Load each benchmark case from the checked-in fixtures.
+    """
+    module = "replay"
+
+    def setUp(self):
+        path = os.path.join(FIXTURES, 'small')
+        set_session(replay.ReplaySession(path))
+        snotel.set_transport(ReplayTransport(path))
+        throttle.ENABLED = False
+
+    def tearDown(self):
+        set_session(None)
+        snotel.set_transport(None)
+        throttle.ENABLED = True
+
+    def test_cases(self):
+        for case in CASES['small']:
+            if not case.synthetic:
+                continue
+            self.assertGreater(count_rows(case.load()), 0, case.name)
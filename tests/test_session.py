@@ -0,0 +1,62 @@
+from .base import ClimataTestCase, FakeClient
+from climata.session import (
+    make_session, get_session, set_session, configure, POOL_MAXSIZE
+)
+
+
+class ClosingClient(FakeClient):
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class SessionTestCase(ClimataTestCase):
+    module = "session"
+
+    def tearDown(self):
+        set_session(None)
+
+    def test_host_pool_sizes(self):
+        session = make_session(
+            pool_maxsize=5, host_pool_sizes={'data.rcc-acis.org': 20}
+        )
+        for scheme in 'http', 'https':
+            acis = session.get_adapter(
+                '%s://data.rcc-acis.org/StnMeta' % scheme
+            )
+            self.assertEqual(acis._pool_maxsize, 20)
+            self.assertEqual(acis._pool_connections, 1)
+
+            other = session.get_adapter(
+                '%s://waterservices.usgs.gov/nwis/dv/' % scheme
+            )
+            self.assertIsNot(other, acis)
+            self.assertEqual(other._pool_maxsize, 5)
+        session.close()
+
+    def test_default_pool_size(self):
+        session = make_session()
+        adapter = session.get_adapter('https://data.rcc-acis.org/StnMeta')
+        self.assertEqual(adapter._pool_maxsize, POOL_MAXSIZE)
+        session.close()
+
+    def test_set_session(self):
+        first, second = ClosingClient(), ClosingClient()
+        set_session(first)
+        self.assertIs(get_session(), first)
+
+        # The replaced session is closed
+        set_session(second)
+        self.assertTrue(first.closed)
+        self.assertIs(get_session(), second)
+
+        # Setting the same session again does not close it
+        set_session(second)
+        self.assertFalse(second.closed)
+
+        # configure() also replaces (and closes) the current session
+        configure(host_pool_sizes={'data.rcc-acis.org': 3})
+        self.assertTrue(second.closed)
+        adapter = get_session().get_adapter('https://data.rcc-acis.org/')
+        self.assertEqual(adapter._pool_maxsize, 3)